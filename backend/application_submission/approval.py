@@ -0,0 +1,215 @@
+"""
+入職申請批量審批
+將選中的待審批申請一次性轉換為 StaffProfile：
+- 重複檢查、員工編號分配各只需少量查詢
+- 員工檔案及所有子記錄以 bulk_create 在同一事務內寫入
+- 個人相片在存儲層面硬連結或複製，不經 Python 讀入內存
+"""
+import os
+import shutil
+import uuid
+
+from django.db import models, transaction
+from django.db.models import Q
+
+from staff_management.duplicates import apply_duplicate_keys, duplicate_lookup_keys
+from staff_management.search import deferred_indexing, mark_documents
+from staff_management.models import (
+    StaffProfile, EducationBackground, FamilyMember, WorkExperience,
+    ProfessionalQualification, AssociationPosition,
+)
+from .models import StaffApplication
+
+# 由申請直接複製到 StaffProfile 的個人資料欄位
+PROFILE_FIELDS = (
+    'name_chinese', 'name_foreign', 'gender', 'marital_status', 'birth_place', 'birth_date', 'origin',
+    'id_type', 'id_number', 'id_expiry_date', 'bank_account_number', 'social_security_number',
+    'home_phone', 'mobile_phone', 'address', 'email', 'alumni_class', 'alumni_class_year',
+    'alumni_class_duration', 'teacher_certificate_number', 'teaching_staff_rank',
+    'teaching_staff_rank_effective_date', 'emergency_contact_name', 'emergency_contact_phone',
+    'emergency_contact_relationship',
+)
+
+# 子記錄複製規則：(申請的 related_name, StaffProfile 子模型, 複製的欄位)
+CHILD_COPY_RULES = (
+    ('educations', EducationBackground, (
+        'study_period', 'school_name', 'education_level', 'degree_name', 'certificate_date',
+        'is_phd', 'is_master', 'is_overseas_study',
+    )),
+    ('family_members', FamilyMember, (
+        'name', 'relationship', 'birth_date', 'age', 'education_level', 'institution', 'alumni_class',
+    )),
+    ('work_experiences', WorkExperience, ('employment_period', 'organization', 'position', 'salary')),
+    ('professional_qualifications', ProfessionalQualification, (
+        'qualification_name', 'issuing_organization', 'issue_date',
+    )),
+    ('association_positions', AssociationPosition, ('association_name', 'position', 'start_year', 'end_year')),
+)
+
+
+def _copy_values(model, source, fields):
+    """複製欄位值；申請表中可為空、但員工檔案中不可為空的文字欄位以空字串代替 None"""
+    values = {}
+    for field in fields:
+        value = getattr(source, field)
+        if value is None:
+            target = model._meta.get_field(field)
+            if not target.null and isinstance(target, (models.CharField, models.TextField)):
+                value = ''
+        values[field] = value
+    return values
+
+
+def _lookup_keys(record):
+    return duplicate_lookup_keys(record.id_number_normalized, record.name_normalized, record.birth_date)
+
+
+def find_existing_duplicates(applications):
+    """
+    一次查詢找出已存在對應員工檔案的申請
+    以標準化證件號碼及標準化姓名+出生日期比對（均有索引），返回已存在的查重鍵集合
+    """
+    id_numbers = {app.id_number_normalized for app in applications if app.id_number_normalized}
+    names = {app.name_normalized for app in applications if app.name_normalized}
+    if not id_numbers and not names:
+        return set()
+
+    existing_keys = set()
+    rows = StaffProfile.objects.filter(
+        Q(id_number_normalized__in=id_numbers) | Q(name_normalized__in=names)
+    ).values_list('id_number_normalized', 'name_normalized', 'birth_date')
+    for row in rows:
+        existing_keys.update(duplicate_lookup_keys(*row))
+    return existing_keys
+
+
+def allocate_staff_ids(applications):
+    """
+    為申請分配臨時員工編號 TEMP-<申請編號>，與現有編號衝突時加上隨機後綴
+    每輪只需一次查詢，通常一輪即可完成
+    """
+    allocated = {app.submission_id: f"TEMP-{app.submission_id}" for app in applications}
+    while allocated:
+        taken = set(
+            StaffProfile.objects.filter(staff_id__in=allocated.values()).values_list('staff_id', flat=True)
+        )
+        collisions = {sid: staff_id for sid, staff_id in allocated.items() if staff_id in taken}
+        if not collisions:
+            break
+        for submission_id in collisions:
+            allocated[submission_id] = f"TEMP-{submission_id}-{uuid.uuid4().hex[:4]}"
+    return allocated
+
+
+def copy_photo(source_field, staff_id):
+    """
+    在存儲層面複製申請相片到 staff_photos/，返回新的存儲名稱
+    本地文件系統優先使用硬連結，無法連結時退回文件複製；
+    其他存儲後端以流式方式複製。
+    """
+    storage = source_field.storage
+    basename = os.path.basename(source_field.name)
+    target_name = storage.get_available_name(f"staff_photos/{staff_id}_{basename}")
+
+    try:
+        source_path = storage.path(source_field.name)
+        target_path = storage.path(target_name)
+    except NotImplementedError:
+        with storage.open(source_field.name, 'rb') as source:
+            return storage.save(target_name, source)
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copyfile(source_path, target_path)
+    return target_name
+
+
+def approve_applications(queryset, admin_user):
+    """
+    批准選中的待審批申請並創建對應的 StaffProfile
+    返回新建的員工檔案數量
+    """
+    applications = list(
+        queryset.filter(status='pending').order_by('submission_id').prefetch_related(
+            *(related_name for related_name, _, _ in CHILD_COPY_RULES)
+        )
+    )
+    if not applications:
+        return 0
+
+    existing_keys = find_existing_duplicates(applications)
+    to_create = []
+    for app in applications:
+        keys = _lookup_keys(app)
+        if any(key in existing_keys for key in keys):
+            continue
+        # 同一批次中的重複申請只建立一次
+        existing_keys.update(keys)
+        to_create.append(app)
+
+    staff_ids = allocate_staff_ids(to_create)
+    copied_photos = []
+
+    try:
+        # 員工檔案及子記錄都以 bulk_create 寫入，不觸發保存信號，需要手動登記重建搜尋索引
+        with transaction.atomic(), deferred_indexing():
+            profiles = []
+            for app in to_create:
+                educations = list(app.educations.all())
+                profile = StaffProfile(
+                    staff_id=staff_ids[app.submission_id],
+                    staff_name=app.name_chinese,
+                    created_by_admin=admin_user,
+                    # 全局標記由學歷記錄計算；新檔案沒有入職日期，年資為 0
+                    is_foreign_national=False,
+                    is_master=any(edu.is_master for edu in educations),
+                    is_phd=any(edu.is_phd for edu in educations),
+                    is_overseas_study=any(edu.is_overseas_study for edu in educations),
+                    school_seniority_description="0年0個月",
+                    **{field: getattr(app, field) for field in PROFILE_FIELDS},
+                )
+                # bulk_create 不會調用 save()，這裡手動執行姓名修復及設定查重鍵
+                profile.clean_staff_name()
+                apply_duplicate_keys(profile)
+
+                # 同步個人相片
+                if app.profile_picture:
+                    profile.profile_picture = copy_photo(app.profile_picture, profile.staff_id)
+                    copied_photos.append((app.profile_picture.storage, profile.profile_picture.name))
+                profiles.append(profile)
+
+            StaffProfile.objects.bulk_create(profiles)
+
+            # MySQL 不支援 bulk_create 返回主鍵，需按員工編號回查
+            if any(profile.pk is None for profile in profiles):
+                pk_map = dict(
+                    StaffProfile.objects.filter(staff_id__in=[p.staff_id for p in profiles])
+                    .values_list('staff_id', 'pk')
+                )
+                for profile in profiles:
+                    profile.pk = pk_map[profile.staff_id]
+
+            # 複製關聯記錄，每種子記錄一次 bulk_create
+            for related_name, model, fields in CHILD_COPY_RULES:
+                children = [
+                    model(staff=profile, **_copy_values(model, row, fields))
+                    for app, profile in zip(to_create, profiles)
+                    for row in getattr(app, related_name).all()
+                ]
+                if children:
+                    model.objects.bulk_create(children)
+            mark_documents('staff', [profile.pk for profile in profiles])
+
+            # 更新申請狀態（包括已存在員工檔案的重複申請）
+            StaffApplication.objects.filter(
+                submission_id__in=[app.submission_id for app in applications]
+            ).update(status='approved')
+    except Exception:
+        # 事務回滾後清理已複製的相片
+        for storage, name in copied_photos:
+            storage.delete(name)
+        raise
+
+    return len(profiles)
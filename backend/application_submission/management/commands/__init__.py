@@ -0,0 +1 @@
+# 空文件，Django需要這個文件來識別commands包
\ No newline at end of file
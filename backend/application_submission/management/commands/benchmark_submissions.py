@@ -0,0 +1,154 @@
+import io
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases, setup_test_environment, teardown_test_environment
+
+from application_submission.photos import wait_for_pending
+
+
+class Command(BaseCommand):
+    """
+    入職申請提交壓力測試
+    在臨時測試資料庫中反覆提交申請，報告每秒提交數、延遲及每次提交的查詢數，
+    不會寫入正式資料庫。
+    使用方法：python manage.py benchmark_submissions --count 500 --threads 4 --photo
+    """
+    help = '入職申請提交壓力測試（使用臨時測試資料庫）'
+
+    SUBMIT_URL = '/api/application/submit/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='提交總數（預設 200）')
+        parser.add_argument('--threads', type=int, default=1, help='併發線程數（SQLite 建議保持 1）')
+        parser.add_argument('--rows', type=int, default=3, help='每種子記錄的行數（預設 3）')
+        parser.add_argument('--photo', action='store_true', help='以 multipart 附帶個人相片提交')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            # 放寬限流，令牌桶仍照常扣除，以便計入其開銷
+            throttles = {
+                **settings.PUBLIC_WRITE_THROTTLES,
+                'application_submit': {
+                    **settings.PUBLIC_WRITE_THROTTLES['application_submit'],
+                    'IP_RATE': 1e6, 'IP_BURST': 1e6, 'GLOBAL_RATE': 1e6, 'GLOBAL_BURST': 1e6,
+                },
+            }
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root, PUBLIC_WRITE_THROTTLES=throttles):
+                self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, options):
+        count, threads, rows, photo = options['count'], options['threads'], options['rows'], options['photo']
+        photo_bytes = self._make_photo() if photo else None
+
+        # 預熱並統計單次提交的查詢數
+        with CaptureQueriesContext(connection) as queries:
+            response = self._submit(Client(HTTP_HOST='localhost'), 0, rows, photo_bytes)
+        if response.status_code != 201:
+            self.stdout.write(self.style.ERROR(f'提交失敗: {response.status_code} {response.content[:500]!r}'))
+            return
+
+        latencies = []
+        lock = threading.Lock()
+        per_thread = [count // threads + (1 if i < count % threads else 0) for i in range(threads)]
+
+        def worker(index, total):
+            client = Client(HTTP_HOST='localhost')
+            local = []
+            for n in range(total):
+                started = time.perf_counter()
+                resp = self._submit(client, index * count + n + 1, rows, photo_bytes)
+                local.append(time.perf_counter() - started)
+                if resp.status_code != 201:
+                    raise RuntimeError(f'提交失敗: {resp.status_code}')
+            with lock:
+                latencies.extend(local)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(per_thread)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        photo_started = time.perf_counter()
+        wait_for_pending()
+        photo_elapsed = time.perf_counter() - photo_started
+
+        latencies.sort()
+        self.stdout.write(self.style.SUCCESS('=== 入職申請提交壓力測試 ==='))
+        self.stdout.write(f'提交數: {len(latencies)}，線程數: {threads}，每種子記錄 {rows} 行，附帶相片: {"是" if photo else "否"}')
+        self.stdout.write(f'每次提交查詢數: {len(queries)}')
+        self.stdout.write(f'吞吐量: {len(latencies) / elapsed:.1f} 次/秒（共 {elapsed:.2f} 秒）')
+        self.stdout.write(
+            f'延遲: 平均 {statistics.mean(latencies) * 1000:.1f} ms，'
+            f'P95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms'
+        )
+        if photo:
+            self.stdout.write(f'背景相片處理完成等待: {photo_elapsed:.2f} 秒')
+
+    def _payload(self, n, rows):
+        return {
+            'name_chinese': f'測試申請人{n}',
+            'name_foreign': f'Applicant {n}',
+            'gender': 'M',
+            'birth_date': '1990-01-01',
+            'id_number': f'{n:07d}(1)',
+            'mobile_phone': '66000000',
+            'email': f'applicant{n}@example.com',
+            'address': '澳門',
+            'family_members': [{'name': f'家屬{i}', 'relationship': '配偶'} for i in range(rows)],
+            'educations': [
+                {'school_name': f'學校{i}', 'education_level': '學士', 'study_period': '2008-2012'}
+                for i in range(rows)
+            ],
+            'work_experiences': [
+                {'employment_period': '2012-2016', 'organization': f'機構{i}', 'position': '教師'}
+                for i in range(rows)
+            ],
+            'professional_qualifications': [
+                {'qualification_name': f'資格{i}', 'issuing_organization': '教青局', 'issue_date': '2015-06-01'}
+                for i in range(rows)
+            ],
+            'association_positions': [
+                {'association_name': f'社團{i}', 'position': '會員', 'start_year': '2015'}
+                for i in range(rows)
+            ],
+        }
+
+    def _submit(self, client, n, rows, photo_bytes):
+        payload = self._payload(n, rows)
+        if photo_bytes is None:
+            return client.post(self.SUBMIT_URL, payload, content_type='application/json')
+
+        # multipart 以 DRF 的 "欄位[序號]子欄位" 格式提交子記錄
+        form = {key: value for key, value in payload.items() if not isinstance(value, list)}
+        for key, value in payload.items():
+            if isinstance(value, list):
+                for index, row in enumerate(value):
+                    for field, field_value in row.items():
+                        form[f'{key}[{index}]{field}'] = field_value
+        photo = io.BytesIO(photo_bytes)
+        photo.name = f'photo{n}.jpg'
+        form['profile_picture'] = photo
+        return client.post(self.SUBMIT_URL, form)
+
+    def _make_photo(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 1200), (200, 120, 60)).save(buffer, 'JPEG', quality=90)
+        return buffer.getvalue()
@@ -1,4 +1,5 @@
 from django.db import models
+from staff_management.duplicates import DUPLICATE_REASON_CHOICES, apply_duplicate_keys, find_duplicate_staff
 # from django.contrib.auth.models import User # 如果審批人等需要關聯 User
 
 APPLICATION_STATUS_CHOICES = [
@@ -54,14 +55,44 @@ class StaffApplication(models.Model):
     emergency_contact_phone = models.CharField(max_length=30, blank=True, null=True, verbose_name='緊急聯絡人電話 Emergency Contact Phone')
     emergency_contact_relationship = models.CharField(max_length=50, blank=True, null=True, verbose_name='與緊急聯絡人之關係 Emergency Contact Relationship')
 
+    # 重複檢測：標準化鍵由 save() 自動維護，待審批申請保存時與現有員工檔案比對
+    id_number_normalized = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False, verbose_name='證件號碼(標準化)')
+    name_normalized = models.CharField(max_length=150, blank=True, default='', editable=False, verbose_name='姓名(標準化)')
+    duplicate_of = models.ForeignKey(
+        'staff_management.StaffProfile',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicate_applications',
+        editable=False,
+        verbose_name='疑似重複員工'
+    )
+    duplicate_reason = models.CharField(max_length=20, choices=DUPLICATE_REASON_CHOICES, blank=True, default='', editable=False, verbose_name='重複原因')
+
     class Meta:
         verbose_name = '入職申請主表'
         verbose_name_plural = '入職申請主表'
         ordering = ['-application_date']
+        indexes = [
+            models.Index(fields=['name_normalized', 'birth_date'], name='app_name_norm_birth_idx'),
+        ]
 
     def __str__(self):
         return f"申請: {self.name_chinese} ({self.submission_id} - {self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        apply_duplicate_keys(self)
+        if self.status == 'pending':
+            self.duplicate_of, self.duplicate_reason = find_duplicate_staff(
+                self.id_number_normalized, self.name_normalized, self.birth_date
+            )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                'id_number_normalized', 'name_normalized', 'duplicate_of', 'duplicate_reason',
+            }
+        super().save(*args, **kwargs)
+
 class ApplicationFamilyMember(models.Model):
     application = models.ForeignKey(StaffApplication, on_delete=models.CASCADE, related_name='family_members', verbose_name='入職申請')
     name = models.CharField(max_length=100, verbose_name='姓名')
@@ -0,0 +1,95 @@
+"""
+入職申請相片的背景處理
+提交請求只把上傳的原始文件寫入存儲；解碼驗證、方向校正、縮圖及重新編碼
+在事務提交後交給背景線程池完成，不佔用請求時間。
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+logger = logging.getLogger('application_submission')
+
+MAX_PHOTO_SIZE = 5 * 1024 * 1024
+ALLOWED_PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+PHOTO_MAX_DIMENSION = 800
+PHOTO_JPEG_QUALITY = 85
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='application-photo')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def schedule_photo_processing(submission_id):
+    """在當前事務提交後安排相片處理；不在事務中時立即安排"""
+    transaction.on_commit(lambda: _submit(submission_id))
+
+
+def _submit(submission_id):
+    future = _executor.submit(process_application_photo, submission_id)
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(_discard)
+
+
+def _discard(future):
+    with _pending_lock:
+        _pending.discard(future)
+
+
+def wait_for_pending(timeout=None):
+    """等待已安排的相片處理完成（供管理命令及基準測試使用）"""
+    with _pending_lock:
+        futures = list(_pending)
+    wait(futures, timeout=timeout)
+
+
+def process_application_photo(submission_id):
+    """
+    處理申請相片：驗證圖片、按 EXIF 校正方向、縮放至不超過 PHOTO_MAX_DIMENSION 並轉存為 JPEG
+    只有當申請仍指向原始文件時才替換，避免覆蓋期間被管理員更換的相片
+    """
+    from PIL import Image, ImageOps
+    from .models import StaffApplication
+
+    try:
+        application = StaffApplication.objects.filter(pk=submission_id).only('submission_id', 'profile_picture').first()
+        if application is None or not application.profile_picture:
+            return
+
+        storage = application.profile_picture.storage
+        original_name = application.profile_picture.name
+
+        try:
+            with storage.open(original_name, 'rb') as source:
+                image = Image.open(source)
+                image.load()
+        except Exception as e:
+            logger.warning(f"申請 {submission_id} 的相片無法解析，已移除: {e}")
+            StaffApplication.objects.filter(pk=submission_id, profile_picture=original_name).update(profile_picture='')
+            storage.delete(original_name)
+            return
+
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((PHOTO_MAX_DIMENSION, PHOTO_MAX_DIMENSION))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=PHOTO_JPEG_QUALITY, optimize=True)
+        basename = os.path.splitext(os.path.basename(original_name))[0]
+        processed_name = storage.save(f"application_photos/{basename}.jpg", ContentFile(buffer.getvalue()))
+
+        updated = StaffApplication.objects.filter(
+            pk=submission_id, profile_picture=original_name
+        ).update(profile_picture=processed_name)
+        storage.delete(original_name if updated else processed_name)
+    except Exception as e:
+        logger.error(f"處理申請 {submission_id} 的相片時發生錯誤: {e}", exc_info=True)
+    finally:
+        # 背景線程不經過請求週期，需自行關閉資料庫連接
+        connections.close_all()
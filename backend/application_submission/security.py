@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.db import models
 import re
 import logging
+from staff_management.sanitizer import UNSAFE_INPUT_MESSAGE, find_unsafe_content, sanitize_payload
 
 logger = logging.getLogger(__name__)
 
@@ -72,24 +73,29 @@ class SQLSecurityMixin:
     def sanitize_input(value):
         """
         清理和消毒輸入值，防止惡意內容
+        危險特徵已預先編譯為單一正則表達式，見 staff_management/sanitizer.py
         """
         if not isinstance(value, str):
             return value
         
-        # 移除潛在的SQL注入字符
-        dangerous_patterns = [
-            r"(union\s+select)", r"(drop\s+table)", r"(delete\s+from)",
-            r"(insert\s+into)", r"(update\s+set)", r"(exec\s*\()",
-            r"(script\s*>)", r"(<\s*script)", r"(javascript\s*:)"
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, value.lower()):
-                logger.error(f"檢測到潛在的安全威脅: {value}")
-                raise ValidationError("輸入包含不安全的內容")
+        if find_unsafe_content(value):
+            logger.error(f"檢測到潛在的安全威脅: {value[:200]}")
+            raise ValidationError(UNSAFE_INPUT_MESSAGE)
         
         return value.strip()
 
+    @staticmethod
+    def sanitize_payload(data, exempt_fields=()):
+        """
+        一次遍歷清理整個載荷（dict / list 可嵌套）
+        發現不安全內容時拋出 ValidationError，錯誤以欄位路徑為鍵
+        """
+        cleaned, errors = sanitize_payload(data, exempt_fields)
+        if errors:
+            logger.error(f"檢測到潛在的安全威脅: {', '.join(errors)}")
+            raise ValidationError(errors)
+        return cleaned
+
 class SecureQuerysetMixin:
     """
     安全查詢集混入類，提供安全的篩選功能
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from django.db import models, transaction
+import os
 import re
 from datetime import date
 from .models import (
@@ -11,14 +13,25 @@ from .models import (
     ApplicationProfessionalQualification, 
     ApplicationAssociationPosition
 )
-
-class ApplicationFamilyMemberSerializer(serializers.ModelSerializer):
+from staff_management.date_parsing import FlexibleDateField
+from staff_management.sanitizer import SanitizedInputMixin
+from staff_management.search import deferred_indexing, mark_documents
+from .photos import ALLOWED_PHOTO_EXTENSIONS, MAX_PHOTO_SIZE, schedule_photo_processing
+
+class FlexibleDateModelSerializer(serializers.ModelSerializer):
+    """自動生成的日期欄位使用 FlexibleDateField，接受中文及斜線日期格式"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.DateField: FlexibleDateField,
+    }
+
+class ApplicationFamilyMemberSerializer(FlexibleDateModelSerializer):
     """
     家庭成員序列化器 - 所有欄位都不是必填項，允許空值
     """
     name = serializers.CharField(required=False, allow_blank=True)
     relationship = serializers.CharField(required=False, allow_blank=True)
-    birth_date = serializers.DateField(required=False, allow_null=True)
+    birth_date = FlexibleDateField(required=False, allow_null=True)
     age = serializers.IntegerField(required=False, allow_null=True)
     education_level = serializers.CharField(required=False, allow_blank=True)
     institution = serializers.CharField(required=False, allow_blank=True)
@@ -28,7 +41,7 @@ class ApplicationFamilyMemberSerializer(serializers.ModelSerializer):
         model = ApplicationFamilyMember
         fields = ['name', 'relationship', 'birth_date', 'age', 'education_level', 'institution', 'alumni_class']
 
-class ApplicationEducationSerializer(serializers.ModelSerializer):
+class ApplicationEducationSerializer(FlexibleDateModelSerializer):
     """
     學歷狀況序列化器 - 所有欄位都不是必填項，允許空值
     """
@@ -36,7 +49,7 @@ class ApplicationEducationSerializer(serializers.ModelSerializer):
     school_name = serializers.CharField(required=False, allow_blank=True)
     education_level = serializers.CharField(required=False, allow_blank=True)
     degree_name = serializers.CharField(required=False, allow_blank=True)
-    certificate_date = serializers.DateField(required=False, allow_null=True)
+    certificate_date = FlexibleDateField(required=False, allow_null=True)
     is_phd = serializers.BooleanField(required=False)
     is_master = serializers.BooleanField(required=False)
     is_overseas_study = serializers.BooleanField(required=False)
@@ -45,7 +58,7 @@ class ApplicationEducationSerializer(serializers.ModelSerializer):
         model = ApplicationEducation
         fields = ['study_period', 'school_name', 'education_level', 'degree_name', 'certificate_date', 'is_phd', 'is_master', 'is_overseas_study']
 
-class ApplicationWorkExperienceSerializer(serializers.ModelSerializer):
+class ApplicationWorkExperienceSerializer(FlexibleDateModelSerializer):
     """
     工作經驗序列化器 - 所有欄位都不是必填項，允許空值
     """
@@ -58,19 +71,19 @@ class ApplicationWorkExperienceSerializer(serializers.ModelSerializer):
         model = ApplicationWorkExperience
         fields = ['employment_period', 'organization', 'position', 'salary']
 
-class ApplicationProfessionalQualificationSerializer(serializers.ModelSerializer):
+class ApplicationProfessionalQualificationSerializer(FlexibleDateModelSerializer):
     """
     專業資格序列化器 - 所有欄位都不是必填項，允許空值
     """
     qualification_name = serializers.CharField(required=False, allow_blank=True)
     issuing_organization = serializers.CharField(required=False, allow_blank=True)
-    issue_date = serializers.DateField(required=False, allow_null=True)
+    issue_date = FlexibleDateField(required=False, allow_null=True)
     
     class Meta:
         model = ApplicationProfessionalQualification
         fields = ['qualification_name', 'issuing_organization', 'issue_date']
 
-class ApplicationAssociationPositionSerializer(serializers.ModelSerializer):
+class ApplicationAssociationPositionSerializer(FlexibleDateModelSerializer):
     """
     社團職務序列化器 - 所有欄位都不是必填項，允許空值
     """
@@ -83,9 +96,10 @@ class ApplicationAssociationPositionSerializer(serializers.ModelSerializer):
         model = ApplicationAssociationPosition
         fields = ['association_name', 'position', 'start_year', 'end_year']
 
-class StaffApplicationSerializer(serializers.ModelSerializer):
+class StaffApplicationSerializer(SanitizedInputMixin, FlexibleDateModelSerializer):
     """
     員工申請序列化器 - 只對真正必要的字段進行驗證
+    整個載荷（包括子記錄）由 SanitizedInputMixin 一次清理及檢查
     """
     family_members = ApplicationFamilyMemberSerializer(many=True, required=False)
     educations = ApplicationEducationSerializer(many=True, required=False)
@@ -96,17 +110,28 @@ class StaffApplicationSerializer(serializers.ModelSerializer):
     # 明確設置非必填字段
     mobile_phone = serializers.CharField(required=False, allow_blank=True)
     email = serializers.EmailField(required=False, allow_blank=True)
-    teaching_staff_rank_effective_date = serializers.DateField(required=False, allow_null=True)
+    teaching_staff_rank_effective_date = FlexibleDateField(required=False, allow_null=True)
     emergency_contact_name = serializers.CharField(required=False, allow_blank=True)
     emergency_contact_phone = serializers.CharField(required=False, allow_blank=True)
     emergency_contact_relationship = serializers.CharField(required=False, allow_blank=True)
+    # 以 FileField 接收相片，請求中不解碼圖片；驗證及縮圖在背景完成
+    profile_picture = serializers.FileField(required=False, allow_null=True, write_only=True)
+
+    # 子記錄：(欄位名, 模型)
+    NESTED_RELATIONS = (
+        ('family_members', ApplicationFamilyMember),
+        ('educations', ApplicationEducation),
+        ('work_experiences', ApplicationWorkExperience),
+        ('professional_qualifications', ApplicationProfessionalQualification),
+        ('association_positions', ApplicationAssociationPosition),
+    )
 
     class Meta:
         model = StaffApplication
         fields = [
             'submission_id', 'application_date', 'status', 
             'name_chinese', 'name_foreign', 'gender', 'marital_status', 'birth_place', 'birth_date', 'origin',
-            'id_type', 'id_number', 'id_expiry_date',
+            'id_type', 'id_number', 'id_expiry_date', 'profile_picture',
             'bank_account_number', 'social_security_number', 
             'home_phone', 'mobile_phone', 'address', 'email',
             'alumni_class', 'alumni_class_year', 'alumni_class_duration',
@@ -146,35 +171,40 @@ class StaffApplicationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("證件已過期 ID has expired")
         return value
 
-    def create(self, validated_data):
-        """創建員工申請記錄"""
-        family_members_data = validated_data.pop('family_members', [])
-        educations_data = validated_data.pop('educations', [])
-        work_experiences_data = validated_data.pop('work_experiences', [])
-        professional_qualifications_data = validated_data.pop('professional_qualifications', [])
-        association_positions_data = validated_data.pop('association_positions', [])
-
-        application = StaffApplication.objects.create(**validated_data)
-
-        # 只有在有實際數據時才創建關聯記錄
-        for family_member_data in family_members_data:
-            if any(family_member_data.values()):  # 檢查是否有任何非空值
-                ApplicationFamilyMember.objects.create(application=application, **family_member_data)
-
-        for education_data in educations_data:
-            if any(education_data.values()):  # 檢查是否有任何非空值
-                ApplicationEducation.objects.create(application=application, **education_data)
-
-        for work_experience_data in work_experiences_data:
-            if any(work_experience_data.values()):  # 檢查是否有任何非空值
-                ApplicationWorkExperience.objects.create(application=application, **work_experience_data)
-
-        for professional_qualification_data in professional_qualifications_data:
-            if any(professional_qualification_data.values()):  # 檢查是否有任何非空值
-                ApplicationProfessionalQualification.objects.create(application=application, **professional_qualification_data)
-
-        for association_position_data in association_positions_data:
-            if any(association_position_data.values()):  # 檢查是否有任何非空值
-                ApplicationAssociationPosition.objects.create(application=application, **association_position_data)
+    def validate_profile_picture(self, value):
+        """驗證個人相片 - 非必填項，只檢查大小及副檔名"""
+        if not value:
+            return value
+        if value.size > MAX_PHOTO_SIZE:
+            raise serializers.ValidationError("相片不能超過 5MB Photo must not exceed 5MB")
+        if os.path.splitext(value.name)[1].lower() not in ALLOWED_PHOTO_EXTENSIONS:
+            raise serializers.ValidationError("相片必須是 JPG、PNG 或 GIF 格式 Photo must be JPG, PNG or GIF")
+        return value
 
-        return application
\ No newline at end of file
+    def create(self, validated_data):
+        """
+        創建員工申請記錄
+        主表一次 INSERT，每種子記錄一次 bulk_create，全部在同一事務內完成；
+        相片在事務提交後交由背景處理（見 photos.py）
+        """
+        nested_data = {name: validated_data.pop(name, []) for name, _ in self.NESTED_RELATIONS}
+
+        # 子記錄以 bulk_create 寫入，不觸發保存信號，需要手動登記重建搜尋索引
+        with transaction.atomic(), deferred_indexing():
+            application = StaffApplication.objects.create(**validated_data)
+
+            for name, model in self.NESTED_RELATIONS:
+                # 只有在有實際數據時才創建關聯記錄
+                children = [
+                    model(application=application, **row)
+                    for row in nested_data[name]
+                    if any(row.values())
+                ]
+                if children:
+                    model.objects.bulk_create(children)
+            mark_documents('application', [application.pk])
+
+            if application.profile_picture:
+                schedule_photo_processing(application.submission_id)
+
+        return application
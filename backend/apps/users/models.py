@@ -64,7 +64,12 @@ class User(AbstractUser):
                 delta = end_date - start_date
                 total_days += delta.days
         
-        if total_days < 0: # 避免結束日期早於開始日期的情況導致負數
+        return self.describe_seniority_days(total_days)
+
+    @staticmethod
+    def describe_seniority_days(total_days):
+        """將有效年資的總日數轉為描述；列表視圖以資料庫聚合得到總日數後直接調用"""
+        if not total_days or total_days < 0: # 避免結束日期早於開始日期的情況導致負數
             total_days = 0
             
         years = total_days // 365
@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from staff_management.sanitizer import SanitizedInputMixin # 統一的輸入清理及不安全內容檢查
 from .models import OnboardingApplication, User, FamilyMember, EducationHistory, WorkExperience, ProfessionalQualification, SocialActivity, EmploymentRecord # 新增導入
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(SanitizedInputMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -41,7 +42,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class OnboardingApplicationSerializer(serializers.ModelSerializer):
+class OnboardingApplicationSerializer(SanitizedInputMixin, serializers.ModelSerializer):
     class Meta:
         model = OnboardingApplication
         fields = '__all__' # 或者明確列出需要的字段，例如 ['name', 'id_number', ...]
@@ -139,4 +140,8 @@ class UserDetailSerializer(serializers.ModelSerializer):
         # 如果有其他 User 模型的 remark，需要明確區分。
 
     def get_calculated_seniority(self, obj):
+        # 列表及詳細視圖已以 with_seniority_duration() 聚合，未聚合時才逐行查詢
+        if hasattr(obj, 'seniority_duration'):
+            days = obj.seniority_duration.days if obj.seniority_duration else 0
+            return obj.describe_seniority_days(days)
         return obj.calculate_seniority()
\ No newline at end of file
@@ -1,7 +1,11 @@
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.contrib.auth import logout
+from django.db.models import DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework import generics, permissions
+from rest_framework.pagination import PageNumberPagination
 from .serializers import RegisterSerializer, CustomTokenObtainPairSerializer, OnboardingApplicationSerializer
 from .models import User, OnboardingApplication
 from rest_framework.response import Response
@@ -16,11 +20,13 @@ from .serializers import CustomTokenObtainPairSerializer, OnboardingApplicationS
 from .models import OnboardingApplication # 新增導入
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated # Ensure AllowAny and IsAuthenticated are imported
+from staff_management.throttling import PublicWriteProtectionMixin # 匿名寫入端點的限流及請求體大小限制
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(PublicWriteProtectionMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
+    throttle_scope = 'register'
 
 class LogoutView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
@@ -41,19 +47,53 @@ def profile_view(request):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
-class UserRegisterView(generics.CreateAPIView):
+class UserRegisterView(PublicWriteProtectionMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
+    throttle_scope = 'register'
 
 from .permissions import IsAdminUser, IsAdminOrReadOnly
 
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 
+# 員工詳細資料的嵌套關聯，列表及詳細視圖以 prefetch 一次載入
+USER_DETAIL_PREFETCH = (
+    'family_members', 'education_history', 'work_experience',
+    'professional_qualifications', 'social_activities', 'employment_records',
+)
+
+
+def with_seniority_duration(queryset):
+    """
+    以一次聚合計算每位員工計入年資的在職記錄總時長（seniority_duration），
+    代替序列化時逐行調用 calculate_seniority()；未結束的記錄計算到今天
+    """
+    today = timezone.now().date()
+    duration = ExpressionWrapper(
+        Coalesce(F('employment_records__end_date'), Value(today)) - F('employment_records__start_date'),
+        output_field=DurationField(),
+    )
+    return queryset.annotate(
+        seniority_duration=Sum(duration, filter=Q(employment_records__count_for_seniority=True)),
+    )
+
+
+class UserListPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    pagination_class = UserListPagination
+
+    def get_queryset(self):
+        # 聚合以今天為未結束記錄的結束日期，每次請求重新建立
+        return with_seniority_duration(super().get_queryset().prefetch_related(*USER_DETAIL_PREFETCH)).order_by('staff_id')
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
@@ -61,6 +101,9 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     # lookup_field = 'id' # 或者 'pk', 默認就是 'pk'
 
+    def get_queryset(self):
+        return with_seniority_duration(super().get_queryset().prefetch_related(*USER_DETAIL_PREFETCH))
+
 class DashboardStatsView(APIView):
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
@@ -68,7 +111,8 @@ class DashboardStatsView(APIView):
     # lookup_field = 'id' # 或者 'pk', 默認就是 'pk'
 
 
-class OnboardingApplicationCreateView(generics.CreateAPIView):
+class OnboardingApplicationCreateView(PublicWriteProtectionMixin, generics.CreateAPIView):
     queryset = OnboardingApplication.objects.all()
     serializer_class = OnboardingApplicationSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'onboarding_apply'
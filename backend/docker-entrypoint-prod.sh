@@ -67,6 +67,14 @@ else
     exit 1
 fi
 
+# 首次部署時建立全文搜尋索引（已有索引時跳過，之後由保存信號增量更新）
+echo -e "${BLUE}🔎 檢查搜尋索引...${NC}"
+if python manage.py rebuild_search_index --if-empty; then
+    echo -e "${GREEN}✅ 搜尋索引就緒${NC}"
+else
+    echo -e "${YELLOW}⚠️ 搜尋索引建立失敗，可稍後執行 rebuild_search_index${NC}"
+fi
+
 # 收集靜態文件
 echo -e "${BLUE}📁 收集靜態文件...${NC}"
 if python manage.py collectstatic --noinput; then
@@ -0,0 +1,159 @@
+"""
+響應壓縮及靜態文件預壓縮
+
+- CompressionMiddleware：JSON / CSV 等響應超過大小門檻時按 Accept-Encoding 以 br 或 gzip 壓縮
+- CompressedManifestStaticFilesStorage：collectstatic 時為文件名加上內容哈希（可長期緩存），
+  並為可壓縮的文件寫入 .gz / .br 副本，由 nginx 的 gzip_static / brotli_static 直接發送
+
+安裝了 Brotli 時才使用 br，否則只使用 gzip。設定見 settings.RESPONSE_COMPRESSION 及 STORAGES。
+"""
+import gzip
+import os
+import re
+import zlib
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # 未安裝時只使用 gzip
+    brotli = None
+
+_ACCEPT_ENCODING_RE = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def accepted_encoding(accept_encoding):
+    """按 Accept-Encoding 選擇壓縮方式（優先 br），都不接受時返回 None"""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        match = _ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(match.group(1))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['GZIP_LEVEL'], mtime=0)
+
+
+def compress_stream(chunks, encoding, config):
+    """逐塊壓縮流式響應（如大量導出），每塊輸出後即刷新，客戶端不必等待全部內容"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['BROTLI_QUALITY'])
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(config['GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    按內容類型及大小條件壓縮響應
+    只處理 RESPONSE_COMPRESSION['CONTENT_TYPES'] 中的類型（不壓縮包含 CSRF 令牌的 HTML 頁面）；
+    小於 MIN_SIZE 的響應壓縮收益不大，直接返回。
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        config = settings.RESPONSE_COMPRESSION
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in config['CONTENT_TYPES']:
+            return response
+
+        # 可壓縮的響應都因 Accept-Encoding 而不同，未壓縮時也需要告知緩存
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compress_stream(response.streaming_content, encoding, config)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < config['MIN_SIZE']:
+                return response
+            compressed = compress_bytes(response.content, encoding, config)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # 與 Django 的 GZipMiddleware 相同：內容已改變，強 ETag 改為弱 ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    文件名帶內容哈希的靜態文件存儲，並寫入預壓縮副本
+    例如 admin/css/base.css 輸出為 admin/css/base.5af66c1b1797.css，及其 .gz / .br 副本；
+    壓縮後未減少至少 5% 的文件不寫副本。
+    """
+    manifest_strict = False
+    compress_extensions = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico')
+    compress_min_size = 256
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # 未執行 collectstatic 時（如開發環境的 DEBUG=False）使用原文件名，不中斷頁面
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            self.write_compressed(hashed_name)
+
+    def write_compressed(self, name):
+        if not name.lower().endswith(self.compress_extensions):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < self.compress_min_size:
+            return
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
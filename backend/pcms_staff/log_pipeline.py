@@ -0,0 +1,177 @@
+"""
+非同步結構化日誌管線
+
+- JSONFormatter：輸出單行 JSON 記錄，保留 extra 欄位
+- SamplingFilter：按 logger 名稱前綴對低級別日誌抽樣
+- RateLimitFilter：按 logger 令牌桶限流，ERROR 以上級別不受限
+- AsyncQueueHandler：請求線程只負責入隊，由 QueueListener 背景線程寫入磁碟
+
+在 settings.LOGGING 中以 dictConfig 方式使用，見 pcms_staff/settings.py。
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# LogRecord 的內建屬性，其餘屬性視為 extra 欄位輸出
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'taskName',
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """將日誌記錄格式化為單行 JSON"""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key in _RESERVED_ATTRS or key.startswith('_'):
+                continue
+            payload[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按 logger 名稱前綴抽樣
+    rates 例如 {'staff_management.views': 0.1}，表示該 logger 只保留 10% 的低級別日誌；
+    級別達到 min_level（預設 WARNING）的記錄一律保留。
+    """
+
+    def __init__(self, rates=None, min_level='WARNING'):
+        super().__init__()
+        # 最長前綴優先匹配
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.min_level = logging._checkLevel(min_level)
+
+    def _rate_for(self, name):
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return float(rate)
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= self.min_level:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按 logger 的令牌桶限流
+    每個 logger 每秒補充 rate 個令牌，最多累積 burst 個；
+    被丟棄的條數會以 suppressed 欄位附在下一條通過的記錄上。
+    """
+
+    def __init__(self, rate=50, burst=200, exempt_level='ERROR'):
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.exempt_level = logging._checkLevel(exempt_level)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= self.exempt_level:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(record.name, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[record.name] = (tokens - 1, now, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    入隊處理器
+    handlers 以 'cfg://handlers.<名稱>' 引用 LOGGING['handlers'] 中的目標處理器，
+    首次寫入時才啟動 QueueListener，使實際的檔案 I/O 在背景線程完成。
+    隊列滿時丟棄記錄，而不是阻塞請求線程。
+
+    注意：dictConfig 按名稱字母順序建立處理器，本處理器的名稱須排在目標處理器之後。
+    """
+
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        # dictConfig 傳入的是 ConvertingList，需以索引取值才會解析 cfg:// 引用
+        self.targets = [handlers[i] for i in range(len(handlers))]
+        for target in self.targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f"AsyncQueueHandler: 目標處理器尚未建立: {target!r}")
+        self.respect_handler_level = respect_handler_level
+        self.dropped = 0
+        self._listener = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._listener is None:
+                self._listener = QueueListener(
+                    self.queue, *self.targets,
+                    respect_handler_level=self.respect_handler_level,
+                )
+                self._listener.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        with self._start_lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+    def prepare(self, record):
+        # 在請求線程中只做最少量的工作：合併訊息參數、預先格式化異常，
+        # 其餘格式化交給目標處理器自身的 formatter
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._listener is None:
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
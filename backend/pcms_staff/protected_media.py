@@ -0,0 +1,116 @@
+"""
+受保護的媒體文件發送
+
+- ProtectedMediaStorage：媒體文件的 URL 附帶有效期及簽名，只有經 API 權限檢查後取得 URL 的用戶可以訪問
+  （前端以 <img> 顯示照片，無法附帶 Token，因此以簽名代替）
+- serve_protected_media：/media/ 的視圖，檢查簽名（或 Django 管理員會話）後發送文件
+- protected_file_response：設定了 ACCEL_REDIRECT_PREFIX 時只返回 X-Accel-Redirect 頭，
+  由 nginx 的 internal location 發送文件，大文件不再佔用 Python worker；否則以 FileResponse 發送
+- create_export_file：在媒體目錄的 exports/ 下建立導出文件，供 protected_file_response 發送
+
+設定見 settings.PROTECTED_MEDIA，nginx 配置見 docker/nginx/*.conf 的 /protected-media/。
+"""
+import mimetypes
+import os
+import posixpath
+import time
+import uuid
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.signing import Signer
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import content_disposition_header
+
+_signer = Signer(salt='pcms_staff.protected_media')
+
+
+def _expires_at(now=None):
+    """
+    URL 的過期時間，按 URL_MAX_AGE 分段取整：同一時段內同一文件的 URL 相同，瀏覽器可以緩存；
+    有效期在 URL_MAX_AGE 至 2 倍 URL_MAX_AGE 之間
+    """
+    max_age = settings.PROTECTED_MEDIA['URL_MAX_AGE']
+    now = time.time() if now is None else now
+    return (int(now) // max_age + 2) * max_age
+
+
+def sign_media_name(name, expires):
+    return _signer.signature(f'{name}:{expires}')
+
+
+def has_valid_signature(name, params):
+    try:
+        expires = int(params.get('expires', ''))
+    except ValueError:
+        return False
+    if expires < time.time():
+        return False
+    return constant_time_compare(params.get('signature', ''), sign_media_name(name, expires))
+
+
+class ProtectedMediaStorage(FileSystemStorage):
+    """媒體文件存儲，url() 返回附帶有效期及簽名的 URL"""
+
+    def url(self, name):
+        url = super().url(name)
+        expires = _expires_at()
+        return f"{url}?{urlencode({'expires': expires, 'signature': sign_media_name(name, expires)})}"
+
+
+def protected_file_response(name, storage=None, *, as_attachment=False, filename=None):
+    """發送媒體目錄中的文件；調用前需已完成權限檢查"""
+    config = settings.PROTECTED_MEDIA
+    storage = storage or default_storage
+    if config['ACCEL_REDIRECT_PREFIX']:
+        content_type, _ = mimetypes.guess_type(filename or name)
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        response['X-Accel-Redirect'] = config['ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + quote(name)
+        disposition = content_disposition_header(as_attachment, filename or posixpath.basename(name))
+        if disposition:
+            response['Content-Disposition'] = disposition
+    else:
+        response = FileResponse(storage.open(name, 'rb'), as_attachment=as_attachment, filename=filename or '')
+    patch_cache_control(response, private=True, max_age=config['URL_MAX_AGE'])
+    return response
+
+
+def serve_protected_media(request, name):
+    """/media/<name>：簽名有效，或已登入 Django 管理後台的職員，才發送文件"""
+    name = posixpath.normpath(name).lstrip('/')
+    if name.startswith('..') or name == '.':
+        raise Http404
+    user = getattr(request, 'user', None)
+    if not has_valid_signature(name, request.GET) and not (user and user.is_active and user.is_staff):
+        raise PermissionDenied
+    if not default_storage.exists(name):
+        raise Http404
+    return protected_file_response(name)
+
+
+def remove_expired_exports():
+    """刪除超過 EXPORT_MAX_AGE 的導出文件（X-Accel-Redirect 時文件由 nginx 稍後讀取，不能發送後立即刪除）"""
+    directory = default_storage.path(settings.PROTECTED_MEDIA['EXPORT_DIR'])
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - settings.PROTECTED_MEDIA['EXPORT_MAX_AGE']
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+def create_export_file(extension):
+    """返回新導出文件的 (存儲名稱, 磁碟路徑)，文件名為隨機值，不能被猜測"""
+    remove_expired_exports()
+    name = posixpath.join(settings.PROTECTED_MEDIA['EXPORT_DIR'], f'{uuid.uuid4().hex}{extension}')
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return name, path
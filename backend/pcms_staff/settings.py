@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'pcms_staff.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -154,6 +155,13 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic 輸出帶內容哈希的文件名及 .gz / .br 副本 (pcms_staff/compression.py)
+STORAGES = {
+    # 媒體文件的 URL 附帶簽名，由 /media/ 視圖檢查 (pcms_staff/protected_media.py)
+    'default': {'BACKEND': 'pcms_staff.protected_media.ProtectedMediaStorage'},
+    'staticfiles': {'BACKEND': 'pcms_staff.compression.CompressedManifestStaticFilesStorage'},
+}
+
 # 媒體文件配置 - 用於處理用戶上傳的文件（如員工照片）
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -215,10 +223,15 @@ if HTTPS_ENABLED:
     SECURE_CONTENT_TYPE_NOSNIFF = True
 
 # Logging Configuration
-LOGGING_DIR = BASE_DIR / 'logs'
-if not LOGGING_DIR.exists():
-    LOGGING_DIR.mkdir(parents=True, exist_ok=True)
+# 日誌文件夾路徑
+LOGS_DIR = BASE_DIR / 'logs'
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+# 應用日誌級別，可透過環境變量調整（例如排查問題時設為 DEBUG）
+APP_LOG_LEVEL = os.getenv('APP_LOG_LEVEL', 'INFO').upper()
 
+# 檔案寫入全部經由 AsyncQueueHandler 交給背景線程，請求線程不會阻塞在磁碟 I/O 上
+# 結構化 JSON 記錄方便後續以 jq / ELK 等工具查詢
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -228,80 +241,39 @@ LOGGING = {
             'style': '{',
         },
         'simple': {
-            'format': '{levelname} {message}',
+            'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
-    },
-    'handlers': {
-        'console': {
-            'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
-        },
-        'file_info': {
-            'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': LOGGING_DIR / 'django_info.log',
-            'maxBytes': 1024 * 1024 * 5,  # 5 MB
-            'backupCount': 5,
-            'formatter': 'verbose',
-        },
-        'file_error': {
-            'level': 'ERROR',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': LOGGING_DIR / 'django_error.log',
-            'maxBytes': 1024 * 1024 * 5,  # 5 MB
-            'backupCount': 5,
-            'formatter': 'verbose',
+        'json': {
+            '()': 'pcms_staff.log_pipeline.JSONFormatter',
         },
     },
-    'loggers': {
-        'django': {
-            'handlers': ['console', 'file_info', 'file_error'],
-            'level': 'INFO',
-            'propagate': True,
+    'filters': {
+        # APP_LOG_LEVEL=DEBUG 時，DEBUG 日誌按 logger 抽樣，rates 的值為保留比例
+        'sampling': {
+            '()': 'pcms_staff.log_pipeline.SamplingFilter',
+            'min_level': 'INFO',
+            'rates': {
+                'staff_management': 0.1,
+                'application_submission': 0.1,
+            },
         },
-        'django.request': {
-            'handlers': ['file_error'], # Django的请求错误会记录到error log
-            'level': 'ERROR',
-            'propagate': False,
-        },
-        # 您可以為您的應用程式定義特定的 logger
-        'staff_management': { # 假設您的 app 名稱是 staff_management
-            'handlers': ['console', 'file_info', 'file_error'],
-            'level': 'INFO',
-            'propagate': False,
+        # 每個 logger 每秒最多 50 條、突發 200 條，ERROR 以上不受限
+        'rate_limit': {
+            '()': 'pcms_staff.log_pipeline.RateLimitFilter',
+            'rate': 50,
+            'burst': 200,
         },
-        'application_submission': { # 假設您的 app 名稱是 application_submission
-            'handlers': ['console', 'file_info', 'file_error'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-    },
-}
-
-
-# 日誌文件夾路徑
-LOGS_DIR = BASE_DIR / 'logs'
-if not os.path.exists(LOGS_DIR):
-    os.makedirs(LOGS_DIR)
-
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
+        # 前端日誌量大且不可控，限流更嚴格
+        'frontend_rate_limit': {
+            '()': 'pcms_staff.log_pipeline.RateLimitFilter',
+            'rate': 20,
+            'burst': 100,
         },
     },
     'handlers': {
         'console': {
-            'level': 'DEBUG',
+            'level': 'INFO',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
@@ -312,54 +284,132 @@ LOGGING = {
             'when': 'midnight',  # 每天午夜輪替
             'interval': 1,       # 每天一次
             'backupCount': 7,    # 保留7個備份文件 (即7天)
-            'formatter': 'verbose',
+            'formatter': 'json',
             'encoding': 'utf-8', # 確保中文等字符正確記錄
+            'delay': True,
         },
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.handlers.TimedRotatingFileHandler', # 使用時間輪替
+            'class': 'logging.handlers.TimedRotatingFileHandler',
             'filename': LOGS_DIR / 'django_error.log',
-            'when': 'midnight',  # 每天午夜輪替
-            'interval': 1,       # 每天一次
-            'backupCount': 7,    # 保留7個備份文件 (即7天)
-            'formatter': 'verbose',
+            'when': 'midnight',
+            'interval': 1,
+            'backupCount': 7,
+            'formatter': 'json',
             'encoding': 'utf-8',
+            'delay': True,
         },
-        'frontend_log_file': { # 新增一個 handler 專門給前端日誌，如果想分開文件
+        'frontend_log_file': { # 前端日誌獨立文件
             'level': 'DEBUG', # 記錄所有從前端發來的級別
             'class': 'logging.handlers.TimedRotatingFileHandler',
-            'filename': LOGS_DIR / 'frontend_events.log', # 可以是獨立文件
+            'filename': LOGS_DIR / 'frontend_events.log',
             'when': 'midnight',
             'interval': 1,
             'backupCount': 7,
-            'formatter': 'simple', # 或者 'verbose'
+            'formatter': 'json',
             'encoding': 'utf-8',
+            'delay': True,
+        },
+        # 以下兩個為入隊處理器，logger 只應掛載這兩個，而不是直接掛載文件處理器
+        # （名稱以 queue_ 開頭，確保 dictConfig 在文件處理器之後建立它們）
+        'queue_file': {
+            '()': 'pcms_staff.log_pipeline.AsyncQueueHandler',
+            'handlers': ['cfg://handlers.info_file', 'cfg://handlers.error_file'],
+            'filters': ['sampling', 'rate_limit'],
+        },
+        'queue_frontend': {
+            '()': 'pcms_staff.log_pipeline.AsyncQueueHandler',
+            'handlers': ['cfg://handlers.frontend_log_file'],
+            'filters': ['frontend_rate_limit'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'info_file', 'error_file'],
+            'handlers': ['console', 'queue_file'],
             'level': 'INFO', # Django 框架本身的日誌級別
-            'propagate': True,
+            'propagate': False,
         },
-        # 您可以為特定的 app 定義 logger，例如：
-        'staff_management': { # 假設您的 app 名為 staff_management
-            'handlers': ['console', 'info_file', 'error_file', 'frontend_log_file'],
-            'level': 'DEBUG', # app 級別的日誌可以更詳細
+        'staff_management': {
+            'handlers': ['console', 'queue_file'],
+            'level': APP_LOG_LEVEL,
             'propagate': False, # 不再傳遞給 root logger，避免重複記錄
         },
-        'application_submission': { # 為 application_submission app 添加 logger
-            'handlers': ['console', 'info_file', 'error_file'],
+        'application_submission': {
+            'handlers': ['console', 'queue_file'],
+            'level': APP_LOG_LEVEL,
+            'propagate': False,
+        },
+        'frontend_events': { # FrontendLogView 使用的 logger
+            'handlers': ['queue_frontend'],
             'level': 'DEBUG',
             'propagate': False,
         },
     },
     'root': { # root logger，捕獲所有未被特定 logger 處理的日誌
-        'handlers': ['console', 'info_file', 'error_file'],
+        'handlers': ['console', 'queue_file'],
         'level': 'INFO', # root logger 的默認級別
     }
 }
 
+# 前端日誌接收端點 (FrontendLogView) 的限制
+FRONTEND_LOG_INGEST = {
+    'MAX_BODY_BYTES': 64 * 1024,            # 請求體上限（gzip 壓縮後）
+    'MAX_DECOMPRESSED_BYTES': 512 * 1024,   # 解壓後上限
+    'MAX_EVENTS': 100,                      # 每批最多事件數
+    'MAX_MESSAGE_LENGTH': 2000,             # 單條訊息截斷長度
+    'IP_RATE': 5,                           # 每個 IP 每秒補充的事件令牌
+    'IP_BURST': 200,                        # 每個 IP 的突發上限
+    'SESSION_RATE': 2,                      # 每個會話每秒補充的事件令牌
+    'SESSION_BURST': 100,
+    'GLOBAL_RATE': 200,                     # 整個端點每秒補充的事件令牌（按 worker 計算）
+    'GLOBAL_BURST': 2000,
+}
+
+# API 響應壓縮 (pcms_staff/compression.py)
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),  # 小於此字節數不壓縮
+    'CONTENT_TYPES': ('application/json', 'text/csv'),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,                    # 動態壓縮使用中等級別，平衡速度及壓縮率
+}
+
+# 受保護的媒體文件發送 (pcms_staff/protected_media.py)
+PROTECTED_MEDIA = {
+    # nginx 的 internal location；設定後以 X-Accel-Redirect 交給 nginx 發送，留空時由 Django 以 FileResponse 發送
+    'ACCEL_REDIRECT_PREFIX': os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', ''),
+    'URL_MAX_AGE': 3600,                    # 媒體 URL 的有效時段（秒）
+    'EXPORT_DIR': 'exports',                # 導出文件目錄（媒體目錄下）
+    'EXPORT_MAX_AGE': 3600,                 # 導出文件保留時間（秒）
+}
+
+# 受信任的反向代理 (nginx) 地址：只有從這些地址連入時，限流才使用其設定的 X-Real-IP 作為客戶端 IP
+# 預設只信任本機；Docker 部署時由 docker-compose 的 TRUSTED_PROXIES 環境變量加入 nginx 容器的固定地址
+TRUSTED_PROXIES = [
+    network.strip()
+    for network in os.environ.get('TRUSTED_PROXIES', '127.0.0.1/32,::1/128').split(',')
+    if network.strip()
+]
+
+# 匿名寫入端點的限流及請求體大小限制 (staff_management/throttling.py)
+# RATE 為每秒補充的令牌數，BURST 為令牌桶容量；GLOBAL_* 按 worker 計算
+PUBLIC_WRITE_THROTTLES = {
+    'application_submit': {
+        'IP_RATE': 0.1, 'IP_BURST': 10,         # 每個 IP 最多連續 10 次，之後每 10 秒 1 次
+        'GLOBAL_RATE': 5, 'GLOBAL_BURST': 100,
+        'MAX_BODY_BYTES': 6 * 1024 * 1024,      # 含 5MB 個人相片
+    },
+    'onboarding_apply': {
+        'IP_RATE': 0.1, 'IP_BURST': 10,
+        'GLOBAL_RATE': 5, 'GLOBAL_BURST': 100,
+        'MAX_BODY_BYTES': 1024 * 1024,
+    },
+    'register': {
+        'IP_RATE': 1 / 60, 'IP_BURST': 5,       # 每個 IP 每分鐘 1 次
+        'GLOBAL_RATE': 1, 'GLOBAL_BURST': 30,
+        'MAX_BODY_BYTES': 16 * 1024,
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
@@ -367,4 +417,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # 安裝了 orjson 時以其編碼及解析 JSON，否則與 DRF 預設相同，見 staff_management/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'staff_management.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'staff_management.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
@@ -1,9 +1,9 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework.authtoken.views import obtain_auth_token
 from staff_management.views import FrontendLogView
+from pcms_staff.protected_media import serve_protected_media
 
 urlpatterns = [
     path('admin/', admin.site.urls), 
@@ -18,6 +18,7 @@ urlpatterns = [
     path('api/log-frontend-event/', FrontendLogView.as_view(), name='log_frontend_event'),
 ]
 
-# 開發環境下的媒體文件服務配置
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# 媒體文件：檢查簽名後發送（生產環境由 nginx 以 X-Accel-Redirect 發送文件內容）
+urlpatterns += [
+    re_path(r'^%s(?P<name>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_protected_media, name='protected_media'),
+]
@@ -5,58 +5,70 @@ from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Case, Value, When
+from django.utils.functional import cached_property
 import tempfile
 import os
 import csv
 from datetime import datetime
-from io import BytesIO
 import zipfile
 from .models import (
     StaffProfile, FamilyMember, EducationBackground, WorkExperience, 
     ProfessionalQualification, AssociationPosition, EmploymentRecord,
     UserRole, SystemLog  # Phase 4: 新增權限管理模型
 )
+from pcms_staff.protected_media import create_export_file, protected_file_response
 from .views import import_data  # 導入現有的導入函數
+from .importer import CHILD_STRATEGIES, IMPORT_MODES, SUPPORTED_EXTENSIONS, issues_to_csv, validate_file
 
 # Inline Admin Definitions
-class EmploymentRecordInline(admin.TabularInline):
-    model = EmploymentRecord
+class StaffChildInline(admin.TabularInline):
+    """
+    員工子記錄的 Inline 基類
+    子記錄的 __str__ 會讀取 staff，以 select_related 一併取出，避免每行一次查詢
+    """
     extra = 1
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('staff')
+
+class EmploymentRecordInline(StaffChildInline):
+    model = EmploymentRecord
     fields = ('employment_type', 'entry_date', 'departure_date', 'is_valid_for_seniority', 'remark')
 
-class EducationBackgroundInline(admin.TabularInline):
+class EducationBackgroundInline(StaffChildInline):
     model = EducationBackground
-    extra = 1
     # 確保這裡的字段與 EducationBackground 模型中的字段一致，並包含了新增的字段
     fields = ('study_period', 'school_name', 'education_level', 'degree_name', 'certificate_date', 'is_phd', 'is_master', 'is_overseas_study')
 
-class FamilyMemberInline(admin.TabularInline):
+class FamilyMemberInline(StaffChildInline):
     model = FamilyMember
-    extra = 1
     # 建議也明確指定 fields，例如：
     # fields = ('name', 'relationship', 'birth_date', 'age', 'education_level', 'institution', 'alumni_class')
 
-class WorkExperienceInline(admin.TabularInline):
+class WorkExperienceInline(StaffChildInline):
     model = WorkExperience
-    extra = 1
     # 建議也明確指定 fields
 
-class ProfessionalQualificationInline(admin.TabularInline):
+class ProfessionalQualificationInline(StaffChildInline):
     model = ProfessionalQualification
-    extra = 1
     # 建議也明確指定 fields
 
-class AssociationPositionInline(admin.TabularInline):
+class AssociationPositionInline(StaffChildInline):
     model = AssociationPosition
-    extra = 1
     # 建議也明確指定 fields
 
 @admin.register(StaffProfile)
 class StaffProfileAdmin(admin.ModelAdmin):
     list_display = ('staff_id', 'name_chinese', 'employment_type', 'active_status_display', 'entry_date', 'school_seniority_description')
-    search_fields = ('staff_id', 'staff_name', 'name_chinese', 'id_number')
+    # 員工編號及證件號碼按前綴搜尋 (LIKE 'xxx%')，可使用索引；姓名仍按包含搜尋
+    search_fields = ('^staff_id', 'staff_name', 'name_chinese', '^id_number')
     list_filter = ('is_active', 'employment_type', 'position_grade')
     readonly_fields = ('school_seniority_description',)
+    # 篩選或搜尋時不另外計算全表總數
+    show_full_result_count = False
     
     def active_status_display(self, obj):
         """在職狀態顯示"""
@@ -94,19 +106,37 @@ class StaffProfileAdmin(admin.ModelAdmin):
                 messages.error(request, '請選擇CSV文件')
                 return render(request, 'admin/staff_management/staffprofile/import_csv.html')
             
-            if not csv_file.name.endswith('.csv'):
-                messages.error(request, '文件格式不正確，請上傳CSV文件')
+            extension = os.path.splitext(csv_file.name)[1].lower()
+            if extension not in SUPPORTED_EXTENSIONS:
+                messages.error(request, '文件格式不正確，請上傳CSV或XLSX文件')
+                return render(request, 'admin/staff_management/staffprofile/import_csv.html')
+            
+            mode = request.POST.get('mode', 'insert')
+            child_strategy = request.POST.get('child_strategy', 'replace')
+            if mode not in IMPORT_MODES or child_strategy not in CHILD_STRATEGIES:
+                messages.error(request, '不支援的匯入模式')
                 return render(request, 'admin/staff_management/staffprofile/import_csv.html')
             
             try:
                 # 保存臨時文件
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp_file:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp_file:
                     for chunk in csv_file.chunks():
                         tmp_file.write(chunk)
                     tmp_file_path = tmp_file.name
                 
+                # 只驗證：有問題時直接下載逐行錯誤報告，不寫入資料庫
+                if '_validate' in request.POST:
+                    validation = validate_file(tmp_file_path, mode=mode)
+                    os.unlink(tmp_file_path)
+                    if validation['issues']:
+                        response = HttpResponse(issues_to_csv(validation['issues']), content_type='text/csv; charset=utf-8')
+                        response['Content-Disposition'] = 'attachment; filename="staff_import_report.csv"'
+                        return response
+                    messages.success(request, f'驗證通過：{validation["total_rows"]} 行均可匯入')
+                    return render(request, 'admin/staff_management/staffprofile/import_csv.html')
+                
                 # 調用現有的導入函數
-                result = import_data(tmp_file_path)
+                result = import_data(tmp_file_path, mode=mode, child_strategy=child_strategy)
                 
                 # 清理臨時文件
                 os.unlink(tmp_file_path)
@@ -119,7 +149,13 @@ class StaffProfileAdmin(admin.ModelAdmin):
                     request
                 )
                 
-                if result['imported_count'] > 0:
+                if mode == 'upsert':
+                    messages.success(
+                        request,
+                        f'匯入完成：新增 {result["inserted_count"]} 筆，更新 {result["updated_count"]} 筆，'
+                        f'無變化 {result["unchanged_count"]} 筆'
+                    )
+                elif result['imported_count'] > 0:
                     messages.success(request, f'成功導入 {result["imported_count"]} 筆員工資料')
                 
                 if result['errors']:
@@ -404,13 +440,14 @@ class StaffProfileAdmin(admin.ModelAdmin):
         return response
 
     def export_photos_view(self, request):
-        """導出員工照片為ZIP，檔名採用員工編號"""
-        buffer = BytesIO()
+        """導出員工照片為ZIP，檔名採用員工編號；ZIP 寫入導出目錄後交由 nginx 發送（見 pcms_staff/protected_media.py）"""
         exported = 0
+        export_name, export_path = create_export_file('.zip')
 
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        # 照片本身已壓縮，直接存入 ZIP，不再以 deflate 重複壓縮
+        with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_STORED) as zipf:
             queryset = StaffProfile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
-            for staff in queryset:
+            for staff in queryset.only('staff_id', 'profile_picture').iterator():
                 if not staff.staff_id:
                     continue
                 try:
@@ -421,16 +458,17 @@ class StaffProfileAdmin(admin.ModelAdmin):
                     _, ext = os.path.splitext(file_obj.name)
                     ext = ext or '.jpg'
                     filename = f"{staff.staff_id}{ext}"
-                    with file_obj.open('rb') as f:
-                        zipf.writestr(filename, f.read())
-                        exported += 1
+                    # 按塊從磁碟複製，不把整張照片讀入記憶體
+                    zipf.write(file_obj.path, filename)
+                    exported += 1
                 except Exception as exc:  # pragma: no cover - 錯誤記錄後繼續
                     import logging
                     logging.getLogger(__name__).error(f"導出照片 {staff.staff_id} 失敗: {exc}")
 
-        response = HttpResponse(buffer.getvalue(), content_type='application/zip')
         current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename=\"staff_photos_{current_time}.zip\"'
+        response = protected_file_response(
+            export_name, as_attachment=True, filename=f'staff_photos_{current_time}.zip'
+        )
 
         from .permissions import log_user_action
         log_user_action(
@@ -444,79 +482,80 @@ class StaffProfileAdmin(admin.ModelAdmin):
     actions = ['set_active', 'set_inactive', 'toggle_active_status', 'recalculate_seniority']
     
     def recalculate_seniority(self, request, queryset):
-        """批量重新計算員工年資"""
-        success_count = 0
-        error_count = 0
-        
-        for staff in queryset:
-            try:
-                old_seniority = staff.school_seniority_description
-                staff.calculate_school_seniority()
-                new_seniority = staff.school_seniority_description
-                
-                # 記錄操作日誌
-                from .permissions import log_user_action
-                log_user_action(
-                    request.user, 'update', 'StaffProfile', staff.id,
-                    f"重新計算員工 {staff.staff_name or staff.name_chinese} 年資: {old_seniority} → {new_seniority}",
-                    request
-                )
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                # 記錄錯誤
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"計算員工 {staff.staff_id} 年資時發生錯誤: {e}")
-        
+        """批量重新計算員工年資（一次批量計算，日誌一次寫入）"""
+        from .permissions import log_user_actions
+        names = {
+            pk: staff_name or name_chinese
+            for pk, staff_name, name_chinese in queryset.values_list('pk', 'staff_name', 'name_chinese')
+        }
+        try:
+            with transaction.atomic():
+                results = StaffProfile.bulk_calculate_school_seniority(StaffProfile.objects.filter(pk__in=list(names)))
+        except Exception as e:
+            # 記錄錯誤
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"批量計算年資時發生錯誤: {e}")
+            self.message_user(request, f'{len(names)} 名員工年資計算失敗，請檢查日誌', level='warning')
+            return
+
+        # 記錄操作日誌
+        log_user_actions(request.user, 'update', 'StaffProfile', [
+            (pk, f"重新計算員工 {names[pk]} 年資: {old_seniority} → {new_seniority}")
+            for pk, (old_seniority, new_seniority) in results.items()
+        ], request)
+
         # 顯示操作結果
-        if success_count > 0:
-            self.message_user(request, f'成功重新計算 {success_count} 名員工的年資')
-        if error_count > 0:
-            self.message_user(request, f'{error_count} 名員工年資計算失敗，請檢查日誌', level='warning')
+        changed = sum(1 for old_seniority, new_seniority in results.values() if old_seniority != new_seniority)
+        if results:
+            self.message_user(request, f'成功重新計算 {len(results)} 名員工的年資（{changed} 名有變化）')
     
     recalculate_seniority.short_description = "📊 重新計算年資 Recalculate Seniority"
-    
+
+    def _update_active_status(self, request, queryset, is_active=None):
+        """
+        批量更新在職狀態：is_active 為 None 時切換 (UPDATE ... SET is_active = NOT is_active)
+        先讀取選中員工的主鍵及姓名，以主鍵更新，避免按在職狀態篩選時更新後查詢結果改變；
+        之後一次批量重新計算年資，日誌一次寫入
+        """
+        from .permissions import log_user_actions
+        with transaction.atomic():
+            rows = list(queryset.values_list('pk', 'staff_name', 'name_chinese', 'is_active'))
+            selected = StaffProfile.objects.filter(pk__in=[row[0] for row in rows])
+            if is_active is None:
+                new_status = Case(When(is_active=True, then=Value(False)), default=Value(True))
+            else:
+                new_status = is_active
+            updated = selected.update(is_active=new_status)
+            StaffProfile.bulk_calculate_school_seniority(selected)
+
+        entries = []
+        for pk, staff_name, name_chinese, old_status in rows:
+            name = staff_name or name_chinese
+            if is_active is None:
+                status_text = "離職" if old_status else "在職"
+                entries.append((pk, f"切換員工 {name} 狀態為{status_text}"))
+            else:
+                status_text = "在職" if is_active else "離職"
+                entries.append((pk, f"設置員工 {name} 為{status_text}狀態"))
+        log_user_actions(request.user, 'update', 'StaffProfile', entries, request)
+        return updated
+
     def set_active(self, request, queryset):
         """批量設置員工為在職狀態"""
-        updated = queryset.update(is_active=True)
-        # 記錄操作日誌
-        from .permissions import log_user_action
-        for staff in queryset:
-            log_user_action(
-                request.user, 'update', 'StaffProfile', staff.id, 
-                f"設置員工 {staff.staff_name or staff.name_chinese} 為在職狀態", request
-            )
+        updated = self._update_active_status(request, queryset, is_active=True)
         self.message_user(request, f'成功設置 {updated} 名員工為在職狀態')
     set_active.short_description = "✅ 設置為在職狀態 Set as Active"
     
     def set_inactive(self, request, queryset):
         """批量設置員工為離職狀態"""
-        updated = queryset.update(is_active=False)
-        # 記錄操作日誌
-        from .permissions import log_user_action
-        for staff in queryset:
-            log_user_action(
-                request.user, 'update', 'StaffProfile', staff.id, 
-                f"設置員工 {staff.staff_name or staff.name_chinese} 為離職狀態", request
-            )
+        updated = self._update_active_status(request, queryset, is_active=False)
         self.message_user(request, f'成功設置 {updated} 名員工為離職狀態')
     set_inactive.short_description = "❌ 設置為離職狀態"
     
     def toggle_active_status(self, request, queryset):
         """批量切換員工在職狀態"""
-        for staff in queryset:
-            old_status = staff.is_active
-            staff.is_active = not staff.is_active
-            staff.save()
-            # 記錄操作日誌
-            from .permissions import log_user_action
-            status_text = "在職" if staff.is_active else "離職"
-            log_user_action(
-                request.user, 'update', 'StaffProfile', staff.id, 
-                f"切換員工 {staff.staff_name or staff.name_chinese} 狀態為{status_text}", request
-            )
-        count = queryset.count()
+        count = self._update_active_status(request, queryset)
         self.message_user(request, f'成功切換 {count} 名員工的在職狀態')
     toggle_active_status.short_description = "🔄 切換在職狀態"
     fieldsets = (
@@ -607,11 +646,51 @@ class UserRoleProxy(UserRole):
 UserRoleProxy._meta.app_label = 'auth'
 admin.site.register(UserRoleProxy, UserRoleAdmin)
 
+def estimated_row_count(model, using):
+    """
+    返回資料庫統計的估計行數（MySQL 的 information_schema、PostgreSQL 的 pg_class）
+    不支援的資料庫返回 None
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+class EstimatedCountPaginator(Paginator):
+    """
+    資料表很大時，未篩選的列表以估計行數代替 COUNT(*)（InnoDB 需掃描整個索引才能計數）
+    有篩選條件，或估計值小於 threshold 時仍精確計數
+    """
+    threshold = 100000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
+
 @admin.register(SystemLog)
 class SystemLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'action', 'resource_type', 'resource_id', 'timestamp', 'ip_address')
+    list_select_related = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ('action', 'resource_type', 'timestamp')
-    search_fields = ('user__username', 'resource_type', 'resource_id', 'description', 'ip_address')
+    # 只按可使用索引的欄位精確搜尋；不再對操作描述 (TextField) 做全表的包含搜尋
+    search_fields = ('=user__username', '=resource_type', '=resource_id', '=ip_address')
     readonly_fields = ('user', 'action', 'resource_type', 'resource_id', 'description', 
                        'ip_address', 'user_agent', 'timestamp')
     date_hierarchy = 'timestamp'
@@ -5,3 +5,8 @@ class StaffManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'staff_management'
     verbose_name = '教職員管理' # Admin界面顯示的應用名稱
+
+    def ready(self):
+        # 員工檔案及入職申請保存時更新全文搜尋索引
+        from .search import connect_signals
+        connect_signals()
@@ -0,0 +1,280 @@
+"""
+員工資料備份及還原
+每次備份在 BACKUP_PATH 下建立 pcms_backup_<時間>/ 目錄，並寫入 manifest.json：
+- rows：所有員工的 {staff_id: [資料雜湊, 該行所在的備份目錄]}
+- photos：所有員工照片的 {staff_id: {sha256, object, source, size, mtime_ns}}
+- files：本次備份寫入的文件及其 SHA-256
+
+增量備份 (incremental) 與最近一次備份的 manifest 比較：
+- CSV 只包含資料雜湊有變化的員工，沒變化的沿用之前備份中的行
+- 照片按內容雜湊存放在 objects/ 下，相同內容只存一份；來源文件的大小及修改時間未變時
+  不重新讀取計算雜湊
+因此備份時間及佔用空間取決於變更量，而非資料總量。還原見 restore_backup 命令。
+增量備份會引用之前備份中的 CSV 及照片，刪除舊備份前應先做一次完整備份。
+"""
+import csv
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+from django.conf import settings
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_FORMAT = 1
+BACKUP_DIR_PREFIX = 'pcms_backup_'
+OBJECTS_DIR = 'objects'
+CSV_DIR = 'csv_exports'
+
+# 備份 CSV 的欄位，與員工匯入格式相容
+EXPORT_FIELDS = (
+    'staff_id', 'staff_name', 'employment_type', 'employment_type_remark',
+    'dsej_registration_status', 'dsej_registration_rank', 'entry_date',
+    'departure_date', 'retirement_date', 'position_grade',
+    'teaching_staff_salary_grade', 'basic_salary_points',
+    'adjusted_salary_points', 'provident_fund_type', 'remark',
+    'contract_number', 'is_active', 'name_chinese', 'name_foreign',
+    'gender', 'marital_status', 'birth_place', 'birth_date', 'origin',
+    'id_type', 'id_number', 'id_expiry_date', 'bank_account_number',
+    'social_security_number', 'home_phone', 'mobile_phone', 'address',
+    'email', 'is_foreign_national', 'is_master', 'is_phd', 'is_overseas_study',
+)
+
+
+class BackupError(Exception):
+    """備份目錄或 manifest 無效"""
+
+
+def default_backup_path():
+    """BACKUP_PATH 環境變數，未設定時為專案下的 backup/ 目錄"""
+    return os.environ.get('BACKUP_PATH') or os.path.join(settings.BASE_DIR, 'backup')
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def row_values(values):
+    """將一行資料轉為 CSV 字串值，None 為空字串"""
+    return ['' if value is None else str(value) for value in values]
+
+
+def row_hash(values):
+    return hashlib.sha256('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+
+def list_backups(root):
+    """按時間順序返回 root 下含 manifest 的備份目錄名稱"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if name.startswith(BACKUP_DIR_PREFIX) and os.path.isfile(os.path.join(root, name, MANIFEST_NAME))
+    )
+
+
+def load_manifest(root, name):
+    with open(os.path.join(root, name, MANIFEST_NAME), encoding='utf-8') as source:
+        manifest = json.load(source)
+    if manifest.get('format') != MANIFEST_FORMAT:
+        raise BackupError(f"不支援的 manifest 格式: {name}")
+    return manifest
+
+
+def load_latest_manifest(root):
+    backups = list_backups(root)
+    return load_manifest(root, backups[-1]) if backups else None
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as target:
+        json.dump(data, target, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _copy_atomic(source, destination):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f'{destination}.tmp'
+    shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+class BackupWriter:
+    """
+    建立一次備份
+    incremental=True 時與最近一次備份比較，只寫入變更的資料及未存過的照片內容
+    """
+
+    def __init__(self, root, incremental=False, log=None):
+        self.root = root
+        self.incremental = incremental
+        self.log = log or (lambda message: None)
+        self.previous = load_latest_manifest(root) if incremental else None
+        self.name = f"{BACKUP_DIR_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.backup_dir = os.path.join(root, self.name)
+        self.files = {}
+
+    def run(self):
+        from .models import StaffProfile
+
+        if os.path.exists(self.backup_dir):
+            raise BackupError(f"備份目錄已存在: {self.backup_dir}")
+        os.makedirs(self.backup_dir)
+
+        # 一次查詢讀取所有員工的匯出欄位及照片路徑
+        records = StaffProfile.objects.order_by('staff_id').values_list(*EXPORT_FIELDS, 'profile_picture')
+        rows, changed_rows, photos = {}, [], {}
+        stats = {'rows': 0, 'rows_written': 0, 'photos': 0, 'photos_copied': 0, 'photo_bytes_copied': 0}
+        previous_rows = self.previous['rows'] if self.previous else {}
+        previous_photos = self.previous['photos'] if self.previous else {}
+
+        for record in records:
+            values = row_values(record[:-1])
+            staff_id, picture = values[0], record[-1]
+            digest = row_hash(values)
+            stats['rows'] += 1
+
+            previous = previous_rows.get(staff_id)
+            if previous and previous[0] == digest:
+                rows[staff_id] = previous
+            else:
+                rows[staff_id] = [digest, self.name]
+                changed_rows.append(values)
+
+            if picture:
+                entry = self._backup_photo(staff_id, picture, previous_photos.get(staff_id), stats)
+                if entry:
+                    photos[staff_id] = entry
+                    stats['photos'] += 1
+
+        csv_name = None
+        if changed_rows:
+            csv_name = f"{CSV_DIR}/staff_data_backup_{self.name[len(BACKUP_DIR_PREFIX):]}.csv"
+            self._write_csv(csv_name, changed_rows)
+        stats['rows_written'] = len(changed_rows)
+
+        manifest = {
+            'format': MANIFEST_FORMAT,
+            'name': self.name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'type': 'incremental' if self.incremental else 'full',
+            'base': self.previous['name'] if self.previous else None,
+            'fields': list(EXPORT_FIELDS),
+            'csv': csv_name,
+            'rows': rows,
+            'deleted': sorted(set(previous_rows) - set(rows)),
+            'photos': photos,
+            'files': self.files,
+            'stats': stats,
+        }
+        _write_json_atomic(os.path.join(self.backup_dir, MANIFEST_NAME), manifest)
+        return manifest
+
+    def _write_csv(self, relative_name, rows):
+        path = os.path.join(self.backup_dir, relative_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', newline='', encoding='utf-8-sig') as target:
+            writer = csv.writer(target)
+            writer.writerow(EXPORT_FIELDS)
+            writer.writerows(rows)
+        self.files[relative_name] = file_sha256(path)
+
+    def _backup_photo(self, staff_id, picture, previous, stats):
+        source = os.path.join(settings.MEDIA_ROOT, picture)
+        try:
+            stat = os.stat(source)
+        except OSError:
+            self.log(f"⚠️  照片不存在 {staff_id}：{picture}")
+            return None
+
+        entry = {'source': picture, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if self.incremental and previous and all(previous.get(key) == entry[key] for key in entry) \
+                and os.path.exists(os.path.join(self.root, previous['object'])):
+            # 來源文件未變：沿用之前的雜湊及存放位置，不必重新讀取
+            entry.update(sha256=previous['sha256'], object=previous['object'])
+            return entry
+
+        entry['sha256'] = file_sha256(source)
+        _, ext = os.path.splitext(source)
+        ext = ext.lower() or '.jpg'
+        if self.incremental:
+            # 按內容存放，相同內容只存一份
+            relative = f"{OBJECTS_DIR}/{entry['sha256'][:2]}/{entry['sha256']}{ext}"
+        else:
+            relative = f"{self.name}/staff_photos/{staff_id}{ext}"
+            self.files[relative[len(self.name) + 1:]] = entry['sha256']
+
+        destination = os.path.join(self.root, relative)
+        if not os.path.exists(destination):
+            _copy_atomic(source, destination)
+            stats['photos_copied'] += 1
+            stats['photo_bytes_copied'] += stat.st_size
+            self.log(f"📸 複製照片：{staff_id} -> {relative}")
+        entry['object'] = relative
+        return entry
+
+
+def collect_rows(root, manifest):
+    """
+    按 manifest 重組所有員工的最新資料
+    返回 {staff_id: [欄位值...]}；每個需要的 CSV 只讀取一次
+    """
+    by_backup = {}
+    for staff_id, (_, backup_name) in manifest['rows'].items():
+        by_backup.setdefault(backup_name, set()).add(staff_id)
+
+    rows = {}
+    for backup_name, staff_ids in by_backup.items():
+        source = manifest if backup_name == manifest['name'] else load_manifest(root, backup_name)
+        if not source.get('csv'):
+            raise BackupError(f"備份 {backup_name} 缺少資料文件")
+        with open(os.path.join(root, backup_name, source['csv']), newline='', encoding='utf-8-sig') as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader)
+            if tuple(header) != EXPORT_FIELDS:
+                raise BackupError(f"備份 {backup_name} 的欄位與目前版本不一致")
+            for values in reader:
+                if values and values[0] in staff_ids:
+                    rows[values[0]] = values
+
+    missing = set(manifest['rows']) - set(rows)
+    if missing:
+        raise BackupError(f"有 {len(missing)} 筆員工資料在備份中找不到，例如 {sorted(missing)[:5]}")
+    return rows
+
+
+def verify_backup(root, manifest):
+    """
+    檢查還原所需的文件是否存在且 SHA-256 一致
+    返回問題列表，空列表表示通過
+    """
+    problems = []
+    backup_names = {backup_name for _, backup_name in manifest['rows'].values()}
+    for backup_name in sorted(backup_names):
+        source = manifest if backup_name == manifest['name'] else load_manifest(root, backup_name)
+        for relative, digest in source['files'].items():
+            if not relative.startswith(f'{CSV_DIR}/'):
+                continue
+            path = os.path.join(root, backup_name, relative)
+            if not os.path.exists(path):
+                problems.append(f"缺少文件：{backup_name}/{relative}")
+            elif file_sha256(path) != digest:
+                problems.append(f"校驗失敗：{backup_name}/{relative}")
+
+    checked = set()
+    for staff_id, photo in manifest['photos'].items():
+        if photo['object'] in checked:
+            continue
+        checked.add(photo['object'])
+        path = os.path.join(root, photo['object'])
+        if not os.path.exists(path):
+            problems.append(f"缺少照片：{photo['object']}（{staff_id}）")
+        elif file_sha256(path) != photo['sha256']:
+            problems.append(f"照片校驗失敗：{photo['object']}（{staff_id}）")
+    return problems
@@ -0,0 +1,138 @@
+"""
+多格式日期解析
+- 所有格式預先編譯為正則表達式，以匹配代替 strptime 的異常處理
+- 固定按下列優先順序嘗試，結果與值在檔案中的先後次序無關
+- 已解析的值按欄位緩存，重複值（如同一入職日期）不必重新解析
+
+支援格式（與原 import_data.parse_date 相同的優先順序）：
+2024年8月10日、2024-08-10、2024/08/10、08/10/2024（月/日/年）、10/08/2024（日/月/年）
+"""
+import re
+from collections import Counter
+from datetime import date, datetime
+
+from rest_framework import serializers
+
+# 視為空值的標記
+NULL_MARKERS = frozenset({'', '/', 'n/a', 'na', '無', 'null', 'none'})
+
+# (格式名稱, 正則表達式, 年/月/日所在的分組序號)
+DATE_FORMATS = (
+    ('chinese', re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日'), (1, 2, 3)),
+    ('ymd_dash', re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})$'), (1, 2, 3)),
+    ('ymd_slash', re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})$'), (1, 2, 3)),
+    ('mdy_slash', re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})$'), (3, 1, 2)),
+    ('dmy_slash', re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})$'), (3, 2, 1)),
+)
+
+_MISSING = object()
+
+
+def _try_format(date_format, text):
+    _, pattern, (year, month, day) = date_format
+    match = pattern.match(text)
+    if match is None:
+        return None
+    try:
+        return date(int(match.group(year)), int(match.group(month)), int(match.group(day)))
+    except ValueError:
+        # 例如 2 月 30 日，或把日/月順序不同的日期套用到錯誤的格式
+        return None
+
+
+class DateColumnParser:
+    """
+    單一欄位的日期解析器
+    固定按 formats 的順序嘗試：月/日順序不明確的值（如 03/04/2020）總是按月/日/年解析，
+    不受同一欄位中其他值（如只能按日/月/年解析的 25/12/2020）影響。
+    """
+
+    def __init__(self, formats=DATE_FORMATS, cache_size=4096):
+        self.formats = formats
+        self.cache_size = cache_size
+        # 各格式解析成功的不重複值數目
+        self.format_counts = Counter()
+        self._cache = {}
+
+    @property
+    def format_name(self):
+        """該欄位最常用的格式"""
+        if not self.format_counts:
+            return None
+        return self.format_counts.most_common(1)[0][0]
+
+    def parse(self, value):
+        """解析日期，無法解析或為空值時返回 None"""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+
+        text = str(value).strip()
+        result = self._cache.get(text, _MISSING)
+        if result is not _MISSING:
+            return result
+
+        result = None
+        if text.lower() not in NULL_MARKERS:
+            for date_format in self.formats:
+                result = _try_format(date_format, text)
+                if result is not None:
+                    self.format_counts[date_format[0]] += 1
+                    break
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[text] = result
+        return result
+
+    __call__ = parse
+
+
+class DateParser:
+    """按欄位名稱管理 DateColumnParser，每次匯入建立一個實例"""
+
+    def __init__(self, formats=DATE_FORMATS):
+        self.formats = formats
+        self._columns = {}
+
+    def column(self, name):
+        parser = self._columns.get(name)
+        if parser is None:
+            parser = self._columns[name] = DateColumnParser(self.formats)
+        return parser
+
+    def parse(self, column, value):
+        return self.column(column).parse(value)
+
+    def detected_formats(self):
+        """返回各欄位最常用的格式，便於匯入報告及除錯"""
+        return {name: parser.format_name for name, parser in self._columns.items() if parser.format_name}
+
+
+# 跨請求共用
+_default_parser = DateColumnParser()
+
+
+def parse_date(value):
+    """解析單個日期值（不按欄位區分格式，按 DATE_FORMATS 的順序嘗試）"""
+    return _default_parser.parse(value)
+
+
+class FlexibleDateField(serializers.DateField):
+    """
+    接受多種日期格式的序列化器欄位
+    先按 DRF 的標準格式 (ISO 8601) 解析，失敗時再以 parse_date 解析中文及斜線格式
+    """
+
+    def to_internal_value(self, value):
+        try:
+            return super().to_internal_value(value)
+        except serializers.ValidationError:
+            if isinstance(value, str):
+                parsed = parse_date(value)
+                if parsed is not None:
+                    return parsed
+            raise
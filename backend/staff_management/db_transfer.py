@@ -0,0 +1,190 @@
+"""
+資料庫之間逐表複製（用於 SQLite → MySQL 遷移）
+- 按外鍵依賴順序逐個模型複製，每個模型按主鍵分頁讀取，以 executemany 批量寫入，
+  不經過模型的 save() 及信號（StaffProfile.save 不會重新計算年資，
+  EducationBackground.save 不會重新更新學歷標記）
+- 每頁在獨立的交易中寫入，提交後把進度寫入狀態文件；中斷後再次執行會從上次的主鍵繼續
+- 全部複製後逐表比較行數及校驗和
+"""
+import hashlib
+import json
+import os
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from .snapshots import column_converters, dependency_levels, iter_pages, snapshot_models
+
+STATE_FORMAT = 1
+DEFAULT_CHUNK_SIZE = 2000
+
+# migrate 會在目標資料庫自動建立的資料，開始複製前可直接清空
+AUTO_POPULATED_MODELS = frozenset({'contenttypes.contenttype', 'auth.permission'})
+
+_checksum_encoder = json.JSONEncoder(
+    ensure_ascii=False, separators=(',', ':'), sort_keys=True,
+    default=lambda value: value.isoformat() if hasattr(value, 'isoformat') else str(value),
+)
+
+
+class TransferError(Exception):
+    """來源與目標不一致，或狀態文件與本次複製不相符"""
+
+
+def table_checksum(model, using, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    返回 (行數, 校驗和)
+    校驗和為每行雜湊之和 (mod 2^64)，與讀取順序無關，
+    因此兩個資料庫的主鍵排序規則 (collation) 不同時仍可比較
+    """
+    count = total = 0
+    for rows in iter_pages(model, using, chunk_size):
+        for row in rows:
+            digest = hashlib.blake2b(_checksum_encoder.encode(row).encode('utf-8'), digest_size=8).digest()
+            total += int.from_bytes(digest, 'big')
+        count += len(rows)
+    return count, f'{total % (1 << 64):016x}'
+
+
+class TransferState:
+    """
+    複製進度：{模型: {'last_pk': 已提交的最後主鍵, 'rows': 已複製行數, 'done': 是否完成}}
+    每頁提交後寫入文件，以便中斷後繼續
+    """
+
+    def __init__(self, path, source, target):
+        self.path = path
+        self.data = {'format': STATE_FORMAT, 'source': source, 'target': target, 'models': {}}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as state_file:
+                data = json.load(state_file)
+            if (data.get('format'), data.get('source'), data.get('target')) != (STATE_FORMAT, source, target):
+                raise TransferError(f"狀態文件 {path} 不屬於本次複製（{source} → {target}），請刪除後重新開始")
+            self.data = data
+            self.resumed = True
+        else:
+            self.resumed = False
+
+    def model(self, label):
+        return self.data['models'].setdefault(label, {'last_pk': None, 'rows': 0, 'done': False})
+
+    def save(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(self.data, state_file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class TableCopier:
+    """
+    將 source 資料庫的所有模型複製到 target 資料庫
+    target 需已執行 migrate；首次執行時會清空目標資料表
+    （除 contenttypes 及權限外，目標表有資料時需 force=True）
+    """
+
+    def __init__(self, source, target, state_path, chunk_size=DEFAULT_CHUNK_SIZE, force=False, log=None):
+        if connections[source].settings_dict['NAME'] == connections[target].settings_dict['NAME'] \
+                and connections[source].vendor == connections[target].vendor:
+            raise TransferError("來源與目標是同一個資料庫")
+        self.source = source
+        self.target = target
+        self.chunk_size = chunk_size
+        self.force = force
+        self.log = log or (lambda message: None)
+        self.state = TransferState(state_path, source, target)
+        self.models = snapshot_models()
+
+    def run(self):
+        if not self.state.resumed:
+            self._prepare_target()
+            self.state.save()
+        else:
+            self.log(f"↩️  從狀態文件 {self.state.path} 繼續")
+
+        connection = connections[self.target]
+        with connection.constraint_checks_disabled():
+            for level in dependency_levels(self.models):
+                for model in level:
+                    self._copy_model(model)
+
+        with connection.cursor() as cursor:
+            for statement in connection.ops.sequence_reset_sql(no_style(), self.models):
+                cursor.execute(statement)
+        # 複製時停用了外鍵檢查，最後統一檢查
+        connection.check_constraints(table_names=[model._meta.db_table for model in self.models])
+        return {label: entry['rows'] for label, entry in self.state.data['models'].items()}
+
+    def _prepare_target(self):
+        non_empty = [
+            model._meta.label_lower for model in self.models
+            if model._meta.label_lower not in AUTO_POPULATED_MODELS
+            and model._base_manager.using(self.target).exists()
+        ]
+        if non_empty and not self.force:
+            raise TransferError(f"目標資料表已有資料：{', '.join(non_empty)}（確認可以覆蓋時使用 --force）")
+
+        connection = connections[self.target]
+        tables = [model._meta.db_table for model in self.models]
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+        self.log(f"🧹 已清空目標的 {len(tables)} 個資料表")
+
+    def _copy_model(self, model):
+        label = model._meta.label_lower
+        progress = self.state.model(label)
+        if progress['done']:
+            return
+
+        opts = model._meta
+        connection = connections[self.target]
+        qn = connection.ops.quote_name
+        columns = [field.column for field in opts.concrete_fields]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            qn(opts.db_table), ', '.join(qn(column) for column in columns), ', '.join(['%s'] * len(columns)),
+        )
+        convert = [
+            (index, converter)
+            for index, converter in enumerate(column_converters(model, columns, connection)) if converter
+        ]
+        pk_index = [field.attname for field in opts.concrete_fields].index(opts.pk.attname)
+        target_manager = model._base_manager.using(self.target)
+        # 繼續中斷的複製時，最後一頁可能已提交但未記錄進度，第一頁需跳過目標已有的主鍵
+        check_existing = self.state.resumed
+
+        for rows in iter_pages(model, self.source, self.chunk_size, after=progress['last_pk']):
+            last_pk, page_size = rows[-1][pk_index], len(rows)
+            if check_existing:
+                existing = set(target_manager.filter(pk__in=[row[pk_index] for row in rows]).values_list('pk', flat=True))
+                rows = [row for row in rows if row[pk_index] not in existing]
+                check_existing = False
+
+            batch = [list(row) for row in rows]
+            for values in batch:
+                for index, converter in convert:
+                    values[index] = converter(values[index])
+            if batch:
+                with transaction.atomic(using=self.target), connection.cursor() as cursor:
+                    cursor.executemany(sql, batch)
+
+            progress['last_pk'] = last_pk
+            progress['rows'] += page_size
+            self.state.save()
+
+        progress['done'] = True
+        self.state.save()
+        self.log(f"📥 {label}：{progress['rows']} 筆")
+
+    def verify(self):
+        """逐表比較行數及校驗和，返回不一致的列表 [(模型, 來源, 目標)]"""
+        mismatches = []
+        for model in self.models:
+            source = table_checksum(model, self.source, self.chunk_size)
+            target = table_checksum(model, self.target, self.chunk_size)
+            if source != target:
+                mismatches.append((model._meta.label_lower, source, target))
+            else:
+                self.log(f"🔍 {model._meta.label_lower}：{source[0]} 筆，校驗和 {source[1]}")
+        return mismatches
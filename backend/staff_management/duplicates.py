@@ -0,0 +1,97 @@
+"""
+重複資料檢測
+將證件號碼、姓名標準化後存入帶索引的欄位（StaffProfile / StaffApplication 的
+id_number_normalized、name_normalized），查重時只需索引查找，不必全表掃描。
+
+- 證件號碼：NFKC 正規化、轉大寫，去除空白、括號及分隔符，例如 "1234567(8)" → "12345678"
+- 姓名：NFKC 正規化、轉小寫，去除空白及標點，常見繁體姓名用字轉為簡體
+"""
+import re
+import unicodedata
+
+from django.db.models import Q
+
+DUPLICATE_REASON_CHOICES = [
+    ('id_number', '證件號碼相同'),
+    ('name_birth', '姓名及出生日期相同'),
+]
+
+# 常見姓名用字的繁簡對照（繁體 → 簡體），兩個字串逐字對應
+_TRADITIONAL_CHARS = (
+    "陳張黃劉鄭趙吳楊葉許馮鄧盧蘇羅蕭謝韓馬鍾鐘鄺譚區龍賴關歐陸閻孫錢衛蔣韋嚴華湯鄒龐萬顧聶賈費齊賀畢"
+    "鄔樂於時貝計談紀項藍閔強婁顏駱經繆應賁鬱單諸鈕龔偉國榮輝傑軍東寶麗紅鳳嬌雲豔艷靜穎瑩儀詩曉蓮愛"
+    "銘鋒濤鵬飛鳴書賢誠興遠達順勝義禮廣權歡環綺蘭瓊鈺錦雙寧潔彥傳進貴學業億憶恆聰頌賽鴻鶴鐵鋼銀釗鈞"
+    "紹維綠綿緯嶸韻頤顯曄煒燦爾園圓夢樹橋發莊獻禎祿倫創勳協麥萊陽靈韜驊騰鎮滿濱潤澤淵漢灝詠譽謙楓棟"
+    "樺輔軒鈴鏡長穩積節簡綸聖聲藝蘊覺觀貞賓軾錫鎧電靄風飄駿魯鷹齡"
+)
+_SIMPLIFIED_CHARS = (
+    "陈张黄刘郑赵吴杨叶许冯邓卢苏罗萧谢韩马钟钟邝谭区龙赖关欧陆阎孙钱卫蒋韦严华汤邹庞万顾聂贾费齐贺毕"
+    "邬乐于时贝计谈纪项蓝闵强娄颜骆经缪应贲郁单诸钮龚伟国荣辉杰军东宝丽红凤娇云艳艳静颖莹仪诗晓莲爱"
+    "铭锋涛鹏飞鸣书贤诚兴远达顺胜义礼广权欢环绮兰琼钰锦双宁洁彦传进贵学业亿忆恒聪颂赛鸿鹤铁钢银钊钧"
+    "绍维绿绵纬嵘韵颐显晔炜灿尔园圆梦树桥发庄献祯禄伦创勋协麦莱阳灵韬骅腾镇满滨润泽渊汉灏咏誉谦枫栋"
+    "桦辅轩铃镜长稳积节简纶圣声艺蕴觉观贞宾轼锡铠电霭风飘骏鲁鹰龄"
+)
+_NAME_VARIANTS = str.maketrans(_TRADITIONAL_CHARS, _SIMPLIFIED_CHARS)
+
+_ID_NUMBER_STRIP_RE = re.compile(r'[^0-9A-Z]+')
+_NAME_STRIP_RE = re.compile(r'[\W_]+')
+
+
+def normalize_id_number(value):
+    """標準化證件號碼，空值返回空字串"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKC', str(value)).upper()
+    return _ID_NUMBER_STRIP_RE.sub('', value)
+
+
+def normalize_name(value):
+    """標準化姓名，空值或只有標點（如 '/'）時返回空字串"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKC', str(value)).casefold()
+    value = _NAME_STRIP_RE.sub('', value)
+    return value.translate(_NAME_VARIANTS)
+
+
+def apply_duplicate_keys(instance):
+    """
+    根據證件號碼及姓名設定實例上的標準化欄位
+    中文姓名為空時以外文姓名代替；bulk_create 前需手動調用
+    """
+    instance.id_number_normalized = normalize_id_number(instance.id_number)
+    instance.name_normalized = normalize_name(instance.name_chinese) or normalize_name(instance.name_foreign)
+
+
+def duplicate_lookup_keys(id_number_normalized, name_normalized, birth_date):
+    """返回用於批量比對的查重鍵"""
+    keys = []
+    if id_number_normalized:
+        keys.append(('id_number', id_number_normalized))
+    if name_normalized:
+        keys.append(('name_birth', name_normalized, birth_date))
+    return keys
+
+
+def find_duplicate_staff(id_number_normalized, name_normalized, birth_date):
+    """
+    查找疑似重複的員工檔案
+    返回 (StaffProfile 或 None, 重複原因)；證件號碼相同優先於姓名及出生日期相同
+    """
+    from .models import StaffProfile
+
+    condition = Q()
+    if id_number_normalized:
+        condition |= Q(id_number_normalized=id_number_normalized)
+    if name_normalized:
+        condition |= Q(name_normalized=name_normalized, birth_date=birth_date)
+    if not condition:
+        return None, ''
+
+    matches = list(StaffProfile.objects.filter(condition).order_by('pk')[:10])
+    for staff in matches:
+        if id_number_normalized and staff.id_number_normalized == id_number_normalized:
+            return staff, 'id_number'
+    if matches:
+        return matches[0], 'name_birth'
+    return None, ''
@@ -0,0 +1,713 @@
+"""
+員工資料匯入（pandas 欄位化處理）
+整個 CSV / XLSX 檔案一次讀入 DataFrame，BOM、空值標記、布爾值、數值、日期及學位關鍵字
+均以整欄運算處理，之後才逐行寫入資料庫。
+validate_file 只做解析及驗證、不寫入資料庫，返回逐行的問題報告。
+欄位格式見 static/import_data_format_sample_utf8_bom.csv。
+"""
+import csv
+import io
+import logging
+import os
+import re
+from collections import Counter
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from .date_parsing import DateParser
+from .duplicates import apply_duplicate_keys
+from .search import deferred_indexing, mark_documents
+from .models import (
+    StaffProfile, FamilyMember, EducationBackground, WorkExperience, ProfessionalQualification, AssociationPosition,
+)
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+# 文字欄位的空值標記（布爾值、數值及日期不包括 'nil'，與原有規則一致）
+STRING_NULL_MARKERS = ['/', 'n/a', 'na', '無', 'null', 'none', 'nil']
+TRUE_VALUES = ['true', '1', 'yes', 'y', '是']
+FALSE_VALUES = ['false', '0', 'no', 'n', '否']
+
+PHD_KEYWORDS = ('phd', 'ph.d', 'doctor', '博士')
+MASTER_KEYWORDS = ('master', '碩士', 'msc', 'm.sc', 'ma', 'm.a')
+PHD_RE = '|'.join(re.escape(keyword) for keyword in PHD_KEYWORDS)
+MASTER_RE = '|'.join(re.escape(keyword) for keyword in MASTER_KEYWORDS)
+CJK_RE = r'[\u4e00-\u9fff]'
+
+PROFILE_STRING_COLUMNS = (
+    'employment_type', 'employment_type_remark', 'dsej_registration_status', 'dsej_registration_rank',
+    'position_grade', 'teaching_staff_salary_grade', 'provident_fund_type', 'remark', 'contract_number',
+    'name_chinese', 'name_foreign', 'gender', 'marital_status', 'birth_place', 'origin', 'id_type', 'id_number',
+    'bank_account_number', 'social_security_number', 'home_phone', 'mobile_phone', 'address', 'email',
+    'alumni_class', 'alumni_class_year', 'alumni_class_duration', 'teacher_certificate_number',
+    'teaching_staff_rank', 'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relationship',
+)
+PROFILE_DATE_COLUMNS = (
+    'entry_date', 'departure_date', 'retirement_date', 'birth_date', 'id_expiry_date',
+    'teaching_staff_rank_effective_date',
+)
+PROFILE_DECIMAL_COLUMNS = ('basic_salary_points', 'adjusted_salary_points')
+PROFILE_BOOLEAN_COLUMNS = ('is_foreign_national', 'is_master', 'is_phd', 'is_overseas_study', 'is_active')
+EDUCATION_FLAG_COLUMNS = ('is_master', 'is_phd', 'is_overseas_study')
+
+# 重複欄位組：(關聯名稱, 模型, 欄位前綴, 組數, {模型欄位: CSV 欄位後綴}, 日期欄位)
+CHILD_GROUPS = (
+    ('family_members', FamilyMember, 'family_member', 5, {
+        'name': 'name', 'relationship': 'relationship', 'birth_date': 'birth_date', 'age': 'age',
+        'education_level': 'education_level', 'institution': 'institution', 'alumni_class': 'alumni_class',
+    }, ('birth_date',)),
+    ('education_backgrounds', EducationBackground, 'education', 4, {
+        'study_period': 'study_period', 'school_name': 'school_name', 'education_level': 'education_level',
+        'degree_name': 'degree_name', 'certificate_date': 'certificate_date',
+    }, ('certificate_date',)),
+    ('work_experiences', WorkExperience, 'work_experience', 4, {
+        'employment_period': 'employment_period', 'organization': 'organization', 'position': 'position',
+        'salary': 'salary',
+    }, ()),
+    ('professional_qualifications', ProfessionalQualification, 'professional_qualification', 4, {
+        'qualification_name': 'name', 'issuing_organization': 'issuing_organization', 'issue_date': 'issue_date',
+    }, ('issue_date',)),
+    ('association_positions', AssociationPosition, 'association', 4, {
+        'association_name': 'name', 'position': 'position', 'start_year': 'start_year', 'end_year': 'end_year',
+    }, ()),
+)
+
+# 每組子記錄以此欄位判斷是否存在
+CHILD_KEY_FIELDS = {
+    'family_members': 'name',
+    'education_backgrounds': 'school_name',
+    'work_experiences': 'organization',
+    'professional_qualifications': 'qualification_name',
+    'association_positions': 'association_name',
+}
+
+# 匯入模式：insert 只新增，已存在的員工編號報錯；upsert 新增或更新
+IMPORT_MODES = ('insert', 'upsert')
+# 更新時子記錄的處理方式：replace 以檔案內容取代；merge 按 CHILD_MERGE_KEYS 合併，保留檔案中沒有的記錄
+CHILD_STRATEGIES = ('replace', 'merge')
+CHILD_MERGE_KEYS = {
+    'family_members': ('name', 'relationship'),
+    'education_backgrounds': ('school_name', 'education_level'),
+    'work_experiences': ('organization', 'employment_period'),
+    'professional_qualifications': ('qualification_name',),
+    'association_positions': ('association_name', 'position'),
+}
+
+# 更新時會比較的員工欄位（只比較檔案中存在的欄位）
+PROFILE_UPDATE_COLUMNS = (
+    ('staff_name',) + PROFILE_STRING_COLUMNS + PROFILE_DATE_COLUMNS + PROFILE_DECIMAL_COLUMNS
+    + tuple(column for column in PROFILE_BOOLEAN_COLUMNS if column not in EDUCATION_FLAG_COLUMNS)
+)
+# 這些欄位變更時需要重新計算在校年資
+SENIORITY_SOURCE_FIELDS = frozenset({'entry_date', 'departure_date', 'is_active'})
+
+
+class ImportFileError(Exception):
+    """匯入檔案無法讀取或格式不支援"""
+
+
+def read_table(file_path):
+    """將 CSV 或 XLSX 讀入全部為字串的 DataFrame，並移除 BOM"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        # 在解析前對整個文本移除 BOM，比逐個儲存格替換快得多
+        with open(file_path, encoding='utf-8-sig') as source:
+            text = source.read().replace('\ufeff', '')
+        frame = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+    elif extension == '.xlsx':
+        frame = pd.read_excel(file_path, dtype=str, keep_default_na=False, engine='openpyxl')
+        # Excel 日期儲存格讀出為 "2024-08-10 00:00:00"，去掉時間部分
+        frame = frame.replace(r'^(\d{4}-\d{2}-\d{2}) 00:00:00$', r'\1', regex=True)
+        frame = frame.replace('\ufeff', '', regex=True)
+    else:
+        raise ImportFileError(f"不支援的檔案格式: {extension or '(無副檔名)'}，請上傳 CSV 或 XLSX 文件")
+
+    frame.columns = [str(column).replace('\ufeff', '').strip() for column in frame.columns]
+    return frame.fillna('')
+
+
+def _column(frame, name, default=''):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(default, index=frame.index, dtype=object)
+
+
+def _clean_value(value):
+    value = str(value).strip()
+    return '' if value.lower() in STRING_NULL_MARKERS else value
+
+
+def clean_table(frame):
+    """
+    整張表去除前後空白，空值標記轉為空字串
+    相同的值只清理一次：先對所有儲存格做 factorize，再按編碼映射回原來的形狀
+    """
+    codes, uniques = pd.factorize(frame.to_numpy(dtype=object).ravel())
+    cleaned = np.array([_clean_value(value) for value in uniques] or [''], dtype=object)
+    return pd.DataFrame(cleaned[codes].reshape(frame.shape), index=frame.index, columns=frame.columns)
+
+
+def to_boolean(series):
+    return series.str.lower().isin(TRUE_VALUES)
+
+
+def to_decimal(series):
+    """移除非數值字符後轉為數值，無法轉換時為 None"""
+    digits = series.str.replace(r'[^\d\.-]', '', regex=True)
+    valid = pd.to_numeric(digits, errors='coerce').notna()
+    # 以 Decimal 保存原始精度，不經浮點數轉換
+    return digits.where(valid).map(Decimal, na_action='ignore').astype(object).where(valid, None)
+
+
+def to_date(series, parser):
+    """每個不同的值只解析一次，再映射回整欄"""
+    values = series.unique()
+    mapping = {value: parser.parse(value) for value in values}
+    return series.map(mapping)
+
+
+def to_age(series):
+    digits = series.where(series.str.fullmatch(r'\d+'), '0')
+    return digits.astype(np.int64)
+
+
+def contains_keyword(series, pattern):
+    return series.str.lower().str.contains(pattern, regex=True)
+
+
+def explicit_education_flags(frame):
+    """CSV 明確設定的學歷標記：真值或 'false'，空白及其他值表示由學歷記錄決定"""
+    return {
+        column: _column(frame, column).str.lower().isin(TRUE_VALUES + ['false'])
+        for column in EDUCATION_FLAG_COLUMNS
+    }
+
+
+def prepare_frame(frame, dates=None, include_children=True):
+    """
+    將 clean_table 清理後的 DataFrame 轉為模型欄位值
+    返回 (profiles, children)：
+    - profiles：StaffProfile 欄位值的 DataFrame（學歷標記已按學歷記錄計算）
+    - children：{關聯名稱: {行索引: [子記錄欄位字典, ...]}}；include_children=False 時為空字典
+    """
+    dates = dates or DateParser()
+    profiles = pd.DataFrame(index=frame.index)
+
+    profiles['staff_id'] = _column(frame, 'staff_id')
+    profiles['staff_name'] = _column(frame, 'staff_name')
+    for column in PROFILE_STRING_COLUMNS:
+        profiles[column] = _column(frame, column)
+    for column in PROFILE_DATE_COLUMNS:
+        profiles[column] = to_date(_column(frame, column), dates.column(column))
+    for column in PROFILE_DECIMAL_COLUMNS:
+        profiles[column] = to_decimal(_column(frame, column))
+    for column in PROFILE_BOOLEAN_COLUMNS:
+        # 沒有 is_active 欄位時預設為在職
+        profiles[column] = to_boolean(_column(frame, column, 'True' if column == 'is_active' else ''))
+
+    profiles['name_chinese'] = profiles['name_chinese'].mask(profiles['name_chinese'] == '', profiles['staff_name'])
+    profiles['gender'] = profiles['gender'].mask(profiles['gender'] == '', 'M')
+
+    # CSV 明確設定的學歷標記（True 或 'false'），其餘按學歷記錄計算
+    explicit_flags = explicit_education_flags(frame)
+    education_flags = {column: pd.Series(False, index=frame.index) for column in EDUCATION_FLAG_COLUMNS}
+
+    children = {}
+    for related_name, model, prefix, count, fields, date_fields in CHILD_GROUPS:
+        rows = {}
+        for i in range(1, count + 1):
+            group = pd.DataFrame(index=frame.index)
+            for field, suffix in fields.items():
+                column = f'{prefix}_{i}_{suffix}'
+                if field in date_fields:
+                    group[field] = to_date(_column(frame, column), dates.column(column))
+                elif field == 'age':
+                    group[field] = to_age(_column(frame, column))
+                else:
+                    group[field] = _column(frame, column)
+
+            if related_name == 'education_backgrounds':
+                degree, level = group['degree_name'], group['education_level']
+                group['is_phd'] = contains_keyword(degree, PHD_RE) | contains_keyword(level, PHD_RE)
+                group['is_master'] = contains_keyword(degree, MASTER_RE) | contains_keyword(level, MASTER_RE)
+                # CSV 未明確設定留學時，學校名稱不含中文字符即判斷為海外
+                group['is_overseas_study'] = profiles['is_overseas_study'] | (
+                    (group['school_name'] != '') & ~group['school_name'].str.contains(CJK_RE, regex=True)
+                )
+
+            present = group[CHILD_KEY_FIELDS[related_name]] != ''
+            if related_name == 'professional_qualifications':
+                # 只有當專業資格名稱和頒授日期都有值時才創建
+                present &= group['issue_date'].notna()
+            if related_name == 'education_backgrounds':
+                for column in EDUCATION_FLAG_COLUMNS:
+                    education_flags[column] |= group[column] & present
+            if include_children:
+                for index, values in group[present].to_dict('index').items():
+                    rows.setdefault(index, []).append(values)
+        if include_children:
+            children[related_name] = rows
+
+    # 與 update_global_education_flags 相同的結果，但不必在寫入子記錄後再查詢及保存
+    for column in EDUCATION_FLAG_COLUMNS:
+        profiles[column] = profiles[column].where(explicit_flags[column], education_flags[column])
+
+    return profiles, children
+
+
+def import_file(file_path, mode='insert', child_strategy='replace'):
+    """
+    匯入員工資料檔案 (CSV / XLSX)
+    新員工每行在獨立事務中寫入，單行失敗不影響其他行；
+    mode='upsert' 時已存在的員工按 child_strategy 更新，見 _apply_updates。
+    返回 {'imported_count', 'errors', 'total_rows_processed'}，
+    upsert 模式另有 'inserted_count', 'updated_count', 'unchanged_count'
+    """
+    if mode not in IMPORT_MODES:
+        raise ImportFileError(f"不支援的匯入模式: {mode}")
+    if child_strategy not in CHILD_STRATEGIES:
+        raise ImportFileError(f"不支援的子記錄處理方式: {child_strategy}")
+
+    frame = read_table(file_path)
+    # 子記錄以 bulk_create 寫入，不觸發搜尋索引的信號；匯入結束時一次重建涉及員工的索引
+    with deferred_indexing():
+        return _import_frame(frame, mode, child_strategy)
+
+
+def _import_frame(frame, mode, child_strategy):
+    cleaned = clean_table(frame)
+    profiles, children = prepare_frame(cleaned)
+
+    # 一次查詢載入現有員工編號，代替逐行 exists() 查詢
+    existing_ids = set(StaffProfile.objects.values_list('staff_id', flat=True))
+    imported_count = 0
+    errors = []
+    updates = []
+    seen_ids = set()
+
+    for position, (index, values) in enumerate(profiles.to_dict('index').items()):
+        row_num = position + 2  # 第 1 行為標題
+        staff_id, staff_name = values['staff_id'], values['staff_name']
+        logger.debug("第%s行: staff_id='%s', staff_name='%s'", row_num, staff_id, staff_name)
+
+        if not staff_id or not staff_name:
+            errors.append(f"第{row_num}行: 缺少必要欄位（staff_id='{staff_id}' 或 staff_name='{staff_name}'）")
+            continue
+        if mode == 'upsert':
+            if staff_id in seen_ids:
+                errors.append(f"第{row_num}行: 員工編號'{staff_id}'在檔案中重複")
+                continue
+            seen_ids.add(staff_id)
+            if staff_id in existing_ids:
+                updates.append((row_num, index, values))
+                continue
+        elif staff_id in existing_ids:
+            errors.append(f"第{row_num}行: 員工編號'{staff_id}'已存在")
+            continue
+
+        try:
+            with transaction.atomic():
+                staff_profile = StaffProfile(**values)
+                staff_profile.save()
+
+                # 學歷標記已在 prepare_frame 中計算，子記錄不必逐條 save() 觸發更新
+                for related_name, model, *_ in CHILD_GROUPS:
+                    child_rows = children[related_name].get(index)
+                    if child_rows:
+                        model.objects.bulk_create([model(staff=staff_profile, **child) for child in child_rows])
+        except Exception as row_error:
+            errors.append(f"第{row_num}行處理錯誤: {str(row_error)}")
+            continue
+
+        existing_ids.add(staff_id)
+        imported_count += 1
+
+    result = {
+        'imported_count': imported_count,
+        'errors': errors,
+        'total_rows_processed': len(frame),
+    }
+    if mode == 'upsert':
+        updated_count, unchanged_count = _apply_updates(updates, cleaned, children, child_strategy, errors)
+        result.update({
+            'imported_count': imported_count + updated_count,
+            'inserted_count': imported_count,
+            'updated_count': updated_count,
+            'unchanged_count': unchanged_count,
+        })
+    return result
+
+
+# ---- 更新模式（upsert） ----
+
+def _is_same(current, incoming):
+    """比較現有值與檔案值；None 與空字串視為相同"""
+    if current in (None, '') and incoming in (None, ''):
+        return True
+    return current == incoming
+
+
+def _child_signature(values, fields):
+    return tuple('' if values.get(field) is None else values[field] for field in fields)
+
+
+class _UpdatePlan:
+    """單個已存在員工的更新計劃：員工變更欄位及子記錄的刪除、新增、更新"""
+
+    def __init__(self, row_num, staff):
+        self.row_num = row_num
+        self.staff = staff
+        self.fields = set()
+        self.deletes = {}   # model -> [pk]
+        self.creates = {}   # model -> [instance]
+        self.updates = {}   # model -> [(instance, fields)]
+
+    @property
+    def changed(self):
+        return bool(self.fields or self.deletes or self.creates or self.updates)
+
+
+def _plan_children(plan, model, related_name, fields, existing, incoming, child_strategy):
+    """
+    規劃一組子記錄的變更，返回變更後的子記錄（用於重新計算學歷標記）
+    replace：內容（不計次序）相同則不變，否則全部刪除後重建
+    merge：按 CHILD_MERGE_KEYS 配對，配對到的只更新有變化的欄位，其餘新增
+    """
+    field_names = list(fields)
+    if related_name == 'education_backgrounds':
+        field_names += list(EDUCATION_FLAG_COLUMNS)
+
+    if child_strategy == 'replace':
+        current = Counter(_child_signature(vars(child), field_names) for child in existing)
+        if current == Counter(_child_signature(child, field_names) for child in incoming):
+            return existing
+        plan.deletes.setdefault(model, []).extend(child.pk for child in existing)
+        created = [model(staff_id=plan.staff.pk, **child) for child in incoming]
+        plan.creates.setdefault(model, []).extend(created)
+        return created
+
+    merge_keys = CHILD_MERGE_KEYS[related_name]
+    by_key = {}
+    for child in existing:
+        by_key.setdefault(_child_signature(vars(child), merge_keys), child)
+    result = list(existing)
+    for values in incoming:
+        match = by_key.pop(_child_signature(values, merge_keys), None)
+        if match is None:
+            created = model(staff_id=plan.staff.pk, **values)
+            plan.creates.setdefault(model, []).append(created)
+            result.append(created)
+            continue
+        changed = [field for field in field_names if not _is_same(getattr(match, field), values[field])]
+        for field in changed:
+            setattr(match, field, values[field])
+        if changed:
+            plan.updates.setdefault(model, []).append((match, changed))
+    return result
+
+
+def _plan_update(row_num, index, values, staff, context):
+    """比較檔案值與現有值，返回 _UpdatePlan"""
+    plan = _UpdatePlan(row_num, staff)
+    for field in context['profile_fields']:
+        if not _is_same(getattr(staff, field), values[field]):
+            setattr(staff, field, values[field])
+            plan.fields.add(field)
+
+    education = None
+    for related_name, model, prefix, count, fields, date_fields in context['child_groups']:
+        result = _plan_children(
+            plan, model, related_name, fields,
+            context['existing_children'][related_name].get(staff.pk, []),
+            context['children'][related_name].get(index, []),
+            context['child_strategy'],
+        )
+        if related_name == 'education_backgrounds':
+            education = result
+
+    # 學歷標記：檔案明確設定的優先，其次按更新後的學歷記錄計算，兩者都沒有則保持不變
+    for column in EDUCATION_FLAG_COLUMNS:
+        if context['explicit_flags'][column][index]:
+            flag = values[column]
+        elif education is not None:
+            flag = any(getattr(child, column) for child in education)
+        else:
+            continue
+        if getattr(staff, column) != flag:
+            setattr(staff, column, flag)
+            plan.fields.add(column)
+
+    # bulk_update 不經過 StaffProfile.save()，在此補上 save() 中的衍生欄位
+    if plan.fields & {'name_chinese', 'name_foreign', 'staff_name'}:
+        name_chinese = staff.name_chinese
+        staff.clean_staff_name()
+        if staff.name_chinese != name_chinese:
+            plan.fields.add('name_chinese')
+    if plan.fields & StaffProfile.DUPLICATE_SOURCE_FIELDS:
+        apply_duplicate_keys(staff)
+        plan.fields |= {'id_number_normalized', 'name_normalized'}
+    if plan.fields & SENIORITY_SOURCE_FIELDS:
+        staff.school_seniority_description = staff.get_school_seniority_description()
+        plan.fields.add('school_seniority_description')
+    return plan
+
+
+def _bulk_update_grouped(model, items):
+    """按變更欄位分組 bulk_update，每組只寫入變更的欄位"""
+    groups = {}
+    for instance, fields in items:
+        groups.setdefault(frozenset(fields), []).append(instance)
+    for fields, instances in groups.items():
+        model.objects.bulk_update(instances, sorted(fields), batch_size=500)
+
+
+def _write_plans(plans):
+    """寫入一批更新計劃：員工及每種子記錄各按欄位分組 bulk_update，刪除及新增各一次"""
+    _bulk_update_grouped(StaffProfile, [(plan.staff, plan.fields) for plan in plans if plan.fields])
+    for _, model, *_ in CHILD_GROUPS:
+        deletes = [pk for plan in plans for pk in plan.deletes.get(model, ())]
+        if deletes:
+            model.objects.filter(pk__in=deletes).delete()
+        creates = [instance for plan in plans for instance in plan.creates.get(model, ())]
+        if creates:
+            model.objects.bulk_create(creates, batch_size=500)
+        _bulk_update_grouped(model, [item for plan in plans for item in plan.updates.get(model, ())])
+
+
+def _apply_updates(updates, frame, children, child_strategy, errors):
+    """
+    更新已存在的員工：現有資料一次查詢載入，逐行比較後只寫入有變化的欄位
+    - 只比較檔案中存在的欄位；檔案中沒有某組子記錄的欄位時，該組子記錄保持不變
+    - 全部更新在一個事務中寫入；失敗時逐行重試，找出出錯的行
+    返回 (更新數, 無變化數)
+    """
+    if not updates:
+        return 0, 0
+
+    columns = set(frame.columns)
+    child_groups = [
+        group for group in CHILD_GROUPS
+        if any(re.match(rf'{group[2]}_\d+_', column) for column in columns)
+    ]
+    staff_by_id = StaffProfile.objects.in_bulk([values['staff_id'] for _, _, values in updates], field_name='staff_id')
+    staff_pks = [staff.pk for staff in staff_by_id.values()]
+    existing_children = {}
+    for related_name, model, *_ in child_groups:
+        grouped = {}
+        for child in model.objects.filter(staff_id__in=staff_pks).order_by('pk'):
+            grouped.setdefault(child.staff_id, []).append(child)
+        existing_children[related_name] = grouped
+
+    context = {
+        'profile_fields': [field for field in PROFILE_UPDATE_COLUMNS if field in columns],
+        'child_groups': child_groups,
+        'children': children,
+        'existing_children': existing_children,
+        'explicit_flags': explicit_education_flags(frame),
+        'child_strategy': child_strategy,
+    }
+    plans = [
+        _plan_update(row_num, index, values, staff_by_id[values['staff_id']], context)
+        for row_num, index, values in updates
+    ]
+    changed = [plan for plan in plans if plan.changed]
+    mark_documents('staff', [plan.staff.pk for plan in changed])
+
+    try:
+        with transaction.atomic():
+            _write_plans(changed)
+        return len(changed), len(plans) - len(changed)
+    except Exception as batch_error:
+        logger.warning(f"批量更新失敗，改為逐行更新: {batch_error}")
+
+    updated_count = 0
+    for plan in changed:
+        # 已回滾的 bulk_create 可能已為實例設定主鍵，重試前清除
+        for instances in plan.creates.values():
+            for instance in instances:
+                instance.pk = None
+        try:
+            with transaction.atomic():
+                _write_plans([plan])
+            updated_count += 1
+        except Exception as row_error:
+            errors.append(f"第{plan.row_num}行處理錯誤: {str(row_error)}")
+    return updated_count, len(plans) - len(changed)
+
+
+# ---- 驗證模式（不寫入資料庫） ----
+
+ISSUE_ERROR = 'error'
+ISSUE_WARNING = 'warning'
+ISSUE_LEVEL_LABELS = {
+    ISSUE_ERROR: '錯誤（該行不會匯入）',
+    ISSUE_WARNING: '警告（該值將被忽略）',
+}
+
+# 錯誤報告的欄位：(鍵, 標題)
+REPORT_COLUMNS = (
+    ('row', '行號'),
+    ('staff_id', '員工編號'),
+    ('column', '欄位'),
+    ('value', '內容'),
+    ('level', '類型'),
+    ('message', '說明'),
+)
+
+# 數值欄位 max_digits=10, decimal_places=2
+DECIMAL_LIMIT = Decimal('1e8')
+
+
+class _IssueCollector:
+    """收集驗證問題；只對不合格的行逐行建立記錄"""
+
+    def __init__(self, frame, staff_ids):
+        self.frame = frame
+        self.staff_ids = staff_ids.to_numpy()
+        self.issues = []
+
+    def add(self, mask, column, level, message):
+        # mask 可以只覆蓋部分行（如只檢查有子記錄的行），按行索引對齊
+        positions = np.flatnonzero(mask.reindex(self.frame.index, fill_value=False).to_numpy())
+        if not len(positions):
+            return
+        values = _column(self.frame, column).to_numpy()
+        for position in positions:
+            self.issues.append({
+                'row': int(position) + 2,  # 第 1 行為標題
+                'staff_id': self.staff_ids[position],
+                'column': column,
+                'value': values[position],
+                'level': level,
+                'message': message(position) if callable(message) else message,
+            })
+
+
+def _check_strings(collector, model, cleaned, columns):
+    """欄位長度超過資料庫上限（MySQL 會拒絕寫入）"""
+    for field_name, column in columns:
+        max_length = model._meta.get_field(field_name).max_length
+        if max_length is None or column not in cleaned.columns:
+            continue
+        too_long = cleaned[column].str.len() > max_length
+        collector.add(too_long, column, ISSUE_ERROR, f"超過長度上限 {max_length} 字")
+
+
+def _check_dates(collector, cleaned, column, parsed):
+    if column in cleaned.columns:
+        invalid = (cleaned[column] != '') & parsed.isna()
+        collector.add(invalid, column, ISSUE_WARNING, "日期格式無法識別，將留空")
+
+
+def validate_frame(frame, cleaned, profiles, existing_ids, dates):
+    """
+    驗證資料，返回問題列表（按行號排序）
+    frame 為原始資料（報告中顯示原值），cleaned 為 clean_table 的結果，profiles 為 prepare_frame 的結果
+    員工編號的唯一性以集合運算一次檢查：與系統中現有編號比對，及檢查檔案內重複
+    """
+    staff_ids = profiles['staff_id']
+    collector = _IssueCollector(frame, staff_ids)
+
+    # 必填欄位
+    for column in ('staff_id', 'staff_name'):
+        collector.add(profiles[column] == '', column, ISSUE_ERROR, "必填欄位為空")
+
+    # 唯一性：系統中已存在，或檔案內重複（以第一次出現的完整行為準）
+    complete = (staff_ids != '') & (profiles['staff_name'] != '')
+    collector.add(complete & staff_ids.isin(existing_ids), 'staff_id', ISSUE_ERROR, "員工編號已存在於系統中")
+    repeated = complete & staff_ids.where(complete).duplicated()
+    first_rows = {
+        staff_id: position + 2 for position, staff_id in enumerate(staff_ids.where(complete & ~repeated))
+        if isinstance(staff_id, str)
+    } if repeated.any() else {}
+    collector.add(
+        repeated, 'staff_id', ISSUE_ERROR,
+        lambda position: f"員工編號在檔案中重複（首次出現於第{first_rows[collector.staff_ids[position]]}行）",
+    )
+
+    _check_strings(collector, StaffProfile, cleaned, [
+        (column, column) for column in ('staff_id', 'staff_name') + PROFILE_STRING_COLUMNS
+    ])
+    for column in PROFILE_DATE_COLUMNS:
+        _check_dates(collector, cleaned, column, profiles[column])
+    for column in PROFILE_DECIMAL_COLUMNS:
+        if column not in cleaned.columns:
+            continue
+        present = cleaned[column] != ''
+        parsed = profiles[column]
+        collector.add(present & parsed.isna(), column, ISSUE_WARNING, "無法識別為數值，將留空")
+        out_of_range = parsed.map(lambda value: value is not None and abs(value) >= DECIMAL_LIMIT)
+        collector.add(out_of_range.astype(bool), column, ISSUE_ERROR, "數值超出範圍（最多 8 位整數及 2 位小數）")
+    for column in PROFILE_BOOLEAN_COLUMNS:
+        if column not in cleaned.columns:
+            continue
+        values = cleaned[column].str.lower()
+        unknown = (values != '') & ~values.isin(TRUE_VALUES + FALSE_VALUES)
+        collector.add(unknown, column, ISSUE_WARNING, "無法識別為是/否，按「否」處理")
+
+    for related_name, model, prefix, count, fields, date_fields in CHILD_GROUPS:
+        for i in range(1, count + 1):
+            columns = {field: f'{prefix}_{i}_{suffix}' for field, suffix in fields.items()}
+            key_column = columns[CHILD_KEY_FIELDS[related_name]]
+            if key_column not in cleaned.columns:
+                continue
+            present = cleaned[key_column] != ''
+            _check_strings(collector, model, cleaned[present], [
+                (field, column) for field, column in columns.items() if field not in date_fields and field != 'age'
+            ])
+            for field in date_fields:
+                parsed = to_date(_column(cleaned, columns[field]), dates.column(columns[field]))
+                _check_dates(collector, cleaned[present], columns[field], parsed[present])
+                if related_name == 'professional_qualifications':
+                    collector.add(
+                        present & parsed.isna(), key_column, ISSUE_WARNING, "缺少有效的頒授日期，該專業資格不會匯入"
+                    )
+            if 'age' in columns and columns['age'] in cleaned.columns:
+                ages = cleaned[columns['age']]
+                invalid = present & (ages != '') & ~ages.str.fullmatch(r'\d+')
+                collector.add(invalid, columns['age'], ISSUE_WARNING, "年齡不是整數，將記為 0")
+
+    collector.issues.sort(key=lambda issue: issue['row'])
+    return collector.issues
+
+
+def validate_file(file_path, mode='insert'):
+    """
+    驗證員工資料檔案 (CSV / XLSX)，只解析及驗證，不寫入資料庫
+    mode='upsert' 時已存在的員工編號不算錯誤（將被更新）
+    返回 {'total_rows', 'valid_rows', 'error_rows', 'warning_count', 'issues', 'date_formats'}
+    """
+    frame = read_table(file_path)
+    cleaned = clean_table(frame)
+    dates = DateParser()
+    profiles, _ = prepare_frame(cleaned, dates, include_children=False)
+    if mode not in IMPORT_MODES:
+        raise ImportFileError(f"不支援的匯入模式: {mode}")
+    existing_ids = set(StaffProfile.objects.values_list('staff_id', flat=True)) if mode == 'insert' else set()
+    issues = validate_frame(frame, cleaned, profiles, existing_ids, dates)
+
+    error_rows = {issue['row'] for issue in issues if issue['level'] == ISSUE_ERROR}
+    return {
+        'total_rows': len(frame),
+        'valid_rows': len(frame) - len(error_rows),
+        'error_rows': len(error_rows),
+        'warning_count': sum(issue['level'] == ISSUE_WARNING for issue in issues),
+        'issues': issues,
+        'date_formats': dates.detected_formats(),
+    }
+
+
+def issues_to_csv(issues):
+    """將問題列表轉為 CSV 錯誤報告（UTF-8 BOM，Excel 可直接開啟）"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([title for _, title in REPORT_COLUMNS])
+    for issue in issues:
+        row = dict(issue, level=ISSUE_LEVEL_LABELS[issue['level']])
+        writer.writerow([row[key] for key, _ in REPORT_COLUMNS])
+    return '\ufeff' + output.getvalue()
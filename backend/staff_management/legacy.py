@@ -0,0 +1,252 @@
+"""
+舊版員工資料表遷移到 StaffProfile
+舊版的 apps.users（User 及 EducationHistory、SocialActivity、EmploymentRecord 等子表）
+及 staff（Staff）與 staff_management 重複描述同一位員工，兩者均不在 INSTALLED_APPS 中，
+只有早期部署的資料庫仍保留其資料表。
+
+- 直接以 SQL 讀取舊資料表（不需載入舊模型），按員工編號合併到 StaffProfile；
+  員工編號已存在的員工不會被覆蓋，重複執行只會補上缺少的員工
+- users_user 的登入賬號轉為 Django 內建用戶，並關聯到對應的 StaffProfile
+- 遷移完成後可刪除舊資料表及其遷移記錄
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from .importer import MASTER_KEYWORDS, PHD_KEYWORDS
+from .models import (
+    StaffProfile, FamilyMember, EducationBackground, WorkExperience, ProfessionalQualification,
+    AssociationPosition, EmploymentRecord,
+)
+from .search import deferred_indexing
+
+LEGACY_USER_TABLE = 'users_user'
+LEGACY_STAFF_TABLE = 'staff_staff'
+LEGACY_APPS = ('users', 'staff')
+
+# 兩個舊版模型與 StaffProfile 同名同義的欄位
+SHARED_PROFILE_FIELDS = (
+    'staff_id', 'staff_name', 'employment_type', 'employment_type_remark', 'dsej_registration_status',
+    'dsej_registration_rank', 'entry_date', 'departure_date', 'retirement_date', 'position_grade',
+    'teaching_staff_salary_grade', 'basic_salary_points', 'adjusted_salary_points', 'provident_fund_type', 'remark',
+    'name_chinese', 'name_foreign', 'gender', 'marital_status', 'birth_place', 'birth_date', 'origin',
+    'id_type', 'id_number', 'id_expiry_date', 'bank_account_number', 'social_security_number', 'home_phone',
+    'mobile_phone', 'address', 'email', 'alumni_class', 'alumni_class_year', 'alumni_class_duration',
+    'teacher_certificate_number', 'teaching_staff_rank', 'teaching_staff_rank_effective_date',
+    'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relationship',
+)
+
+# 舊版子表：資料表 -> (新模型, {舊欄位: 新欄位})，均以 user_id 指向 users_user
+LEGACY_CHILD_TABLES = {
+    'users_familymember': (FamilyMember, {
+        'name': 'name', 'relationship': 'relationship', 'birth_date': 'birth_date', 'age': 'age',
+        'education_level': 'education_level', 'institution': 'institution', 'alumni_class': 'alumni_class',
+    }),
+    'users_educationhistory': (EducationBackground, {
+        'years': 'study_period', 'school': 'school_name', 'education_level': 'education_level',
+        'major': 'degree_name', 'certificate_date': 'certificate_date', 'is_overseas_study': 'is_overseas_study',
+    }),
+    'users_workexperience': (WorkExperience, {
+        'years': 'employment_period', 'company': 'organization', 'position': 'position', 'salary': 'salary',
+    }),
+    'users_professionalqualification': (ProfessionalQualification, {
+        'name': 'qualification_name', 'issuing_organization': 'issuing_organization', 'issue_date': 'issue_date',
+    }),
+    'users_socialactivity': (AssociationPosition, {
+        'organization_name': 'association_name', 'position': 'position',
+        'start_year': 'start_year', 'end_year': 'end_year',
+    }),
+    'users_employmentrecord': (EmploymentRecord, {
+        'start_date': 'entry_date', 'end_date': 'departure_date', 'employment_type': 'employment_type',
+        'count_for_seniority': 'is_valid_for_seniority', 'remark': 'remark',
+    }),
+}
+
+# 刪除時的順序：先刪除引用 users_user 的資料表
+LEGACY_TABLES = (
+    *LEGACY_CHILD_TABLES, 'users_user_groups', 'users_user_user_permissions', 'users_onboardingapplication',
+    LEGACY_USER_TABLE, LEGACY_STAFF_TABLE,
+)
+
+# 新模型中不可為空的欄位，舊資料為空時使用的值
+REQUIRED_DEFAULTS = {
+    EducationBackground: {'study_period': '', 'school_name': '', 'education_level': ''},
+    WorkExperience: {'employment_period': '', 'organization': '', 'position': ''},
+    ProfessionalQualification: {'qualification_name': '', 'issuing_organization': ''},
+    AssociationPosition: {'association_name': '', 'position': '', 'start_year': ''},
+    FamilyMember: {'name': '', 'relationship': ''},
+}
+# 新模型中不可為空且沒有合理預設值的欄位，舊資料為空時跳過該行
+REQUIRED_FIELDS = {
+    ProfessionalQualification: ('issue_date',),
+    EmploymentRecord: ('entry_date',),
+}
+
+LOGIN_FIELDS = (
+    'username', 'password', 'first_name', 'last_name', 'email', 'is_active', 'is_staff', 'is_superuser',
+    'date_joined', 'last_login',
+)
+
+
+def legacy_tables():
+    """返回資料庫中仍存在的舊版資料表"""
+    present = set(connection.introspection.table_names())
+    return [table for table in LEGACY_TABLES if table in present]
+
+
+def _fetch_rows(table):
+    """以字典返回整個舊資料表（舊資料表只有一所學校的員工，不需分頁）"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT * FROM {connection.ops.quote_name(table)}')
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _profile_values(row):
+    values = {name: row[name] for name in SHARED_PROFILE_FIELDS if name in row}
+    # 新模型的文字欄位允許 NULL，統一以 None 表示空值
+    values = {name: (None if value == '' else value) for name, value in values.items()}
+    if 'is_active' in row:
+        values['is_active'] = bool(row['is_active'])
+    if not values.get('position_grade'):
+        values['position_grade'] = row.get('position') or row.get('teaching_grade') or None
+    if values.get('alumni_class_year') is not None:
+        values['alumni_class_year'] = str(values['alumni_class_year'])
+    return values
+
+
+def _has_keyword(text, keywords):
+    text = (text or '').lower()
+    return any(keyword in text for keyword in keywords)
+
+
+def _child_values(model, row, columns):
+    values = {new: row.get(old) for old, new in columns.items() if old in row}
+    for name in REQUIRED_FIELDS.get(model, ()):
+        if values.get(name) is None:
+            return None
+    for name, default in REQUIRED_DEFAULTS.get(model, {}).items():
+        if values.get(name) is None:
+            values[name] = default
+    if model is WorkExperience and values.get('salary') is not None:
+        values['salary'] = str(values['salary'])
+    if model is AssociationPosition:
+        values['start_year'] = str(values['start_year'])
+        if values.get('end_year') is not None:
+            values['end_year'] = str(values['end_year'])
+    if model is EducationBackground:
+        text = f"{values.get('degree_name') or ''} {values.get('education_level') or ''}"
+        values['is_phd'] = _has_keyword(text, PHD_KEYWORDS)
+        values['is_master'] = _has_keyword(text, MASTER_KEYWORDS)
+        values['is_overseas_study'] = bool(values.get('is_overseas_study'))
+    if model is EmploymentRecord:
+        values['is_valid_for_seniority'] = bool(values.get('is_valid_for_seniority'))
+        # 舊版的部門及職位沒有對應欄位，併入備註
+        extra = ' / '.join(str(row[column]) for column in ('department', 'position') if row.get(column))
+        if extra:
+            values['remark'] = f"{values['remark']}\n{extra}" if values.get('remark') else extra
+    return values
+
+
+class LegacyStaffMigration:
+    """
+    將舊版資料表的員工合併到 StaffProfile
+    run(dry_run=True) 只統計，不寫入
+    返回 {'tables', 'created_count', 'existing_count', 'accounts_created', 'accounts_linked', 'children', 'skipped'}
+    """
+
+    def __init__(self):
+        self.tables = legacy_tables()
+
+    def run(self, dry_run=False):
+        result = {
+            'tables': list(self.tables), 'created_count': 0, 'existing_count': 0,
+            'accounts_created': 0, 'accounts_linked': 0, 'children': {}, 'skipped': [],
+        }
+        users = _fetch_rows(LEGACY_USER_TABLE) if LEGACY_USER_TABLE in self.tables else []
+        staff = _fetch_rows(LEGACY_STAFF_TABLE) if LEGACY_STAFF_TABLE in self.tables else []
+
+        children = {}
+        for table, (model, columns) in LEGACY_CHILD_TABLES.items():
+            if table not in self.tables:
+                continue
+            by_user = children.setdefault(model, {})
+            for row in _fetch_rows(table):
+                values = _child_values(model, row, columns)
+                if values is None:
+                    result['skipped'].append(f"{table} #{row.get('id')}: 缺少{model._meta.verbose_name}的必填欄位")
+                    continue
+                by_user.setdefault(row['user_id'], []).append(values)
+
+        # users_user 優先；staff_staff 只補充 users_user 中沒有的員工編號
+        sources = [(row, row['id']) for row in users]
+        seen = {row['staff_id'] for row in users}
+        sources += [(row, None) for row in staff if row['staff_id'] not in seen]
+
+        existing_ids = set(StaffProfile.objects.values_list('staff_id', flat=True))
+        pending = []
+        for row, user_id in sources:
+            if not row.get('staff_id') or row['staff_id'] in existing_ids:
+                result['existing_count'] += 1
+                continue
+            existing_ids.add(row['staff_id'])
+            pending.append((row, user_id))
+
+        result['created_count'] = len(pending)
+        for model, by_user in children.items():
+            result['children'][model._meta.verbose_name] = sum(
+                len(by_user.get(user_id, [])) for _, user_id in pending if user_id is not None
+            )
+        if dry_run:
+            return result
+
+        with transaction.atomic(), deferred_indexing():
+            for row, user_id in pending:
+                self._create_profile(row, user_id, children, result)
+        return result
+
+    def _create_profile(self, row, user_id, children, result):
+        child_rows = {model: by_user.get(user_id, []) for model, by_user in children.items()} if user_id else {}
+        educations = child_rows.get(EducationBackground, [])
+
+        profile = StaffProfile(**_profile_values(row))
+        profile.is_phd = any(values['is_phd'] for values in educations)
+        profile.is_master = any(values['is_master'] for values in educations)
+        profile.is_overseas_study = any(values['is_overseas_study'] for values in educations)
+        if user_id is not None:
+            profile.user_account = self._login_account(row, result)
+        profile.save()
+
+        # 學歷標記已在上面計算，子記錄以 bulk_create 寫入，不逐條 save()
+        for model, rows in child_rows.items():
+            if rows:
+                model.objects.bulk_create([model(staff=profile, **values) for values in rows])
+        if not profile.entry_date and child_rows.get(EmploymentRecord):
+            # 沒有入職日期時年資按在職記錄計算，需在在職記錄寫入後重新計算
+            profile.calculate_school_seniority()
+
+    def _login_account(self, row, result):
+        """按用戶名建立或取回 Django 用戶；該用戶已關聯其他員工時不關聯"""
+        User = get_user_model()
+        manager = User._default_manager
+        account = manager.filter(username=row['username']).first()
+        if account is None:
+            account = manager.create(**{name: row[name] for name in LOGIN_FIELDS if name in row})
+            result['accounts_created'] += 1
+            return account
+        if StaffProfile.objects.filter(user_account=account).exists():
+            result['skipped'].append(f"{LEGACY_USER_TABLE} {row['username']}: 用戶已關聯其他員工，未關聯賬號")
+            return None
+        result['accounts_linked'] += 1
+        return account
+
+
+def drop_legacy_tables():
+    """刪除舊版資料表及其遷移記錄，返回已刪除的資料表"""
+    tables = legacy_tables()
+    with transaction.atomic(), connection.constraint_checks_disabled(), connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f'DROP TABLE {connection.ops.quote_name(table)}')
+        if 'django_migrations' in connection.introspection.table_names():
+            placeholders = ', '.join(['%s'] * len(LEGACY_APPS))
+            cursor.execute(f'DELETE FROM django_migrations WHERE app IN ({placeholders})', LEGACY_APPS)
+    return tables
@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from staff_management.backups import default_backup_path
+from staff_management.models import SystemLog, UserAgent
+
+# 歸檔文件的欄位
+ARCHIVE_FIELDS = (
+    'id', 'timestamp', 'user_id', 'user__username', 'action', 'resource_type', 'resource_id',
+    'description', 'ip_address', 'user_agent__value',
+)
+
+class Command(BaseCommand):
+    """
+    將超過保留期的系統日誌移到按月份的壓縮歸檔文件
+    使用方法：
+    python manage.py archive_system_logs                # 保留最近 LOG_RETENTION_DAYS 天（預設 365 天）
+    python manage.py archive_system_logs --days 180
+    python manage.py archive_system_logs --dry-run      # 只顯示各月份需要歸檔的行數
+    python manage.py archive_system_logs --prune-user-agents  # 歸檔後清理不再被引用的瀏覽器信息
+    歸檔文件：<BACKUP_PATH>/system_logs/systemlog_<年-月>.ndjson.gz，每行一條日誌 (JSON)
+    每批先寫入並同步歸檔文件，再在交易中刪除該批日誌；刪除前中斷時，下次執行會重複歸檔該批
+    清理瀏覽器信息時，UserAgent.lookup 可能剛把同一行返回給正在寫入日誌的請求，因此只清理
+    命令開始前已存在的行，並建議在低流量時段執行
+    """
+    help = '按保留期將系統日誌分批歸檔為按月份的壓縮文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=int(os.environ.get('LOG_RETENTION_DAYS', 365)),
+            help='保留最近多少天的日誌（預設為環境變數 LOG_RETENTION_DAYS 或 365）',
+        )
+        parser.add_argument('--path', type=str, help='歸檔目錄（預設為備份目錄下的 system_logs/）')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='每批歸檔及刪除的行數')
+        parser.add_argument('--dry-run', action='store_true', help='只統計，不寫入及刪除')
+        parser.add_argument(
+            '--prune-user-agents', action='store_true',
+            help='歸檔後刪除不再被任何日誌引用、且在命令開始前已存在的瀏覽器信息',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days 必須大於 0')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = SystemLog.objects.filter(timestamp__lt=cutoff)
+        archive_dir = options['path'] or os.path.join(default_backup_path(), 'system_logs')
+
+        self.stdout.write(f"歸檔 {cutoff:%Y-%m-%d %H:%M} 之前的系統日誌到：{archive_dir}")
+        if options['dry_run']:
+            months = (
+                expired.annotate(month=TruncMonth('timestamp')).values('month')
+                .annotate(count=Count('id')).order_by('month')
+            )
+            total = 0
+            for row in months:
+                self.stdout.write(f"📅 {row['month']:%Y-%m}：{row['count']} 筆")
+                total += row['count']
+            self.stdout.write(self.style.SUCCESS(f"共 {total} 筆需要歸檔（未寫入）"))
+            return
+
+        # 命令開始後新建的瀏覽器信息可能屬於尚未寫入的日誌，不清理
+        user_agent_cutoff = UserAgent.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        os.makedirs(archive_dir, exist_ok=True)
+        archived = defaultdict(int)
+        while True:
+            # 每批刪除後，下一批仍從最舊的主鍵開始
+            rows = list(expired.order_by('pk').values_list(*ARCHIVE_FIELDS)[:options['chunk_size']])
+            if not rows:
+                break
+
+            by_month = defaultdict(list)
+            for row in rows:
+                record = dict(zip(ARCHIVE_FIELDS, row))
+                record['username'] = record.pop('user__username')
+                record['user_agent'] = record.pop('user_agent__value')
+                record['timestamp'] = record['timestamp'].isoformat()
+                by_month[row[1].strftime('%Y-%m')].append(json.dumps(record, ensure_ascii=False))
+            for month, lines in by_month.items():
+                self.append_archive(os.path.join(archive_dir, f'systemlog_{month}.ndjson.gz'), lines)
+                archived[month] += len(lines)
+
+            with transaction.atomic():
+                SystemLog.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+        for month in sorted(archived):
+            self.stdout.write(f"📦 systemlog_{month}.ndjson.gz：+{archived[month]} 筆")
+        self.stdout.write(self.style.SUCCESS(f"✅ 歸檔完成！共 {sum(archived.values())} 筆"))
+
+        if options['prune_user_agents']:
+            orphans, _ = UserAgent.objects.filter(pk__lte=user_agent_cutoff, logs__isnull=True).delete()
+            self.stdout.write(self.style.SUCCESS(f"🧹 清理瀏覽器信息 {orphans} 個"))
+
+    def append_archive(self, path, lines):
+        """以新的 gzip 成員追加到歸檔文件，gzip 及 zcat 會依次讀取所有成員"""
+        with open(path, 'ab') as archive_file:
+            with gzip.GzipFile(fileobj=archive_file, mode='wb') as target:
+                target.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
@@ -0,0 +1,86 @@
+import io
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from staff_management.management.commands.benchmark_staff_list import BENCHMARK_PREFIX, create_benchmark_staff
+from staff_management.models import StaffProfile
+from staff_management.renderers import FastJSONParser, FastJSONRenderer, orjson
+from staff_management.serializers import PrebuiltFieldsMixin, StaffProfileSerializer
+from staff_management.views import LEGACY_STAFF_PREFETCH
+
+
+class Command(BaseCommand):
+    """
+    REST API JSON 輸出基準測試
+    在交易中建立測試員工（結束時回滾），以員工列表的完整嵌套數據比較：
+    - 序列化：DRF 原有的 Serializer.to_representation 與 PrebuiltFieldsMixin
+    - 輸出：DRF JSONRenderer 與 FastJSONRenderer
+    - 解析：DRF JSONParser 與 FastJSONParser
+    使用方法：python manage.py benchmark_json --staff 1000 --children 2
+    """
+    help = 'REST API JSON 序列化、輸出及解析基準測試'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=1000, help='測試員工數（預設 1000）')
+        parser.add_argument('--children', type=int, default=2, help='每位員工每種子記錄的行數（預設 2）')
+        parser.add_argument('--repeat', type=int, default=3, help='每項重複次數，取最快一次（預設 3）')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            create_benchmark_staff(options['staff'], options['children'])
+            profiles = list(
+                StaffProfile.objects.filter(staff_id__startswith=BENCHMARK_PREFIX)
+                .prefetch_related(*LEGACY_STAFF_PREFETCH).order_by('staff_id')
+            )
+            transaction.set_rollback(True)
+
+        repeat = options['repeat']
+
+        def measure(func):
+            return min(timeit.repeat(func, number=1, repeat=repeat))
+
+        def serialize():
+            return StaffProfileSerializer(profiles, many=True).data
+
+        prebuilt_serialize = measure(serialize)
+        data = serialize()
+        # 暫時換回 DRF 原有的實現作對比
+        prebuilt_to_representation = PrebuiltFieldsMixin.to_representation
+        PrebuiltFieldsMixin.to_representation = serializers.Serializer.to_representation
+        try:
+            default_serialize = measure(serialize)
+            if serialize() != data:
+                self.stdout.write(self.style.ERROR('兩種序列化的結果不一致'))
+                return
+        finally:
+            PrebuiltFieldsMixin.to_representation = prebuilt_to_representation
+
+        default_body = JSONRenderer().render(data)
+        fast_body = FastJSONRenderer().render(data)
+        if default_body != fast_body:
+            self.stdout.write(self.style.ERROR('兩種 JSON 輸出不一致'))
+            return
+        default_render = measure(lambda: JSONRenderer().render(data))
+        fast_render = measure(lambda: FastJSONRenderer().render(data))
+        default_parse = measure(lambda: JSONParser().parse(io.BytesIO(default_body)))
+        fast_parse = measure(lambda: FastJSONParser().parse(io.BytesIO(default_body)))
+
+        self.stdout.write(self.style.SUCCESS('=== REST API JSON 基準測試 ==='))
+        self.stdout.write(
+            f"員工 {options['staff']} 位，每種子記錄 {options['children']} 行，"
+            f"JSON {len(default_body) / 1024 / 1024:.1f} MB，orjson {'已安裝' if orjson else '未安裝（使用標準庫）'}"
+        )
+        for label, default, fast in (
+            ('序列化', default_serialize, prebuilt_serialize),
+            ('JSON 輸出', default_render, fast_render),
+            ('JSON 解析', default_parse, fast_parse),
+        ):
+            self.stdout.write(f'{label}: 原實現 {default * 1000:8.1f} ms，優化 {fast * 1000:8.1f} ms，{default / fast:5.1f}x')
+        total_default = default_serialize + default_render
+        total_fast = prebuilt_serialize + fast_render
+        self.stdout.write(self.style.SUCCESS(f'列表響應（序列化 + 輸出）加速: {total_default / total_fast:.1f}x'))
@@ -0,0 +1,92 @@
+import re
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from staff_management.sanitizer import DANGEROUS_PATTERNS, sanitize_payload
+
+
+def legacy_sanitize_input(value):
+    """原實現：每個字串先轉小寫，再逐一以未編譯的特徵執行 re.search"""
+    if not isinstance(value, str):
+        return value
+    patterns = [f"({pattern})" for pattern in DANGEROUS_PATTERNS]
+    for pattern in patterns:
+        if re.search(pattern, value.lower()):
+            raise ValueError("輸入包含不安全的內容")
+    return value.strip()
+
+
+def legacy_sanitize_payload(value):
+    if isinstance(value, dict):
+        return {key: legacy_sanitize_payload(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [legacy_sanitize_payload(item) for item in value]
+    return legacy_sanitize_input(value)
+
+
+class Command(BaseCommand):
+    """
+    輸入消毒微基準測試
+    以典型的入職申請載荷比較原有逐個特徵檢查與預編譯單一正則表達式的耗時
+    使用方法：python manage.py benchmark_sanitizer --number 2000
+    """
+    help = '輸入消毒微基準測試'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000, help='每輪執行次數（預設 2000）')
+        parser.add_argument('--rows', type=int, default=3, help='每種子記錄的行數（預設 3）')
+
+    def handle(self, *args, **options):
+        number, rows = options['number'], options['rows']
+        payload = self._payload(rows)
+
+        # 兩種實現的結果必須一致
+        cleaned, errors = sanitize_payload(payload)
+        if errors or cleaned != legacy_sanitize_payload(payload):
+            self.stdout.write(self.style.ERROR('兩種實現的結果不一致'))
+            return
+
+        legacy = min(timeit.repeat(lambda: legacy_sanitize_payload(payload), number=number, repeat=5))
+        compiled = min(timeit.repeat(lambda: sanitize_payload(payload), number=number, repeat=5))
+
+        self.stdout.write(self.style.SUCCESS('=== 輸入消毒微基準測試 ==='))
+        self.stdout.write(f'載荷: {self._count_strings(payload)} 個字串欄位，每輪 {number} 次')
+        self.stdout.write(f'原實現:       {legacy / number * 1e6:8.1f} µs/載荷')
+        self.stdout.write(f'預編譯單次遍歷: {compiled / number * 1e6:8.1f} µs/載荷')
+        self.stdout.write(self.style.SUCCESS(f'加速: {legacy / compiled:.1f}x'))
+
+    def _payload(self, rows):
+        return {
+            'name_chinese': '陳大文 ', 'name_foreign': 'Chan Tai Man', 'gender': 'M',
+            'birth_place': '澳門', 'origin': '廣東', 'id_type': '澳門居民身份證', 'id_number': '1234567(8)',
+            'bank_account_number': '9012345678', 'social_security_number': '12345678',
+            'home_phone': '28000000', 'mobile_phone': '66000000', 'address': '澳門某街某號某大廈10樓A座',
+            'email': 'chan@example.com', 'emergency_contact_name': '陳太', 'emergency_contact_phone': '66000001',
+            'emergency_contact_relationship': '配偶',
+            'family_members': [
+                {'name': f'家屬{i}', 'relationship': '子女', 'education_level': '小學', 'institution': '培正中學'}
+                for i in range(rows)
+            ],
+            'educations': [
+                {'study_period': '2008-2012', 'school_name': f'學校{i}', 'education_level': '學士', 'degree_name': '教育學'}
+                for i in range(rows)
+            ],
+            'work_experiences': [
+                {'employment_period': '2012-2016', 'organization': f'機構{i}', 'position': '教師', 'salary': '20000'}
+                for i in range(rows)
+            ],
+            'professional_qualifications': [
+                {'qualification_name': f'資格{i}', 'issuing_organization': '教青局'} for i in range(rows)
+            ],
+            'association_positions': [
+                {'association_name': f'社團{i}', 'position': '會員', 'start_year': '2015'} for i in range(rows)
+            ],
+        }
+
+    def _count_strings(self, value):
+        if isinstance(value, dict):
+            return sum(self._count_strings(item) for item in value.values())
+        if isinstance(value, list):
+            return sum(self._count_strings(item) for item in value)
+        return 1 if isinstance(value, str) else 0
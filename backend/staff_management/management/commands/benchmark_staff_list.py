@@ -0,0 +1,127 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from staff_management.models import (
+    StaffProfile, FamilyMember, EducationBackground, WorkExperience, ProfessionalQualification,
+    AssociationPosition, EmploymentRecord,
+)
+from staff_management.serializers import LegacyStaffSerializer
+from staff_management.views import LEGACY_STAFF_PREFETCH, LegacyStaffListView
+
+BENCHMARK_PREFIX = 'BENCH'
+
+
+def create_benchmark_staff(staff_count, children):
+    """建立測試員工及每種子記錄 children 行（員工編號以 BENCHMARK_PREFIX 開頭），需在會回滾的交易中調用"""
+    today = date.today()
+    profiles = StaffProfile.objects.bulk_create([
+        StaffProfile(
+            staff_id=f'{BENCHMARK_PREFIX}{number:05d}', staff_name=f'測試員工{number}',
+            name_chinese=f'測試員工{number}', name_foreign=f'Test Staff {number}',
+            entry_date=today - timedelta(days=30 * (number % 240)),
+            school_seniority_description=f'{number % 20}年{number % 12}個月',
+            employment_type='full_time_teacher', position_grade='中學教師', gender='M' if number % 2 else 'F',
+            birth_date=date(1970 + number % 30, number % 12 + 1, number % 28 + 1), birth_place='澳門',
+            id_type='澳門居民身份證', id_number=f'{number:07d}(1)', mobile_phone=f'66{number:06d}',
+            email=f'staff{number}@example.com', address='澳門某街某號某大廈10樓A座',
+            basic_salary_points=Decimal('450.00'), remark='基準測試數據',
+        )
+        for number in range(staff_count)
+    ], batch_size=1000)
+    rows = range(children)
+    builders = (
+        (FamilyMember, lambda staff, i: {'name': f'家屬{i}', 'relationship': '子女'}),
+        (EducationBackground, lambda staff, i: {
+            'study_period': '2008-2012', 'school_name': f'學校{i}', 'education_level': '學士',
+        }),
+        (WorkExperience, lambda staff, i: {'employment_period': '2012-2016', 'organization': f'機構{i}', 'position': '教師'}),
+        (ProfessionalQualification, lambda staff, i: {
+            'qualification_name': f'資格{i}', 'issuing_organization': '教青局', 'issue_date': today,
+        }),
+        (AssociationPosition, lambda staff, i: {'association_name': f'社團{i}', 'position': '會員', 'start_year': '2015'}),
+        (EmploymentRecord, lambda staff, i: {'entry_date': staff.entry_date - timedelta(days=365 * (i + 1))}),
+    )
+    for model, build in builders:
+        model.objects.bulk_create(
+            [model(staff=staff, **build(staff, i)) for staff in profiles for i in rows], batch_size=1000,
+        )
+
+
+class NaiveLegacyStaffSerializer(LegacyStaffSerializer):
+    """原實現：不預先載入子記錄，每行以在職記錄查詢計算年資"""
+    calculated_seniority = serializers.SerializerMethodField()
+
+    def get_calculated_seniority(self, obj):
+        total_days = 0
+        for record in obj.employment_records.filter(is_valid_for_seniority=True):
+            total_days += ((record.departure_date or date.today()) - record.entry_date).days
+        total_days = max(total_days, 0)
+        return f"{total_days // 365}年{total_days % 365 // 30}月"
+
+
+class Command(BaseCommand):
+    """
+    員工列表 API 基準測試
+    在交易中建立測試員工（結束時回滾，不保留數據），比較：
+    - 原實現：不分頁、不 prefetch、逐行查詢年資
+    - 兼容讀取層 /api/users/emp/list/：prefetch 子記錄、分頁、使用已保存的年資
+    使用方法：python manage.py benchmark_staff_list --staff 3000 --children 2
+    """
+    help = '員工列表 API 基準測試（查詢數及耗時）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=3000, help='測試員工數（預設 3000）')
+        parser.add_argument('--children', type=int, default=2, help='每位員工每種子記錄的行數（預設 2）')
+        parser.add_argument('--page-size', type=int, default=50, help='分頁大小（預設 50）')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            create_benchmark_staff(options['staff'], options['children'])
+            admin = get_user_model().objects.create(username=f'{BENCHMARK_PREFIX}_admin', is_staff=True)
+            queryset = StaffProfile.objects.filter(staff_id__startswith=BENCHMARK_PREFIX).order_by('staff_id')
+
+            naive, naive_queries = self._measure(
+                lambda: NaiveLegacyStaffSerializer(queryset, many=True).data
+            )
+            full, full_queries = self._measure(
+                lambda: LegacyStaffSerializer(
+                    queryset.select_related('user_account').prefetch_related(*LEGACY_STAFF_PREFETCH), many=True
+                ).data
+            )
+            page, page_queries = self._measure(lambda: self._request_page(admin, options['page_size']))
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('=== 員工列表基準測試 ==='))
+        self.stdout.write(f"員工 {options['staff']} 位，每種子記錄 {options['children']} 行")
+        self.stdout.write(f'原實現（全部）:       {naive:8.2f} 秒，{naive_queries:6d} 次查詢')
+        self.stdout.write(f'prefetch（全部）:     {full:8.2f} 秒，{full_queries:6d} 次查詢')
+        self.stdout.write(f"兼容 API（每頁 {options['page_size']}）: {page:8.3f} 秒，{page_queries:6d} 次查詢")
+        self.stdout.write(self.style.SUCCESS(f'全部序列化加速: {naive / full:.1f}x'))
+
+    def _measure(self, func):
+        """返回 (耗時, 查詢數)；以 execute_wrapper 計數，不受 DEBUG 查詢日誌的長度上限影響"""
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries)
+
+    def _request_page(self, user, page_size):
+        request = APIRequestFactory().get('/api/users/emp/list/', {'page_size': page_size})
+        force_authenticate(request, user=user)
+        response = LegacyStaffListView.as_view()(request)
+        response.render()
+        return response
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from staff_management.management.commands.benchmark_staff_list import BENCHMARK_PREFIX, create_benchmark_staff
+from staff_management.models import StaffProfile
+from staff_management.readers import StaffProfileReader
+from staff_management.serializers import StaffProfileSerializer
+from staff_management.views import LEGACY_STAFF_PREFETCH
+
+
+class Command(BaseCommand):
+    """
+    員工檔案唯讀快速路徑的一致性檢查及基準測試
+    在交易中建立測試員工（結束時回滾），分別以 StaffProfileSerializer（prefetch 子記錄）
+    及 StaffProfileReader 輸出全部員工，先檢查兩者的輸出完全相同，再比較耗時。
+    --existing 時改用資料庫中的現有員工（只讀），用於以真實數據檢查一致性。
+    使用方法：
+    python manage.py benchmark_staff_reader --staff 2000
+    python manage.py benchmark_staff_reader --existing
+    """
+    help = '員工檔案唯讀快速路徑：與序列化器的一致性檢查及基準測試'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=2000, help='測試員工數（預設 2000）')
+        parser.add_argument('--children', type=int, default=2, help='每位員工每種子記錄的行數（預設 2）')
+        parser.add_argument('--repeat', type=int, default=3, help='每項重複次數，取最快一次（預設 3）')
+        parser.add_argument('--existing', action='store_true', help='使用資料庫中的現有員工，不建立測試數據')
+
+    def handle(self, *args, **options):
+        context = {'request': RequestFactory().get('/api/staff/profiles/')}
+        with transaction.atomic():
+            if options['existing']:
+                queryset = StaffProfile.objects.all()
+            else:
+                create_benchmark_staff(options['staff'], options['children'])
+                queryset = StaffProfile.objects.filter(staff_id__startswith=BENCHMARK_PREFIX)
+            queryset = queryset.order_by('staff_id')
+
+            def serializer():
+                return StaffProfileSerializer(
+                    queryset.prefetch_related(*LEGACY_STAFF_PREFETCH), many=True, context=context
+                ).data
+
+            def reader():
+                return StaffProfileReader(context).read(queryset)
+
+            expected, actual = serializer(), reader()
+            self.check_contract(expected, actual)
+            serializer_time = self.measure(serializer, options['repeat'])
+            reader_time = self.measure(reader, options['repeat'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('=== 員工檔案唯讀快速路徑 ==='))
+        self.stdout.write(f'員工 {len(expected)} 位，輸出一致 ✅')
+        self.stdout.write(f'StaffProfileSerializer（prefetch）: {serializer_time * 1000:8.1f} ms')
+        self.stdout.write(f'StaffProfileReader（values）:       {reader_time * 1000:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'加速: {serializer_time / reader_time:.1f}x'))
+
+    def check_contract(self, expected, actual):
+        """兩種實現的輸出必須完全相同（包括欄位順序及類型）"""
+        if len(expected) != len(actual):
+            raise CommandError(f'員工數不一致：序列化器 {len(expected)}，快速路徑 {len(actual)}')
+        for position, (left, right) in enumerate(zip(expected, actual)):
+            if list(left) != list(right):
+                raise CommandError(f'第 {position + 1} 位員工的欄位順序不一致')
+            for name, value in left.items():
+                if value != right[name] or type(value) is not type(right[name]):
+                    raise CommandError(
+                        f"員工 {left.get('staff_id')} 的 {name} 不一致：序列化器 {value!r}，快速路徑 {right[name]!r}"
+                    )
+
+    def measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,63 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from staff_management.backups import default_backup_path
+from staff_management.snapshots import SnapshotError, SnapshotLoader, list_snapshots
+
+class Command(BaseCommand):
+    """
+    將 snapshot_db 匯出的快照載入資料庫
+    使用方法：
+    python manage.py load_snapshot                                  # 載入最近一次快照到空資料庫
+    python manage.py load_snapshot pcms_snapshot_20250101_020000 --replace --workers 8
+    目標資料庫需已執行 migrate。migrate 會自動建立 contenttypes 及權限，
+    因此載入到已遷移的資料庫時需加 --replace，先清空快照中的資料表
+    """
+    help = '以多執行緒批量載入 snapshot_db 匯出的快照'
+
+    def add_arguments(self, parser):
+        parser.add_argument('snapshot', nargs='?', help='快照目錄名稱或路徑（預設為最近一次快照）')
+        parser.add_argument('--path', type=str, help='快照根目錄（預設與 backup_data 相同）')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='資料庫別名')
+        parser.add_argument('--workers', type=int, default=4, help='並行載入的執行緒數（SQLite 固定為 1）')
+        parser.add_argument('--replace', action='store_true', help='載入前清空快照中的資料表')
+        parser.add_argument('--force', action='store_true', help='遷移狀態與快照不一致時仍然載入')
+
+    def handle(self, *args, **options):
+        root = options['path'] or default_backup_path()
+        snapshot = options['snapshot']
+        if snapshot is None:
+            snapshots = list_snapshots(root)
+            if not snapshots:
+                raise CommandError(f"{root} 下沒有可載入的快照")
+            snapshot = snapshots[-1]
+        path = snapshot if os.path.isdir(snapshot) else os.path.join(root, snapshot)
+
+        try:
+            loader = SnapshotLoader(
+                path,
+                using=options['database'],
+                workers=options['workers'],
+                replace=options['replace'],
+                log=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+            only_snapshot, only_database = loader.migration_differences()
+            if only_snapshot or only_database:
+                for app_label, name in only_snapshot[:10]:
+                    self.stdout.write(self.style.WARNING(f"⚠️  快照已套用但資料庫未套用：{app_label}.{name}"))
+                for app_label, name in only_database[:10]:
+                    self.stdout.write(self.style.WARNING(f"⚠️  資料庫已套用但快照未套用：{app_label}.{name}"))
+                if not options['force']:
+                    raise CommandError("遷移狀態與快照不一致，請先 migrate 到相同版本，或使用 --force")
+
+            self.stdout.write(f"開始載入快照：{path}（{loader.workers} 個執行緒）")
+            stats = loader.run()
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ 載入完成！（{stats['seconds']} 秒）\n"
+                f"📄 資料表：{stats['models']} 個，共 {stats['rows']} 筆"
+            )
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from staff_management.legacy import LegacyStaffMigration, drop_legacy_tables, legacy_tables
+
+
+class Command(BaseCommand):
+    """
+    將舊版 apps.users / staff 資料表的員工合併到 StaffProfile
+    使用方法：
+    python manage.py migrate_legacy_staff --dry-run       # 只統計
+    python manage.py migrate_legacy_staff                 # 合併，員工編號已存在的員工不會被覆蓋
+    python manage.py migrate_legacy_staff --drop-tables   # 合併後刪除舊資料表及其遷移記錄
+    """
+    help = '將舊版員工資料表合併到 StaffProfile，可選擇刪除舊資料表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只統計，不寫入')
+        parser.add_argument('--drop-tables', action='store_true', help='合併成功後刪除舊資料表')
+
+    def handle(self, *args, **options):
+        if not legacy_tables():
+            self.stdout.write(self.style.SUCCESS('✅ 沒有舊版員工資料表，無需遷移'))
+            return
+        if options['dry_run'] and options['drop_tables']:
+            raise CommandError('--dry-run 不能與 --drop-tables 同時使用')
+
+        migration = LegacyStaffMigration()
+        self.stdout.write(f"📋 舊版資料表：{', '.join(migration.tables)}")
+        result = migration.run(dry_run=options['dry_run'])
+
+        for message in result['skipped']:
+            self.stdout.write(self.style.WARNING(f'⚠️  {message}'))
+        for name, count in result['children'].items():
+            self.stdout.write(f'📎 {name}：{count} 筆')
+        summary = (
+            f"新增員工 {result['created_count']} 位，已存在 {result['existing_count']} 位，"
+            f"建立賬號 {result['accounts_created']} 個，關聯已有賬號 {result['accounts_linked']} 個"
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{summary}（未寫入）'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'✅ 合併完成！{summary}'))
+
+        if options['drop_tables']:
+            dropped = drop_legacy_tables()
+            self.stdout.write(self.style.SUCCESS(f"🗑️  已刪除舊資料表：{', '.join(dropped)}"))
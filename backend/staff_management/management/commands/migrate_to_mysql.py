@@ -1,92 +1,115 @@
 import os
-import json
-from django.core.management.base import BaseCommand
+import time
+from django.core.management.base import BaseCommand, CommandError
 from django.core.management import call_command
 from django.conf import settings
+from staff_management.db_transfer import DEFAULT_CHUNK_SIZE, TableCopier, TransferError
+
+# 舊版參數值對應的資料庫別名
+DATABASE_ALIASES = {
+    'sqlite': 'sqlite_backup',
+    'mysql': 'default',
+}
 
 
 class Command(BaseCommand):
-    help = '從SQLite遷移數據到MySQL'
+    """
+    將 SQLite 的數據逐表複製到 MySQL
+    使用方法：
+    python manage.py migrate_to_mysql                          # sqlite_backup → default
+    python manage.py migrate_to_mysql --chunk-size 5000
+    中斷後再次執行同一命令即從上次的進度繼續；--restart 放棄進度重新開始
+    """
+    help = '從SQLite遷移數據到MySQL（分段複製，可中斷後繼續）'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--source',
             default='sqlite',
-            help='源數據庫類型 (sqlite 或 mysql)',
+            help='源數據庫別名 (sqlite 即 sqlite_backup)',
         )
         parser.add_argument(
             '--target',
             default='mysql',
-            help='目標數據庫類型 (sqlite 或 mysql)',
+            help='目標數據庫別名 (mysql 即 default)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='每次讀取及寫入的行數',
+        )
+        parser.add_argument(
+            '--state-file',
+            default=os.path.join(settings.BASE_DIR, 'migrate_to_mysql.state.json'),
+            help='進度文件，用於中斷後繼續',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='刪除進度文件，重新開始複製',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='目標資料表已有數據時仍然清空並複製',
         )
         parser.add_argument(
-            '--backup-file',
-            default='sqlite_backup.json',
-            help='備份文件名稱',
+            '--skip-verify',
+            action='store_true',
+            help='複製後不比較行數及校驗和',
         )
 
     def handle(self, *args, **options):
-        backup_file = options['backup_file']
-        
+        source = DATABASE_ALIASES.get(options['source'], options['source'])
+        target = DATABASE_ALIASES.get(options['target'], options['target'])
+        for alias in (source, target):
+            if alias not in settings.DATABASES:
+                raise CommandError(f'未配置的數據庫：{alias}')
+
         self.stdout.write(
-            self.style.SUCCESS(f'🔄 開始數據庫遷移：{options["source"]} → {options["target"]}')
+            self.style.SUCCESS(f'🔄 開始數據庫遷移：{source} → {target}')
         )
+        start = time.monotonic()
+
+        # 第一步：在目標數據庫建立表結構
+        self.stdout.write('🏗️  在目標數據庫執行遷移...')
+        call_command('migrate', database=target, interactive=False, verbosity=0)
+
+        if options['restart'] and os.path.exists(options['state_file']):
+            os.unlink(options['state_file'])
 
         try:
-            # 第一步：從SQLite導出數據
-            if options['source'] == 'sqlite':
-                self.stdout.write('📤 從SQLite導出數據...')
-                # 設置環境變量使用SQLite
-                os.environ['DB_ENGINE'] = 'sqlite'
-                
-                # 導出數據（排除敏感數據）
-                call_command(
-                    'dumpdata',
-                    '--natural-foreign',
-                    '--natural-primary',
-                    '-e', 'contenttypes',
-                    '-e', 'auth.Permission',
-                    '--output', backup_file
-                )
-                self.stdout.write(self.style.SUCCESS(f'✅ 數據已導出到 {backup_file}'))
+            copier = TableCopier(
+                source,
+                target,
+                options['state_file'],
+                chunk_size=options['chunk_size'],
+                force=options['force'],
+                log=self.stdout.write,
+            )
 
-            # 第二步：切換到MySQL並導入數據
-            if options['target'] == 'mysql':
-                self.stdout.write('📥 切換到MySQL並導入數據...')
-                # 設置環境變量使用MySQL
-                os.environ['DB_ENGINE'] = 'mysql'
-                
-                # 重新加載設置（如果需要）
-                from django.conf import settings
-                settings._setup()
-                
-                # 運行遷移創建表結構
-                call_command('migrate', '--run-syncdb')
-                
-                # 導入數據
-                if os.path.exists(backup_file):
-                    call_command('loaddata', backup_file)
-                    self.stdout.write(self.style.SUCCESS('✅ 數據已導入到MySQL'))
-                else:
-                    self.stdout.write(self.style.ERROR(f'❌ 備份文件 {backup_file} 不存在'))
-                    return
+            # 第二步：逐表複製數據
+            self.stdout.write('📤 逐表複製數據...')
+            copied = copier.run()
+            self.stdout.write(self.style.SUCCESS(f'✅ 已複製 {sum(copied.values())} 筆數據'))
 
             # 第三步：驗證數據完整性
-            self.stdout.write('🔍 驗證數據完整性...')
-            from staff_management.models import StaffProfile
-            from django.contrib.auth.models import User
-            
-            staff_count = StaffProfile.objects.count()
-            user_count = User.objects.count()
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'✅ 遷移完成！員工記錄: {staff_count}, 用戶記錄: {user_count}'
-                )
-            )
+            if not options['skip_verify']:
+                self.stdout.write('🔍 驗證數據完整性...')
+                mismatches = copier.verify()
+                if mismatches:
+                    for label, (source_count, source_sum), (target_count, target_sum) in mismatches:
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f'❌ {label}：來源 {source_count} 筆 ({source_sum})，目標 {target_count} 筆 ({target_sum})'
+                            )
+                        )
+                    raise CommandError(f'{len(mismatches)} 個資料表不一致，進度文件已保留，可使用 --restart 重新複製')
+        except TransferError as e:
+            raise CommandError(str(e))
 
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'❌ 遷移失敗: {str(e)}')
-            )
-            raise
\ No newline at end of file
+        copier.state.remove()
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ 遷移完成！（{time.monotonic() - start:.1f} 秒）')
+        )
@@ -0,0 +1,40 @@
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from staff_management.models import SearchIndexEntry
+from staff_management.search import SEARCH_DOCUMENTS, reindex_documents
+
+class Command(BaseCommand):
+    """
+    重建全文搜尋索引
+    使用方法：
+    python manage.py rebuild_search_index                  # 重建員工檔案及入職申請的索引
+    python manage.py rebuild_search_index --type staff
+    python manage.py rebuild_search_index --if-empty       # 索引為空時才建立（部署時使用）
+    平時由保存信號增量更新，只有在繞過模型保存的批量寫入之後才需要重建
+    """
+    help = '重建員工檔案及入職申請的全文搜尋索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=sorted(SEARCH_DOCUMENTS), help='只重建指定類型的索引')
+        parser.add_argument('--if-empty', action='store_true', help='該類型已有索引時跳過')
+
+    def handle(self, *args, **options):
+        document_types = [options['type']] if options['type'] else sorted(SEARCH_DOCUMENTS)
+        for document_type in document_types:
+            if options['if_empty'] and SearchIndexEntry.objects.filter(document_type=document_type).exists():
+                self.stdout.write(f"⏭️  {document_type}：已有索引，跳過")
+                continue
+
+            start = time.monotonic()
+            model = apps.get_model(SEARCH_DOCUMENTS[document_type]['model'])
+            document_ids = list(model._default_manager.values_list('pk', flat=True))
+            # 先清除全部，包括已刪除文件遺留的索引
+            SearchIndexEntry.objects.filter(document_type=document_type).delete()
+            reindex_documents(document_type, document_ids)
+            entries = SearchIndexEntry.objects.filter(document_type=document_type).count()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ {document_type}：{len(document_ids)} 個文件，{entries} 個索引行（{time.monotonic() - start:.1f} 秒）"
+                )
+            )
@@ -0,0 +1,117 @@
+import csv
+import os
+import shutil
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from staff_management.backups import (
+    EXPORT_FIELDS, BackupError, collect_rows, default_backup_path, file_sha256, list_backups, load_manifest,
+    verify_backup,
+)
+from staff_management.importer import import_file, validate_file
+from staff_management.models import StaffProfile
+
+class Command(BaseCommand):
+    """
+    從 backup_data 建立的備份還原員工數據和照片
+    使用方法：
+    python manage.py restore_backup                               # 還原最近一次備份
+    python manage.py restore_backup pcms_backup_20250101_020000   # 還原指定備份
+    python manage.py restore_backup --dry-run                     # 只校驗及驗證，不寫入
+    員工資料以員工編號為鍵新增或更新（子記錄不受影響），備份中沒有的員工不會被刪除
+    """
+    help = '從備份還原員工數據和照片'
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup', nargs='?', help='備份目錄名稱（預設為最近一次備份）')
+        parser.add_argument('--path', type=str, help='備份根目錄（預設與 backup_data 相同）')
+        parser.add_argument('--dry-run', action='store_true', help='只校驗備份文件及驗證資料，不寫入')
+        parser.add_argument('--skip-photos', action='store_true', help='不還原照片')
+        parser.add_argument('--skip-verify', action='store_true', help='不校驗備份文件的 SHA-256')
+
+    def handle(self, *args, **options):
+        root = options['path'] or default_backup_path()
+        backups = list_backups(root)
+        if not backups:
+            raise CommandError(f"{root} 下沒有可還原的備份")
+        name = options['backup'] or backups[-1]
+        if name not in backups:
+            raise CommandError(f"找不到備份 {name}，可用的備份：{', '.join(backups[-5:])}")
+
+        try:
+            manifest = load_manifest(root, name)
+            self.stdout.write(f"還原備份：{name}（{manifest['type']}，{manifest['created_at']}）")
+
+            if not options['skip_verify']:
+                problems = verify_backup(root, manifest)
+                if problems:
+                    for problem in problems[:20]:
+                        self.stdout.write(self.style.ERROR(f"❌ {problem}"))
+                    raise CommandError(f"備份校驗失敗：{len(problems)} 個問題")
+                self.stdout.write("🔒 備份文件校驗通過")
+
+            rows = collect_rows(root, manifest)
+        except BackupError as e:
+            raise CommandError(str(e))
+
+        self.restore_rows(rows, options['dry_run'])
+        if not options['skip_photos']:
+            self.restore_photos(root, manifest['photos'], options['dry_run'])
+
+    def restore_rows(self, rows, dry_run):
+        """重組為匯入格式的 CSV，以 upsert 模式寫入"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', encoding='utf-8-sig', delete=False) as tmp_file:
+            writer = csv.writer(tmp_file)
+            writer.writerow(EXPORT_FIELDS)
+            writer.writerows(rows[staff_id] for staff_id in sorted(rows))
+            tmp_file_path = tmp_file.name
+
+        try:
+            if dry_run:
+                result = validate_file(tmp_file_path, mode='upsert')
+                self.stdout.write(
+                    f"📄 員工資料：{result['total_rows']} 筆，可還原 {result['valid_rows']} 筆，"
+                    f"錯誤 {result['error_rows']} 筆，警告 {result['warning_count']} 個"
+                )
+                return
+
+            result = import_file(tmp_file_path, mode='upsert')
+            for error in result['errors'][:20]:
+                self.stdout.write(self.style.WARNING(f"⚠️  {error}"))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"📄 員工資料還原完成：新增 {result['inserted_count']} 筆，更新 {result['updated_count']} 筆，"
+                    f"無變化 {result['unchanged_count']} 筆，錯誤 {len(result['errors'])} 筆"
+                )
+            )
+        finally:
+            os.unlink(tmp_file_path)
+
+    def restore_photos(self, root, photos, dry_run):
+        """照片還原至 staff_photos/<員工編號>.<副檔名>；現有照片內容相同時跳過"""
+        current = dict(
+            StaffProfile.objects.filter(staff_id__in=list(photos)).values_list('staff_id', 'profile_picture')
+        )
+        restored = skipped = 0
+        for staff_id, photo in photos.items():
+            if staff_id not in current:
+                continue
+            existing = current[staff_id]
+            if existing:
+                existing_path = os.path.join(settings.MEDIA_ROOT, existing)
+                if os.path.exists(existing_path) and os.path.getsize(existing_path) == photo['size'] \
+                        and file_sha256(existing_path) == photo['sha256']:
+                    skipped += 1
+                    continue
+
+            _, ext = os.path.splitext(photo['object'])
+            relative = f"staff_photos/{staff_id}{ext}"
+            if not dry_run:
+                destination = os.path.join(settings.MEDIA_ROOT, relative)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(root, photo['object']), destination)
+                StaffProfile.objects.filter(staff_id=staff_id).update(profile_picture=relative)
+            restored += 1
+
+        verb = '需要還原' if dry_run else '已還原'
+        self.stdout.write(self.style.SUCCESS(f"📸 照片{verb} {restored} 個，內容相同跳過 {skipped} 個"))
@@ -0,0 +1,80 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# 以下為遷移時 staff_management/duplicates.py 中標準化函數的副本：歷史遷移的結果不應隨之後的代碼修改而改變
+# 常見姓名用字的繁簡對照（繁體 → 簡體），兩個字串逐字對應
+_TRADITIONAL_CHARS = (
+    "陳張黃劉鄭趙吳楊葉許馮鄧盧蘇羅蕭謝韓馬鍾鐘鄺譚區龍賴關歐陸閻孫錢衛蔣韋嚴華湯鄒龐萬顧聶賈費齊賀畢"
+    "鄔樂於時貝計談紀項藍閔強婁顏駱經繆應賁鬱單諸鈕龔偉國榮輝傑軍東寶麗紅鳳嬌雲豔艷靜穎瑩儀詩曉蓮愛"
+    "銘鋒濤鵬飛鳴書賢誠興遠達順勝義禮廣權歡環綺蘭瓊鈺錦雙寧潔彥傳進貴學業億憶恆聰頌賽鴻鶴鐵鋼銀釗鈞"
+    "紹維綠綿緯嶸韻頤顯曄煒燦爾園圓夢樹橋發莊獻禎祿倫創勳協麥萊陽靈韜驊騰鎮滿濱潤澤淵漢灝詠譽謙楓棟"
+    "樺輔軒鈴鏡長穩積節簡綸聖聲藝蘊覺觀貞賓軾錫鎧電靄風飄駿魯鷹齡"
+)
+_SIMPLIFIED_CHARS = (
+    "陈张黄刘郑赵吴杨叶许冯邓卢苏罗萧谢韩马钟钟邝谭区龙赖关欧陆阎孙钱卫蒋韦严华汤邹庞万顾聂贾费齐贺毕"
+    "邬乐于时贝计谈纪项蓝闵强娄颜骆经缪应贲郁单诸钮龚伟国荣辉杰军东宝丽红凤娇云艳艳静颖莹仪诗晓莲爱"
+    "铭锋涛鹏飞鸣书贤诚兴远达顺胜义礼广权欢环绮兰琼钰锦双宁洁彦传进贵学业亿忆恒聪颂赛鸿鹤铁钢银钊钧"
+    "绍维绿绵纬嵘韵颐显晔炜灿尔园圆梦树桥发庄献祯禄伦创勋协麦莱阳灵韬骅腾镇满滨润泽渊汉灏咏誉谦枫栋"
+    "桦辅轩铃镜长稳积节简纶圣声艺蕴觉观贞宾轼锡铠电霭风飘骏鲁鹰龄"
+)
+_NAME_VARIANTS = str.maketrans(_TRADITIONAL_CHARS, _SIMPLIFIED_CHARS)
+
+_ID_NUMBER_STRIP_RE = re.compile(r'[^0-9A-Z]+')
+_NAME_STRIP_RE = re.compile(r'[\W_]+')
+
+
+def _normalize_id_number(value):
+    """標準化證件號碼，空值返回空字串"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKC', str(value)).upper()
+    return _ID_NUMBER_STRIP_RE.sub('', value)
+
+
+def _normalize_name(value):
+    """標準化姓名，空值或只有標點（如 '/'）時返回空字串"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKC', str(value)).casefold()
+    value = _NAME_STRIP_RE.sub('', value)
+    return value.translate(_NAME_VARIANTS)
+
+
+def populate_duplicate_keys(apps, schema_editor):
+    """為現有員工檔案填充重複檢測用的標準化鍵"""
+    StaffProfile = apps.get_model('staff_management', 'StaffProfile')
+    alias = schema_editor.connection.alias
+
+    profiles = []
+    for staff in StaffProfile.objects.using(alias).only('pk', 'id_number', 'name_chinese', 'name_foreign').iterator(chunk_size=500):
+        staff.id_number_normalized = _normalize_id_number(staff.id_number)
+        staff.name_normalized = _normalize_name(staff.name_chinese) or _normalize_name(staff.name_foreign)
+        profiles.append(staff)
+    StaffProfile.objects.using(alias).bulk_update(profiles, ['id_number_normalized', 'name_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0014_staffprofile_contract_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staffprofile',
+            name='id_number_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50, verbose_name='證件號碼(標準化)'),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='name_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150, verbose_name='姓名(標準化)'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['name_normalized', 'birth_date'], name='staff_name_norm_birth_idx'),
+        ),
+        migrations.RunPython(populate_duplicate_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0015_staffprofile_duplicate_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemlog',
+            name='action',
+            field=models.CharField(choices=[('create', '新增 Create'), ('update', '更新 Update'), ('delete', '刪除 Delete'), ('view', '查看 View'), ('export', '匯出 Export'), ('import', '匯入 Import'), ('login', '登入 Login'), ('logout', '登出 Logout'), ('throttle', '限流 Throttle')], max_length=20, verbose_name='操作類型'),
+        ),
+    ]
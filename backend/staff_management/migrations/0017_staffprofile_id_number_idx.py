@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0016_alter_systemlog_action'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['id_number'], name='staff_id_number_idx'),
+        ),
+    ]
@@ -0,0 +1,116 @@
+import hashlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 2000
+
+
+def move_user_agents(apps, schema_editor):
+    """
+    把 SystemLog.user_agent 的文字移到 UserAgent 查找表，每個不同的值只保存一次
+    按主鍵分批讀取 (pk, user_agent)，在內存中對應查找表的主鍵後 bulk_update，
+    不按每個不同的文字執行一次 UPDATE（user_agent 沒有索引，每次都是全表掃描）
+    所有查詢都使用 schema_editor 的數據庫（migrate --database 指定的別名）
+    """
+    SystemLog = apps.get_model('staff_management', 'SystemLog')
+    UserAgent = apps.get_model('staff_management', 'UserAgent')
+    alias = schema_editor.connection.alias
+    ids_by_digest = {}
+    last_pk = 0
+    while True:
+        rows = list(
+            SystemLog.objects.using(alias).filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'user_agent')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        digests = {}
+        values = {}
+        for pk, value in rows:
+            if value:
+                digest = hashlib.sha256(value.encode('utf-8')).hexdigest()
+                digests[pk] = digest
+                values[digest] = value
+
+        missing = [digest for digest in values if digest not in ids_by_digest]
+        if missing:
+            ids_by_digest.update(UserAgent.objects.using(alias).filter(digest__in=missing).values_list('digest', 'pk'))
+            created = [UserAgent(digest=digest, value=values[digest]) for digest in missing if digest not in ids_by_digest]
+            if created:
+                UserAgent.objects.using(alias).bulk_create(created)
+                # MySQL 的 bulk_create 不返回主鍵，按摘要回查
+                ids_by_digest.update(
+                    UserAgent.objects.using(alias).filter(digest__in=[ua.digest for ua in created]).values_list('digest', 'pk')
+                )
+
+        SystemLog.objects.using(alias).bulk_update(
+            [SystemLog(pk=pk, user_agent_ref_id=ids_by_digest[digest]) for pk, digest in digests.items()],
+            ['user_agent_ref'],
+            batch_size=500,
+        )
+
+
+def restore_user_agents(apps, schema_editor):
+    SystemLog = apps.get_model('staff_management', 'SystemLog')
+    UserAgent = apps.get_model('staff_management', 'UserAgent')
+    alias = schema_editor.connection.alias
+    for user_agent in UserAgent.objects.using(alias).iterator():
+        SystemLog.objects.using(alias).filter(user_agent_ref=user_agent).update(user_agent=user_agent.value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0017_staffprofile_id_number_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('value', models.TextField(verbose_name='瀏覽器信息')),
+            ],
+            options={
+                'verbose_name': '瀏覽器信息',
+                'verbose_name_plural': '瀏覽器信息',
+            },
+        ),
+        migrations.AddField(
+            model_name='systemlog',
+            name='user_agent_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='staff_management.useragent'),
+        ),
+        migrations.RunPython(move_user_agents, restore_user_agents),
+        migrations.RemoveField(
+            model_name='systemlog',
+            name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='systemlog',
+            old_name='user_agent_ref',
+            new_name='user_agent',
+        ),
+        migrations.AlterField(
+            model_name='systemlog',
+            name='user_agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='logs', to='staff_management.useragent', verbose_name='瀏覽器信息'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['timestamp'], name='systemlog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['user', 'timestamp'], name='systemlog_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['resource_type', 'resource_id'], name='systemlog_resource_idx'),
+        ),
+    ]
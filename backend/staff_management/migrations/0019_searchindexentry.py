@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0018_systemlog_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('staff', '員工檔案'), ('application', '入職申請')], max_length=12, verbose_name='文件類型')),
+                ('document_id', models.PositiveBigIntegerField(verbose_name='文件編號')),
+                ('source', models.CharField(max_length=60, verbose_name='來源')),
+                ('term', models.CharField(max_length=64, verbose_name='詞項')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='權重')),
+            ],
+            options={
+                'verbose_name': '搜尋索引',
+                'verbose_name_plural': '搜尋索引',
+                'indexes': [
+                    models.Index(fields=['term', 'document_type'], name='search_term_idx'),
+                    models.Index(fields=['document_type', 'document_id', 'source'], name='search_document_idx'),
+                ],
+            },
+        ),
+    ]
@@ -1,8 +1,10 @@
+import hashlib
 from django.db import models
 from django.contrib.auth.models import User # 引入 Django 原生 User
 from datetime import date
 from dateutil.relativedelta import relativedelta # 用於年月計算
 from django.conf import settings # 用於 ForeignKey(User)
+from .duplicates import apply_duplicate_keys
 
 # ==============================================
 # Phase 4: 權限管理和角色系統
@@ -84,6 +86,33 @@ class UserRole(models.Model):
             
         super().save(*args, **kwargs)
 
+class UserAgent(models.Model):
+    """
+    瀏覽器信息 (User-Agent) 查找表
+    同一瀏覽器的日誌共用一行，SystemLog 只保存外鍵，不必每行重複保存數百字元的文字
+    """
+    digest = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    value = models.TextField(verbose_name='瀏覽器信息')
+
+    class Meta:
+        verbose_name = '瀏覽器信息'
+        verbose_name_plural = '瀏覽器信息'
+
+    def __str__(self):
+        return self.value
+
+    @staticmethod
+    def digest_of(value):
+        return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def lookup(cls, value):
+        """返回 value 對應記錄的主鍵（不存在時建立），空值返回 None"""
+        if not value:
+            return None
+        user_agent, _ = cls.objects.get_or_create(digest=cls.digest_of(value), defaults={'value': value})
+        return user_agent.pk
+
 class SystemLog(models.Model):
     """
     系統操作日誌
@@ -98,6 +127,7 @@ class SystemLog(models.Model):
         ('import', '匯入 Import'),
         ('login', '登入 Login'),
         ('logout', '登出 Logout'),
+        ('throttle', '限流 Throttle'),
     ]
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, verbose_name='操作用戶')
@@ -106,17 +136,50 @@ class SystemLog(models.Model):
     resource_id = models.CharField(max_length=100, blank=True, null=True, verbose_name='資源ID')
     description = models.TextField(verbose_name='操作描述')
     ip_address = models.GenericIPAddressField(blank=True, null=True, verbose_name='IP地址')
-    user_agent = models.TextField(blank=True, null=True, verbose_name='瀏覽器信息')
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, blank=True, null=True, related_name='logs', verbose_name='瀏覽器信息')
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name='操作時間')
     
     class Meta:
         verbose_name = '系統日誌'
         verbose_name_plural = '系統日誌'
         ordering = ['-timestamp']
+        indexes = [
+            # 按時間排序及篩選、按用戶查看操作記錄、按資源查看歷史
+            models.Index(fields=['timestamp'], name='systemlog_timestamp_idx'),
+            models.Index(fields=['user', 'timestamp'], name='systemlog_user_time_idx'),
+            models.Index(fields=['resource_type', 'resource_id'], name='systemlog_resource_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username if self.user else 'Anonymous'} - {self.get_action_display()} - {self.resource_type}"
 
+class SearchIndexEntry(models.Model):
+    """
+    全文搜尋的倒排索引（由 staff_management.search 維護，不應直接修改）
+    每個文件的主表及每條子記錄 (source) 各自保存詞項及權重
+    """
+    DOCUMENT_TYPE_CHOICES = [
+        ('staff', '員工檔案'),
+        ('application', '入職申請'),
+    ]
+
+    document_type = models.CharField(max_length=12, choices=DOCUMENT_TYPE_CHOICES, verbose_name='文件類型')
+    document_id = models.PositiveBigIntegerField(verbose_name='文件編號')
+    source = models.CharField(max_length=60, verbose_name='來源')
+    term = models.CharField(max_length=64, verbose_name='詞項')
+    weight = models.PositiveIntegerField(default=1, verbose_name='權重')
+
+    class Meta:
+        verbose_name = '搜尋索引'
+        verbose_name_plural = '搜尋索引'
+        indexes = [
+            models.Index(fields=['term', 'document_type'], name='search_term_idx'),
+            models.Index(fields=['document_type', 'document_id', 'source'], name='search_document_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type}:{self.document_id} {self.term} ({self.weight})"
+
 class StaffProfile(models.Model):
     # 校方資料
     user_account = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='關聯用戶賬號(可選)') # 改為可選
@@ -174,9 +237,21 @@ class StaffProfile(models.Model):
     # Phase 3: 新增員工圖片欄位
     profile_picture = models.ImageField(upload_to='staff_photos/', blank=True, null=True, verbose_name='員工照片')
 
+    # 重複檢測用的標準化鍵，由 save() 自動維護，見 duplicates.py
+    id_number_normalized = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False, verbose_name='證件號碼(標準化)')
+    name_normalized = models.CharField(max_length=150, blank=True, default='', editable=False, verbose_name='姓名(標準化)')
+
+    # 影響標準化鍵的欄位
+    DUPLICATE_SOURCE_FIELDS = frozenset({'id_number', 'name_chinese', 'name_foreign', 'staff_name'})
+
     class Meta:
         verbose_name = '教職員基本資料'
         verbose_name_plural = '教職員基本資料'
+        indexes = [
+            models.Index(fields=['name_normalized', 'birth_date'], name='staff_name_norm_birth_idx'),
+            # 管理後台按證件號碼前綴搜尋
+            models.Index(fields=['id_number'], name='staff_id_number_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name_chinese or self.staff_name} ({self.staff_id})"
@@ -190,16 +265,19 @@ class StaffProfile(models.Model):
         3. 如果 entry_date 為空，嘗試使用 employment_records 中最早的入職日期
         4. 每月自動更新
         """
+        self.school_seniority_description = self.get_school_seniority_description()
+        self.save(update_fields=['school_seniority_description'])
+
+    def get_school_seniority_description(self):
+        """返回在校年資描述（不保存），規則見 calculate_school_seniority"""
         if not self.is_active:
-            self.school_seniority_description = "0年0個月"
-            self.save(update_fields=['school_seniority_description'])
-            return
+            return "0年0個月"
 
         # 確定入職日期：優先使用 StaffProfile.entry_date
         entry_date = self.entry_date
         
         # 如果 entry_date 為空，嘗試從 employment_records 獲取最早入職日期
-        if not entry_date:
+        if not entry_date and self.pk is not None:
             employment_records = self.employment_records.filter(
                 is_valid_for_seniority=True
             ).order_by('entry_date')
@@ -207,28 +285,48 @@ class StaffProfile(models.Model):
             if employment_records.exists():
                 entry_date = employment_records.first().entry_date
         
-        # 如果仍然沒有入職日期，設為0年資
-        if not entry_date:
-            self.school_seniority_description = "0年0個月"
-            self.save(update_fields=['school_seniority_description'])
-            return
-        
-        # 計算從入職日期到今天的年資
-        today = date.today()
-        
-        # 確保入職日期不晚於今天
-        if entry_date > today:
-            self.school_seniority_description = "0年0個月"
-            self.save(update_fields=['school_seniority_description'])
-            return
-        
+        return self.describe_seniority(self.is_active, entry_date)
+
+    @staticmethod
+    def describe_seniority(is_active, entry_date, today=None):
+        """按在職狀態及入職日期返回年資描述"""
+        # 已離職、沒有入職日期，或入職日期晚於今天，設為0年資
+        today = today or date.today()
+        if not is_active or not entry_date or entry_date > today:
+            return "0年0個月"
+
         # 使用 relativedelta 精確計算年月差
         diff = relativedelta(today, entry_date)
-        years = diff.years
-        months = diff.months
-        
-        self.school_seniority_description = f"{years}年{months}個月"
-        self.save(update_fields=['school_seniority_description'])
+        return f"{diff.years}年{diff.months}個月"
+
+    @classmethod
+    def bulk_calculate_school_seniority(cls, queryset):
+        """
+        批量重新計算年資（規則同 calculate_school_seniority）
+        一次讀取員工，一次讀取缺少入職日期者的最早有效在職記錄，只以 bulk_update 寫入有變化的行；
+        不經過 save()，查詢次數與員工人數無關
+        返回 {pk: (原描述, 新描述)}，包括沒有變化的員工
+        """
+        rows = list(queryset.values_list('pk', 'is_active', 'entry_date', 'school_seniority_description'))
+        missing = [pk for pk, is_active, entry_date, _ in rows if is_active and not entry_date]
+        first_entry_dates = {}
+        if missing:
+            first_entry_dates = dict(
+                EmploymentRecord.objects.filter(staff_id__in=missing, is_valid_for_seniority=True)
+                .values('staff_id').annotate(first_entry_date=models.Min('entry_date'))
+                .values_list('staff_id', 'first_entry_date')
+            )
+
+        today = date.today()
+        results, changed = {}, []
+        for pk, is_active, entry_date, old_description in rows:
+            new_description = cls.describe_seniority(is_active, entry_date or first_entry_dates.get(pk), today)
+            results[pk] = (old_description, new_description)
+            if new_description != old_description:
+                changed.append(cls(pk=pk, school_seniority_description=new_description))
+        if changed:
+            cls.objects.bulk_update(changed, ['school_seniority_description'])
+        return results
 
     def update_global_education_flags(self):
         """
@@ -263,6 +361,12 @@ class StaffProfile(models.Model):
     def save(self, *args, **kwargs):
         # 自動修復姓名問題
         self.clean_staff_name()
+
+        # 更新重複檢測鍵；只保存部分欄位時一併寫入
+        apply_duplicate_keys(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.DUPLICATE_SOURCE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'id_number_normalized', 'name_normalized'}
         
         # 記錄是否是新創建的記錄
         is_new = self.pk is None
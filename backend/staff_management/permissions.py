@@ -1,11 +1,14 @@
 # ==============================================
 # Phase 4: 權限管理裝飾器和工具
 # ==============================================
+import logging
 from functools import wraps
 from django.http import JsonResponse
 from django.core.exceptions import PermissionDenied
 from rest_framework.permissions import BasePermission
-from .models import UserRole, SystemLog
+from .models import UserRole, SystemLog, UserAgent
+
+logger = logging.getLogger(__name__)
 
 def get_client_ip(request):
     """獲取客戶端真實IP地址"""
@@ -29,12 +32,37 @@ def log_user_action(user, action, resource_type, resource_id=None, description="
         
         if request:
             log_data['ip_address'] = get_client_ip(request)
-            log_data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
+            log_data['user_agent_id'] = UserAgent.lookup(request.META.get('HTTP_USER_AGENT', ''))
         
         SystemLog.objects.create(**log_data)
     except Exception as e:
         print(f"日誌記錄失敗: {e}")
 
+def log_user_actions(user, action, resource_type, entries, request=None):
+    """
+    批量記錄用戶操作日誌（用於批量操作）
+    entries 為 (resource_id, description) 的序列，以一次 bulk_create 寫入
+    """
+    try:
+        extra = {}
+        if request:
+            extra['ip_address'] = get_client_ip(request)
+            extra['user_agent_id'] = UserAgent.lookup(request.META.get('HTTP_USER_AGENT', ''))
+
+        SystemLog.objects.bulk_create([
+            SystemLog(
+                user=user,
+                action=action,
+                resource_type=resource_type,
+                resource_id=str(resource_id) if resource_id else None,
+                description=description,
+                **extra
+            )
+            for resource_id, description in entries
+        ])
+    except Exception:
+        logger.exception("批量日誌記錄失敗: %s %s", action, resource_type)
+
 def get_user_role(user):
     """獲取用戶角色，如果沒有則返回None"""
     if not user.is_authenticated:
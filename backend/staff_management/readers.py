@@ -0,0 +1,138 @@
+"""
+序列化器的唯讀快速路徑
+按序列化器的欄位定義編譯一次讀取計劃：主表以 values() 只取需要的欄位，每種嵌套子記錄各一次
+values() 查詢，在 Python 中按外鍵分組，直接組成與序列化器輸出相同的字典，
+不必為每行建立模型實例及逐個欄位調用序列化器。
+
+只支援讀取計劃能對應的欄位：模型欄位（含主鍵關聯）、many=True 的嵌套序列化器，
+以及以 method_fields 提供轉換函數的 SerializerMethodField；其他欄位在編譯時即報錯。
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+
+from .models import StaffProfile
+from .serializers import StaffProfileSerializer
+
+
+def _converter(field):
+    """返回欄位的輸出函數（值不為 None 時調用），常見類型以內建函數代替 to_representation"""
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        # values() 取得的已是外鍵的主鍵值
+        return None
+    if isinstance(field, drf_fields.BooleanField):
+        return bool
+    if isinstance(field, drf_fields.IntegerField):
+        return int
+    if isinstance(field, drf_fields.CharField):
+        return str
+    return field.to_representation
+
+
+class ReadPlan:
+    """
+    單個序列化器的讀取計劃
+    method_fields: {欄位名稱: (模型欄位, 轉換函數)}，轉換函數接收欄位值（可能為 None）
+    """
+
+    def __init__(self, serializer, method_fields=None):
+        method_fields = method_fields or {}
+        self.model = serializer.Meta.model
+        opts = self.model._meta
+        self.pk = opts.pk.attname
+        self.ordering = [*(opts.ordering or []), 'pk']
+        columns = {self.pk}
+        # (輸出名稱, 類型, 參數)
+        self.fields = []
+        self.nested = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = opts.get_field(field.source)
+                plan = ReadPlan(field.child)
+                fk = relation.field.attname
+                if fk not in plan.columns:
+                    plan.columns.append(fk)
+                self.nested.append((name, plan, fk))
+                self.fields.append((name, 'nested', None))
+            elif isinstance(field, serializers.SerializerMethodField):
+                if name not in method_fields:
+                    raise ImproperlyConfigured(f'{type(serializer).__name__}.{name} 需要在 method_fields 中提供轉換函數')
+                source, convert = method_fields[name]
+                column = opts.get_field(source).attname
+                columns.add(column)
+                self.fields.append((name, 'method', (column, convert)))
+            elif isinstance(field, (serializers.BaseSerializer, relations.ManyRelatedField)) \
+                    or '.' in field.source or field.source == '*':
+                raise ImproperlyConfigured(f'{type(serializer).__name__}.{name} 不支援唯讀快速路徑')
+            else:
+                column = opts.get_field(field.source).attname
+                columns.add(column)
+                self.fields.append((name, 'value', (column, _converter(field))))
+
+        self.columns = sorted(columns)
+
+    def read(self, queryset):
+        """按查詢集的順序返回輸出字典列表"""
+        return self._render(list(queryset.values(*self.columns)))
+
+    def _render(self, rows):
+        children = {}
+        if self.nested and rows:
+            ids = [row[self.pk] for row in rows]
+            for name, plan, fk in self.nested:
+                child_rows = list(
+                    plan.model._default_manager.filter(**{f'{fk}__in': ids}).order_by(*plan.ordering).values(*plan.columns)
+                )
+                grouped = defaultdict(list)
+                for child_row, output in zip(child_rows, plan._render(child_rows)):
+                    grouped[child_row[fk]].append(output)
+                children[name] = grouped
+
+        result = []
+        for row in rows:
+            output = {}
+            for name, kind, args in self.fields:
+                if kind == 'value':
+                    column, convert = args
+                    value = row[column]
+                    output[name] = value if value is None or convert is None else convert(value)
+                elif kind == 'nested':
+                    output[name] = children[name].get(row[self.pk], []) if children else []
+                else:
+                    column, convert = args
+                    output[name] = convert(row[column])
+            result.append(output)
+        return result
+
+
+class StaffProfileReader:
+    """
+    StaffProfileSerializer 的唯讀快速路徑，輸出與序列化器相同
+    reader = StaffProfileReader(context={'request': request}); data = reader.read(queryset)
+    """
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.storage = StaffProfile._meta.get_field('profile_picture').storage
+        self.plan = ReadPlan(
+            StaffProfileSerializer(context=self.context),
+            {'profile_picture': ('profile_picture', self._picture_url)},
+        )
+
+    def _picture_url(self, name):
+        """與 StaffProfileSerializer.get_profile_picture 相同"""
+        if not name:
+            return None
+        url = self.storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    def read(self, queryset):
+        return self.plan.read(queryset)
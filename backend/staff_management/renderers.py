@@ -0,0 +1,74 @@
+"""
+REST API 的 JSON 輸出及解析
+安裝了 orjson 時以其編碼及解碼（C 實現，嵌套的員工列表快數倍），否則使用 DRF 原有的
+標準庫實現。字串、整數、Decimal、日期時間等的輸出與 DRF 相同（緊湊格式、不轉義中文、
+日期時間及 Decimal 按 DRF 的規則編碼）；浮點數有以下差異：
+- 指數形式的寫法不同（1e20，DRF 為 1e+20），數值相同
+- NaN / Infinity 輸出為 null，DRF 的嚴格模式則拋出 ValueError
+orjson 不能編碼的值（如超過 64 位的整數）交回 DRF 原實現。
+在 settings.REST_FRAMEWORK 的 DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES 中使用。
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # 未安裝時使用標準庫
+    orjson = None
+
+# 日期時間交給 DRF 的編碼器（UTC 以 Z 結尾、精確到毫秒），與標準庫實現的輸出一致
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def json_loads(data):
+    """解碼 JSON（bytes 或 str），格式錯誤時拋出 ValueError"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    以 orjson 輸出的 JSONRenderer
+    需要縮排（瀏覽器 API 頁面或 Accept 中的 indent）、設定為非緊湊或轉義非 ASCII、
+    或 orjson 不能編碼時，交回 DRF 原實現
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not (self.compact and not self.ensure_ascii) \
+                or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # 例如超過 64 位的整數；DRF 也不能編碼的值由其拋出相同的錯誤
+            return super().render(data, accepted_media_type, renderer_context)
+        # 與 DRF 一致：轉義 JavaScript 中不能出現在字串裡的 U+2028 / U+2029
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """以 orjson 解析請求體的 JSONParser；orjson 與 DRF 的嚴格模式一樣拒絕 NaN / Infinity"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read() if stream is not None else b''
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,71 @@
+"""
+輸入內容消毒
+所有危險特徵在模組載入時編譯為單一的不區分大小寫交替式，每個字串只需掃描一次；
+sanitize_payload 以一次遍歷處理整個（可嵌套的）載荷。
+序列化器透過 SanitizedInputMixin 使用，SQLSecurityMixin.sanitize_input 亦委託至此。
+"""
+import logging
+import re
+
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# 潛在的 SQL 注入及腳本注入特徵
+DANGEROUS_PATTERNS = (
+    r"union\s+select", r"drop\s+table", r"delete\s+from",
+    r"insert\s+into", r"update\s+set", r"exec\s*\(",
+    r"script\s*>", r"<\s*script", r"javascript\s*:",
+)
+DANGEROUS_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in DANGEROUS_PATTERNS), re.IGNORECASE)
+
+UNSAFE_INPUT_MESSAGE = "輸入包含不安全的內容"
+
+
+def find_unsafe_content(value):
+    """返回第一個匹配的危險特徵（re.Match），沒有則返回 None"""
+    return DANGEROUS_RE.search(value)
+
+
+def sanitize_payload(data, exempt_fields=()):
+    """
+    一次遍歷整個載荷（dict / list 可嵌套）：去除字串前後空白並檢查不安全內容
+    exempt_fields 中的欄位（如密碼）原樣保留
+    返回 (清理後的載荷, 錯誤字典)，錯誤字典以欄位路徑（如 educations.0.school_name）為鍵
+    """
+    errors = {}
+    return _sanitize(data, '', frozenset(exempt_fields), errors), errors
+
+
+def _sanitize(value, path, exempt_fields, errors):
+    if isinstance(value, str):
+        if DANGEROUS_RE.search(value):
+            errors[path or 'non_field_errors'] = [UNSAFE_INPUT_MESSAGE]
+        return value.strip()
+    if isinstance(value, dict):
+        return {
+            key: item if key in exempt_fields else _sanitize(
+                item, f"{path}.{key}" if path else str(key), exempt_fields, errors
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(item, f"{path}.{index}", exempt_fields, errors) for index, item in enumerate(value)]
+    return value
+
+
+class SanitizedInputMixin:
+    """
+    序列化器混入類
+    在欄位驗證之後、validate() 之前，一次遍歷整個已驗證的載荷（包括嵌套的子記錄），
+    去除字串前後空白並拒絕含不安全內容的輸入
+    """
+    sanitize_exempt_fields = ('password',)
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        cleaned, errors = sanitize_payload(attrs, self.sanitize_exempt_fields)
+        if errors:
+            logger.error(f"檢測到潛在的安全威脅: {', '.join(errors)}")
+            raise serializers.ValidationError(errors)
+        return cleaned
@@ -0,0 +1,282 @@
+"""
+員工檔案及入職申請的全文搜尋
+以倒排索引 (SearchIndexEntry) 代替跨多個資料表的 LIKE '%xx%' 掃描：
+- 中文按字及相鄰兩字 (bigram) 切分；拉丁字母及數字按詞切分，查詢時按前綴匹配
+- 每個文件（員工檔案 / 入職申請）的主表及每條子記錄各為一個來源 (source)，
+  子記錄保存或刪除時只替換該來源的索引行
+- 查詢的每個詞項都必須匹配（AND），按匹配詞項的欄位權重之和排序
+
+模型保存時由信號更新索引；bulk_create / bulk_update 等不觸發信號的批量寫入，
+應在 deferred_indexing() 中執行並以 mark_documents() 登記，或之後執行 rebuild_search_index 命令。
+"""
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+
+MAX_TERM_LENGTH = 64
+REINDEX_BATCH_SIZE = 500
+MAIN_SOURCE = 'main'
+# 之前的詞項匹配到的文件不超過此數時，以 IN 條件縮小下一個詞項的查詢
+MAX_FILTER_IDS = 1000
+
+CJK_CHARS = r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+# 拉丁字母包括葡文等的重音字母
+TOKEN_RE = re.compile(rf'[{CJK_CHARS}]+|[0-9a-z\u00c0-\u024f]+')
+CJK_START_RE = re.compile(rf'[{CJK_CHARS}]')
+
+# 文件類型：主表模型、欄位權重，以及 子記錄模型 -> (指向主表的外鍵, 欄位權重)
+SEARCH_DOCUMENTS = {
+    'staff': {
+        'model': 'staff_management.StaffProfile',
+        'fields': {
+            'staff_id': 10, 'name_chinese': 10, 'name_foreign': 10, 'staff_name': 10,
+            'id_number': 5, 'email': 3, 'position_grade': 2, 'remark': 1,
+        },
+        'children': {
+            'staff_management.EducationBackground': ('staff', {'school_name': 4, 'degree_name': 3, 'education_level': 1}),
+            'staff_management.WorkExperience': ('staff', {'organization': 4, 'position': 2}),
+            'staff_management.AssociationPosition': ('staff', {'association_name': 4, 'position': 2}),
+            'staff_management.ProfessionalQualification': ('staff', {'qualification_name': 3, 'issuing_organization': 2}),
+            'staff_management.FamilyMember': ('staff', {'name': 1, 'institution': 1}),
+        },
+    },
+    'application': {
+        'model': 'application_submission.StaffApplication',
+        'fields': {'name_chinese': 10, 'name_foreign': 10, 'id_number': 5, 'email': 3},
+        'children': {
+            'application_submission.ApplicationEducation': ('application', {'school_name': 4, 'degree_name': 3, 'education_level': 1}),
+            'application_submission.ApplicationWorkExperience': ('application', {'organization': 4, 'position': 2}),
+            'application_submission.ApplicationAssociationPosition': ('application', {'association_name': 4, 'position': 2}),
+            'application_submission.ApplicationProfessionalQualification': ('application', {'qualification_name': 3, 'issuing_organization': 2}),
+            'application_submission.ApplicationFamilyMember': ('application', {'name': 1, 'institution': 1}),
+        },
+    },
+}
+
+_local = threading.local()
+
+
+def normalize(text):
+    """全形轉半形 (NFKC) 並轉小寫"""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def index_terms(text):
+    """切分要建立索引的文字：中文的每個字及相鄰兩字，拉丁字母及數字的每個詞"""
+    terms = []
+    for token in TOKEN_RE.findall(normalize(text)):
+        if CJK_START_RE.match(token):
+            terms.extend(token)
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token[:MAX_TERM_LENGTH])
+    return terms
+
+
+def query_terms(text):
+    """
+    切分查詢文字，返回 [(詞項, 是否前綴匹配)]
+    中文只有一個字時按單字查詢，否則按相鄰兩字查詢；拉丁字母及數字按前綴查詢
+    """
+    terms = []
+    for token in TOKEN_RE.findall(normalize(text)):
+        if CJK_START_RE.match(token):
+            if len(token) == 1:
+                terms.append((token, False))
+            else:
+                terms.extend((token[i:i + 2], False) for i in range(len(token) - 1))
+        else:
+            terms.append((token[:MAX_TERM_LENGTH], True))
+    return list(dict.fromkeys(terms))
+
+
+def _weighted_terms(values, fields):
+    weights = Counter()
+    for field, weight in fields.items():
+        value = values.get(field)
+        if value:
+            for term in index_terms(str(value)):
+                weights[term] += weight
+    return weights
+
+
+def _entries(document_type, document_id, source, weights):
+    from .models import SearchIndexEntry
+    return [
+        SearchIndexEntry(document_type=document_type, document_id=document_id, source=source, term=term, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def _child_source(model, pk):
+    return f'{model._meta.model_name}:{pk}'
+
+
+def reindex_documents(document_type, document_ids):
+    """
+    按資料庫現有內容重建文件的索引；已刪除的文件只清除索引
+    每批文件的主表及每種子記錄各一次查詢
+    """
+    from .models import SearchIndexEntry
+
+    config = SEARCH_DOCUMENTS[document_type]
+    root_model = apps.get_model(config['model'])
+    document_ids = sorted(set(document_ids))
+    for start in range(0, len(document_ids), REINDEX_BATCH_SIZE):
+        batch = document_ids[start:start + REINDEX_BATCH_SIZE]
+        entries = []
+        for values in root_model._default_manager.filter(pk__in=batch).values('pk', *config['fields']):
+            entries += _entries(document_type, values['pk'], MAIN_SOURCE, _weighted_terms(values, config['fields']))
+        for label, (parent_field, fields) in config['children'].items():
+            model = apps.get_model(label)
+            parent_attname = model._meta.get_field(parent_field).attname
+            for values in model._default_manager.filter(**{f'{parent_attname}__in': batch}).values(
+                'pk', parent_attname, *fields
+            ):
+                entries += _entries(
+                    document_type, values[parent_attname], _child_source(model, values['pk']),
+                    _weighted_terms(values, fields),
+                )
+        SearchIndexEntry.objects.filter(document_type=document_type, document_id__in=batch).delete()
+        SearchIndexEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def mark_documents(document_type, document_ids):
+    """登記需要重建索引的文件：在 deferred_indexing() 中延遲到結束時，否則立即重建"""
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending[document_type].update(document_ids)
+    else:
+        reindex_documents(document_type, document_ids)
+
+
+@contextmanager
+def deferred_indexing():
+    """
+    期間的模型變更只登記文件編號，正常離開時一次批量重建索引（用於匯入等批量操作）
+    可以嵌套，由最外層統一重建；期間拋出異常時放棄登記的文件並原樣拋出，
+    不在已損壞的交易中繼續查詢（否則真正的錯誤會被 TransactionManagementError 掩蓋）
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending = defaultdict(set)
+    try:
+        yield
+    except BaseException:
+        _local.pending = None
+        raise
+    pending, _local.pending = _local.pending, None
+    for document_type, document_ids in pending.items():
+        if document_ids:
+            reindex_documents(document_type, document_ids)
+
+
+def _index_source(document_type, document_id, source, values, fields):
+    """在同一交易中替換單一來源的索引行，搜尋不會看到刪除後、寫入前的空檔"""
+    from .models import SearchIndexEntry
+    with transaction.atomic():
+        SearchIndexEntry.objects.filter(document_type=document_type, document_id=document_id, source=source).delete()
+        SearchIndexEntry.objects.bulk_create(_entries(document_type, document_id, source, _weighted_terms(values, fields)))
+
+
+def _skip_update(update_fields, fields):
+    """save(update_fields=...) 沒有更新被索引的欄位時不必重建"""
+    return update_fields is not None and not set(update_fields) & set(fields)
+
+
+def _indexed_values(sender, instance, fields):
+    """被索引欄位的值；以 only() / defer() 載入而缺少其中的欄位時從資料庫讀取"""
+    if instance.get_deferred_fields() & set(fields):
+        return sender._default_manager.filter(pk=instance.pk).values(*fields).first() or {}
+    return instance.__dict__
+
+
+def _root_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    document_type = sender._search_document_type
+    fields = SEARCH_DOCUMENTS[document_type]['fields']
+    if _skip_update(update_fields, fields):
+        return
+    if getattr(_local, 'pending', None) is not None:
+        _local.pending[document_type].add(instance.pk)
+        return
+    _index_source(document_type, instance.pk, MAIN_SOURCE, _indexed_values(sender, instance, fields), fields)
+
+
+def _root_deleted(sender, instance, **kwargs):
+    from .models import SearchIndexEntry
+    SearchIndexEntry.objects.filter(document_type=sender._search_document_type, document_id=instance.pk).delete()
+
+
+def _child_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    document_type, parent_attname, fields = sender._search_child
+    if _skip_update(update_fields, fields):
+        return
+    document_id = getattr(instance, parent_attname)
+    if getattr(_local, 'pending', None) is not None:
+        _local.pending[document_type].add(document_id)
+        return
+    _index_source(
+        document_type, document_id, _child_source(sender, instance.pk), _indexed_values(sender, instance, fields), fields,
+    )
+
+
+def _child_deleted(sender, instance, **kwargs):
+    from .models import SearchIndexEntry
+    document_type, parent_attname, _ = sender._search_child
+    SearchIndexEntry.objects.filter(
+        document_type=document_type,
+        document_id=getattr(instance, parent_attname),
+        source=_child_source(sender, instance.pk),
+    ).delete()
+
+
+def connect_signals():
+    """在 AppConfig.ready() 中調用，為所有被索引的模型連接保存及刪除信號"""
+    for document_type, config in SEARCH_DOCUMENTS.items():
+        root_model = apps.get_model(config['model'])
+        root_model._search_document_type = document_type
+        post_save.connect(_root_saved, sender=root_model, dispatch_uid=f'search_{document_type}_saved')
+        post_delete.connect(_root_deleted, sender=root_model, dispatch_uid=f'search_{document_type}_deleted')
+        for label, (parent_field, fields) in config['children'].items():
+            model = apps.get_model(label)
+            model._search_child = (document_type, model._meta.get_field(parent_field).attname, fields)
+            post_save.connect(_child_saved, sender=model, dispatch_uid=f'search_{label}_saved')
+            post_delete.connect(_child_deleted, sender=model, dispatch_uid=f'search_{label}_deleted')
+
+
+def search(document_type, text, limit=20):
+    """
+    返回 [(文件編號, 分數)]，按分數從高到低排序；limit=None 時返回全部匹配
+    每個查詢詞項一次索引查詢（中文為精確匹配，拉丁字母及數字為前綴匹配），結果取交集
+    """
+    from .models import SearchIndexEntry
+
+    terms = query_terms(text)
+    if not terms:
+        return []
+    scores = None
+    for term, prefix in terms:
+        entries = SearchIndexEntry.objects.filter(document_type=document_type)
+        entries = entries.filter(term__startswith=term) if prefix else entries.filter(term=term)
+        if scores is not None and len(scores) <= MAX_FILTER_IDS:
+            entries = entries.filter(document_id__in=list(scores))
+        matched = dict(entries.values('document_id').annotate(score=Sum('weight')).values_list('document_id', 'score'))
+        scores = matched if scores is None else {
+            document_id: scores[document_id] + score for document_id, score in matched.items() if document_id in scores
+        }
+        if not scores:
+            return []
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return ranked if limit is None else ranked[:limit]
@@ -1,10 +1,37 @@
+from django.db import transaction
+from django.utils.functional import cached_property
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from .sanitizer import SanitizedInputMixin
+from .search import deferred_indexing, mark_documents
 from .models import (
     StaffProfile, FamilyMember, EducationBackground, WorkExperience, # 更正: Education -> EducationBackground
     ProfessionalQualification, AssociationPosition, EmploymentRecord
 )
 
-class FamilyMemberSerializer(serializers.ModelSerializer):
+class PrebuiltFieldsMixin:
+    """
+    預先建立可讀欄位的 (名稱, 取值, 輸出) 列表，逐行輸出時直接使用，
+    省去 DRF 每行重新遍歷欄位字典的開銷；輸出與 Serializer.to_representation 相同
+    """
+
+    @cached_property
+    def _prebuilt_fields(self):
+        return [(field.field_name, field.get_attribute, field.to_representation) for field in self._readable_fields]
+
+    def to_representation(self, instance):
+        ret = {}
+        for field_name, get_attribute, to_representation in self._prebuilt_fields:
+            try:
+                attribute = get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            ret[field_name] = None if check_for_none is None else to_representation(attribute)
+        return ret
+
+class FamilyMemberSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
     # 讓所有字段可選以支持靈活提交
     name = serializers.CharField(required=False, allow_blank=True)
     relationship = serializers.CharField(required=False, allow_blank=True)
@@ -16,7 +43,7 @@ class FamilyMemberSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('staff',)
 
-class EducationBackgroundSerializer(serializers.ModelSerializer): # 更正: EducationSerializer -> EducationBackgroundSerializer
+class EducationBackgroundSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer): # 更正: EducationSerializer -> EducationBackgroundSerializer
     # 明確指定布尔值字段的序列化方式
     is_phd = serializers.BooleanField()
     is_master = serializers.BooleanField()
@@ -28,7 +55,7 @@ class EducationBackgroundSerializer(serializers.ModelSerializer): # 更正: Educ
         fields = ['study_period', 'school_name', 'education_level', 'degree_name', 'certificate_date', 'is_phd', 'is_master', 'is_overseas_study'] 
         read_only_fields = ('staff',)
 
-class WorkExperienceSerializer(serializers.ModelSerializer):
+class WorkExperienceSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
     # 讓工作經驗字段可選
     employment_period = serializers.CharField(required=False, allow_blank=True)
     organization = serializers.CharField(required=False, allow_blank=True)
@@ -39,7 +66,7 @@ class WorkExperienceSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('staff',)
 
-class ProfessionalQualificationSerializer(serializers.ModelSerializer):
+class ProfessionalQualificationSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
     # 讓專業資格字段可選
     qualification_name = serializers.CharField(required=False, allow_blank=True)
     issuing_organization = serializers.CharField(required=False, allow_blank=True)
@@ -50,7 +77,7 @@ class ProfessionalQualificationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('staff',)
 
-class AssociationPositionSerializer(serializers.ModelSerializer):
+class AssociationPositionSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
     # 讓社團職務字段可選
     association_name = serializers.CharField(required=False, allow_blank=True)
     position = serializers.CharField(required=False, allow_blank=True) 
@@ -61,13 +88,13 @@ class AssociationPositionSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('staff',)
 
-class EmploymentRecordSerializer(serializers.ModelSerializer):
+class EmploymentRecordSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = EmploymentRecord
         fields = '__all__'
-        read_only_fields = ('staff_profile',)
+        read_only_fields = ('staff',)
 
-class StaffProfileSerializer(serializers.ModelSerializer):
+class StaffProfileSerializer(PrebuiltFieldsMixin, SanitizedInputMixin, serializers.ModelSerializer):
     family_members = FamilyMemberSerializer(many=True, required=False)
     education_backgrounds = EducationBackgroundSerializer(many=True, required=False)
     work_experiences = WorkExperienceSerializer(many=True, required=False)
@@ -167,86 +194,213 @@ class StaffProfileSerializer(serializers.ModelSerializer):
         # fields = '__all__'
         read_only_fields = ('staff_profile',)
 
+    # 嵌套關聯：(欄位名稱, 模型, 必須有值才建立的欄位)
+    NESTED_RELATIONS = (
+        ('family_members', FamilyMember, 'name'),
+        ('education_backgrounds', EducationBackground, 'school_name'),
+        ('work_experiences', WorkExperience, 'organization'),
+        ('professional_qualifications', ProfessionalQualification, 'qualification_name'),
+        ('association_positions', AssociationPosition, 'association_name'),
+        ('employment_records', EmploymentRecord, None),
+    )
+
+    def _pop_nested_data(self, validated_data, default):
+        return {name: validated_data.pop(name, default) for name, _, _ in self.NESTED_RELATIONS}
+
+    def _build_children(self, staff_profile, model, rows, required_field):
+        """由提交的數據建立未保存的子記錄，只有必要欄位不為空時才建立"""
+        children = []
+        for row in rows:
+            if required_field and not row.get(required_field):
+                continue
+            row = {key: value for key, value in row.items() if key not in ('id', 'staff')}
+            children.append(model(staff=staff_profile, **row))
+        return children
+
+    @staticmethod
+    def _compare_fields(model):
+        return [f.attname for f in model._meta.concrete_fields if not f.primary_key and f.name != 'staff']
+
+    def _sync_children(self, staff_profile, model, related_name, incoming):
+        """
+        以內容比對現有子記錄與提交的子記錄，只寫入有變化的行：
+        完全相同的行保持不動，其餘按順序配對後 bulk_update，多出的行 bulk_create 或刪除。
+        返回 (最終的子記錄列表, 是否有變化)
+        """
+        fields = self._compare_fields(model)
+        existing = list(getattr(staff_profile, related_name).order_by('pk'))
+
+        def key(obj):
+            return tuple(getattr(obj, name) for name in fields)
+
+        unmatched_existing = {}
+        for obj in existing:
+            unmatched_existing.setdefault(key(obj), []).append(obj)
+
+        final, pending = [], []
+        for obj in incoming:
+            same = unmatched_existing.get(key(obj))
+            if same:
+                final.append(same.pop(0))
+            else:
+                pending.append(obj)
+
+        leftovers = sorted((obj for group in unmatched_existing.values() for obj in group), key=lambda obj: obj.pk)
+        to_update = []
+        for target, source in zip(leftovers, pending):
+            for name in fields:
+                setattr(target, name, getattr(source, name))
+            to_update.append(target)
+        to_create = pending[len(to_update):]
+        to_delete = [obj.pk for obj in leftovers[len(to_update):]]
+
+        if to_update:
+            model.objects.bulk_update(to_update, fields)
+        if to_create:
+            model.objects.bulk_create(to_create)
+        if to_delete:
+            # 使用 queryset.delete()，不觸發每行的 delete() 重新計算，統一在最後處理
+            model.objects.filter(pk__in=to_delete).delete()
+
+        return final + to_update + to_create, bool(to_update or to_create or to_delete)
+
+    def _refresh_derived_fields(self, staff_profile, educations, education_changed, employment_changed):
+        """
+        子記錄以批量方式寫入，不會觸發模型 save() 中的重新計算，這裡統一處理一次：
+        - 學歷有變化時，根據最終的學歷記錄更新全局教育標記（學歷全部刪除時均為 False）
+        - 在職記錄有變化時，重新計算在校年資
+        """
+        if education_changed:
+            flags = {
+                'is_master': any(edu.is_master for edu in educations),
+                'is_phd': any(edu.is_phd for edu in educations),
+                'is_overseas_study': any(edu.is_overseas_study for edu in educations),
+            }
+            StaffProfile.objects.filter(pk=staff_profile.pk).update(**flags)
+            for name, value in flags.items():
+                setattr(staff_profile, name, value)
+        if employment_changed:
+            staff_profile.calculate_school_seniority()
+
     def create(self, validated_data):
-        family_members_data = validated_data.pop('family_members', [])
-        education_backgrounds_data = validated_data.pop('education_backgrounds', []) # 更正: education_records -> education_backgrounds
-        work_experiences_data = validated_data.pop('work_experiences', [])
-        professional_qualifications_data = validated_data.pop('professional_qualifications', [])
-        association_positions_data = validated_data.pop('association_positions', [])
-        employment_records_data = validated_data.pop('employment_records', [])
-
-        staff_profile = StaffProfile.objects.create(**validated_data)
-
-        # 只有在數據不為空且有有效內容時才創建關聯記錄
-        for fm_data in family_members_data:
-            if fm_data.get('name'):  # 只有姓名不為空才創建
-                FamilyMember.objects.create(staff=staff_profile, **fm_data)
-        for edu_data in education_backgrounds_data: # 更正: education_records_data -> education_backgrounds_data
-            if edu_data.get('school_name'):  # 只有學校名稱不為空才創建
-                EducationBackground.objects.create(staff=staff_profile, **edu_data) # 更正: Education -> EducationBackground
-        for we_data in work_experiences_data:
-            if we_data.get('organization'):  # 只有機構名稱不為空才創建
-                WorkExperience.objects.create(staff=staff_profile, **we_data)
-        for pq_data in professional_qualifications_data:
-            if pq_data.get('qualification_name'):  # 只有資格名稱不為空才創建
-                ProfessionalQualification.objects.create(staff=staff_profile, **pq_data)
-        for ap_data in association_positions_data:
-            if ap_data.get('association_name'):  # 只有社團名稱不為空才創建
-                AssociationPosition.objects.create(staff=staff_profile, **ap_data)
-        for er_data in employment_records_data:
-            EmploymentRecord.objects.create(staff=staff_profile, **er_data)
-            
+        nested_data = self._pop_nested_data(validated_data, [])
+
+        # 子記錄以 bulk_create 寫入，不觸發保存信號，需要手動登記重建搜尋索引
+        with transaction.atomic(), deferred_indexing():
+            staff_profile = StaffProfile.objects.create(**validated_data)
+
+            # 只有在數據不為空且有有效內容時才創建關聯記錄，每種關聯一次 bulk_create
+            created = {}
+            for name, model, required_field in self.NESTED_RELATIONS:
+                children = self._build_children(staff_profile, model, nested_data[name], required_field)
+                if children:
+                    model.objects.bulk_create(children)
+                created[name] = children
+            mark_documents('staff', [staff_profile.pk])
+
+            self._refresh_derived_fields(
+                staff_profile,
+                created['education_backgrounds'],
+                education_changed=bool(created['education_backgrounds']),
+                employment_changed=bool(created['employment_records']),
+            )
+
         return staff_profile
 
     def update(self, instance, validated_data):
-        # Pop nested data fields
-        family_members_data = validated_data.pop('family_members', None)
-        education_backgrounds_data = validated_data.pop('education_backgrounds', None) # 更正: education_records -> education_backgrounds
-        work_experiences_data = validated_data.pop('work_experiences', None)
-        professional_qualifications_data = validated_data.pop('professional_qualifications', None)
-        association_positions_data = validated_data.pop('association_positions', None)
-        employment_records_data = validated_data.pop('employment_records', None)
-
-        # Update StaffProfile instance
-        instance = super().update(instance, validated_data)
-
-        # Handle updates for nested fields
-        # For simplicity, this example replaces existing related objects.
-        # A more robust implementation might update existing objects or handle deletions.
-
-        if family_members_data is not None:
-            instance.family_members.all().delete()
-            for fm_data in family_members_data:
-                if fm_data.get('name'):
-                    FamilyMember.objects.create(staff=instance, **fm_data)
-        
-        if education_backgrounds_data is not None: # 更正: education_records_data -> education_backgrounds_data
-            instance.education_backgrounds.all().delete() # 更正: education_records -> education_backgrounds
-            for edu_data in education_backgrounds_data: # 更正: education_records_data -> education_backgrounds_data
-                if edu_data.get('school_name'):
-                    EducationBackground.objects.create(staff=instance, **edu_data) # 更正: Education -> EducationBackground
-
-        if work_experiences_data is not None:
-            instance.work_experiences.all().delete()
-            for we_data in work_experiences_data:
-                if we_data.get('organization'):
-                    WorkExperience.objects.create(staff=instance, **we_data)
-
-        if professional_qualifications_data is not None:
-            instance.professional_qualifications.all().delete()
-            for pq_data in professional_qualifications_data:
-                if pq_data.get('qualification_name'):
-                    ProfessionalQualification.objects.create(staff=instance, **pq_data)
-
-        if association_positions_data is not None:
-            instance.association_positions.all().delete()
-            for ap_data in association_positions_data:
-                if ap_data.get('association_name'):
-                    AssociationPosition.objects.create(staff=instance, **ap_data)
-
-        if employment_records_data is not None:
-            instance.employment_records.all().delete()
-            for er_data in employment_records_data:
-                EmploymentRecord.objects.create(staff=instance, **er_data)
-
-        return instance
\ No newline at end of file
+        # 未提交的嵌套欄位為 None，表示保持不變
+        nested_data = self._pop_nested_data(validated_data, None)
+
+        with transaction.atomic(), deferred_indexing():
+            instance = super().update(instance, validated_data)
+
+            final, changed = {}, {}
+            for name, model, required_field in self.NESTED_RELATIONS:
+                if nested_data[name] is None:
+                    final[name], changed[name] = None, False
+                    continue
+                incoming = self._build_children(instance, model, nested_data[name], required_field)
+                final[name], changed[name] = self._sync_children(instance, model, name, incoming)
+            if any(changed.values()):
+                mark_documents('staff', [instance.pk])
+
+            self._refresh_derived_fields(
+                instance,
+                final['education_backgrounds'],
+                education_changed=changed['education_backgrounds'],
+                employment_changed=changed['employment_records'],
+            )
+
+        return instance
+
+
+# 舊版 apps.users 員工 API 的兼容輸出：欄位名稱及結構與舊版 UserDetailSerializer 相同，
+# 數據全部來自 StaffProfile 及其子記錄（見 legacy.py）
+class LegacyFamilyMemberSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = FamilyMember
+        fields = ['name', 'relationship', 'birth_date', 'age', 'education_level', 'institution', 'alumni_class']
+
+class LegacyEducationSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = EducationBackground
+        fields = ['study_period', 'school_name', 'education_level', 'degree_name', 'certificate_date']
+
+class LegacyWorkExperienceSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = WorkExperience
+        fields = ['employment_period', 'organization', 'position', 'salary']
+
+class LegacyQualificationSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ProfessionalQualification
+        fields = ['qualification_name', 'issuing_organization', 'issue_date']
+
+class LegacySocialActivitySerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = AssociationPosition
+        fields = ['association_name', 'position', 'start_year', 'end_year']
+
+class LegacyEmploymentRecordSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    start_date = serializers.DateField(source='entry_date')
+    end_date = serializers.DateField(source='departure_date')
+    count_for_seniority = serializers.BooleanField(source='is_valid_for_seniority')
+
+    class Meta:
+        model = EmploymentRecord
+        fields = ['start_date', 'end_date', 'employment_type', 'count_for_seniority', 'remark']
+
+class LegacyStaffSerializer(PrebuiltFieldsMixin, serializers.ModelSerializer):
+    """唯讀；舊版的 education_history、social_activities 等對應到 StaffProfile 的子記錄"""
+    family_members = LegacyFamilyMemberSerializer(many=True, read_only=True)
+    education_history = LegacyEducationSerializer(source='education_backgrounds', many=True, read_only=True)
+    work_experience = LegacyWorkExperienceSerializer(source='work_experiences', many=True, read_only=True)
+    professional_qualifications = LegacyQualificationSerializer(many=True, read_only=True)
+    social_activities = LegacySocialActivitySerializer(source='association_positions', many=True, read_only=True)
+    employment_records = LegacyEmploymentRecordSerializer(many=True, read_only=True)
+    calculated_seniority = serializers.CharField(source='school_seniority_description', read_only=True)
+    username = serializers.CharField(source='user_account.username', default=None, read_only=True)
+
+    class Meta:
+        model = StaffProfile
+        fields = [
+            'id',
+            # 校方資料
+            'staff_id', 'staff_name', 'employment_type', 'employment_type_remark',
+            'dsej_registration_status', 'dsej_registration_rank', 'entry_date', 'departure_date',
+            'retirement_date', 'position_grade', 'teaching_staff_salary_grade',
+            'basic_salary_points', 'adjusted_salary_points', 'provident_fund_type', 'remark',
+            # 個人資料
+            'name_chinese', 'name_foreign', 'gender', 'marital_status', 'birth_place', 'birth_date',
+            'origin', 'id_type', 'id_number', 'id_expiry_date', 'bank_account_number',
+            'social_security_number', 'home_phone', 'mobile_phone', 'address', 'email',
+            'alumni_class', 'alumni_class_year', 'alumni_class_duration',
+            'teacher_certificate_number', 'teaching_staff_rank', 'teaching_staff_rank_effective_date',
+            'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relationship',
+            # 關聯資料
+            'family_members', 'education_history', 'work_experience',
+            'professional_qualifications', 'social_activities', 'employment_records',
+            # 計算字段
+            'calculated_seniority', 'username', 'is_active',
+        ]
+        read_only_fields = fields
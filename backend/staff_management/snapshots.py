@@ -0,0 +1,434 @@
+"""
+全資料庫快照及載入
+snapshot_db 在一個一致性讀取的交易中匯出所有已安裝 app 的資料表（包括用戶、權限、
+員工子記錄、系統日誌等），每個模型按主鍵分段讀取，寫入多個 NDJSON.gz 文件：
+
+    pcms_snapshot_<時間>/
+        manifest.json                         # 模型、欄位、每個文件的行數及 SHA-256
+        staff_management.staffprofile/part-00000.ndjson.gz
+        ...
+
+每行是一個 JSON 陣列，欄位順序見 manifest 中該模型的 columns。
+load_snapshot 按外鍵依賴分層，同一層的文件由多個執行緒並行以 executemany 批量寫入，
+不經過模型的 save() 及信號。
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from datetime import time as time_of_day
+from decimal import Decimal
+from uuid import UUID
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils.duration import duration_iso_string
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_DIR_PREFIX = 'pcms_snapshot_'
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_ROWS_PER_FILE = 100000
+INSERT_BATCH_SIZE = 1000
+COMPRESS_LEVEL = 6
+
+# 值可直接交給資料庫驅動、載入時不必轉換的欄位類型
+PLAIN_FIELD_TYPES = frozenset({
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField',
+    'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField',
+    'PositiveBigIntegerField', 'CharField', 'TextField', 'SlugField', 'FileField',
+    'FilePathField', 'BooleanField', 'FloatField',
+})
+
+
+class SnapshotError(Exception):
+    """快照文件無效或與目前的資料庫結構不一致"""
+
+
+def snapshot_models():
+    """需要快照的模型（包括多對多的中間表），按 app 及模型名稱排序"""
+    models = [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+    return sorted(models, key=lambda model: model._meta.label_lower)
+
+
+def dependency_levels(models):
+    """
+    按外鍵依賴將模型分層：每層只依賴之前各層的模型，同一層可以並行載入
+    有循環依賴的模型放在最後一層（載入時已停用外鍵檢查，最後統一檢查）
+    """
+    pending = {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models and field.related_model is not model
+        }
+        for model in models
+    }
+    levels, done = [], set()
+    while pending:
+        ready = [model for model, deps in pending.items() if deps <= done]
+        if not ready:
+            ready = list(pending)
+        levels.append(sorted(ready, key=lambda model: model._meta.label_lower))
+        for model in ready:
+            del pending[model]
+        done.update(ready)
+    return levels
+
+
+def iter_pages(model, using, chunk_size, after=None):
+    """
+    按主鍵順序分頁讀取模型的所有欄位 (concrete_fields 的順序)
+    以鍵集分頁 (pk > 上一頁最後的主鍵) 代替 OFFSET，每頁的查詢成本不隨頁數增加；
+    after 為上次讀到的主鍵，用於中斷後繼續
+    """
+    opts = model._meta
+    fields = opts.concrete_fields
+    pk_index = [field.attname for field in fields].index(opts.pk.attname)
+    queryset = model._base_manager.using(using).order_by(opts.pk.attname).values_list(
+        *(field.attname for field in fields)
+    )
+    while True:
+        page = queryset if after is None else queryset.filter(pk__gt=after)
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        after = rows[-1][pk_index]
+        yield rows
+
+
+def _encode_value(value):
+    """json 不能直接表示的值；日期時間保留微秒，載入時以欄位的 to_python 還原"""
+    if isinstance(value, (datetime, date, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, timedelta):
+        return duration_iso_string(value)
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    raise TypeError(f'無法序列化 {type(value).__name__}')
+
+
+_row_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_encode_value)
+
+
+class _HashingFile:
+    """包裝二進位文件，讀寫時同時計算 SHA-256，避免為校驗重新讀取整個文件"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.digest = hashlib.sha256()
+
+    def write(self, data):
+        self.digest.update(data)
+        return self.raw.write(data)
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.digest.update(data)
+        return data
+
+    def flush(self):
+        self.raw.flush()
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as target:
+        json.dump(data, target, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        raise SnapshotError(f"{path} 不是快照目錄（缺少 {MANIFEST_NAME}）")
+    with open(manifest_path, encoding='utf-8') as source:
+        manifest = json.load(source)
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"不支援的快照格式: {manifest.get('format')}")
+    return manifest
+
+
+def list_snapshots(root):
+    """按時間順序返回 root 下完整的快照目錄名稱"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if name.startswith(SNAPSHOT_DIR_PREFIX) and os.path.isfile(os.path.join(root, name, MANIFEST_NAME))
+    )
+
+
+def _begin_consistent_read(connection):
+    """
+    在目前交易中建立一致性讀取，使所有模型的資料來自同一時間點
+    Django 對 MySQL 預設使用 READ COMMITTED，因此需在交易開始前改為 REPEATABLE READ
+    SQLite 的讀取交易在第一次查詢時取得快照，之後在同一交易中保持不變
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('START TRANSACTION WITH CONSISTENT SNAPSHOT')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        else:
+            cursor.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+
+
+class SnapshotWriter:
+    """
+    建立一次快照
+    每個模型按主鍵以鍵集分頁 (pk > 上一頁最後的主鍵) 讀取，記憶體用量與資料總量無關
+    """
+
+    def __init__(self, root, using=DEFAULT_DB_ALIAS, chunk_size=DEFAULT_CHUNK_SIZE,
+                 rows_per_file=DEFAULT_ROWS_PER_FILE, log=None):
+        self.root = root
+        self.using = using
+        self.chunk_size = chunk_size
+        self.rows_per_file = rows_per_file
+        self.log = log or (lambda message: None)
+        self.name = f"{SNAPSHOT_DIR_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.snapshot_dir = os.path.join(root, self.name)
+
+    def run(self):
+        if os.path.exists(self.snapshot_dir):
+            raise SnapshotError(f"快照目錄已存在: {self.snapshot_dir}")
+        # 先寫入臨時目錄，完成後才改名，中斷的快照不會被當作可用的快照
+        work_dir = f'{self.snapshot_dir}.partial'
+        os.makedirs(work_dir)
+
+        connection = connections[self.using]
+        start = time.monotonic()
+        with transaction.atomic(using=self.using):
+            _begin_consistent_read(connection)
+            models = [self._dump_model(model, work_dir) for model in snapshot_models()]
+            recorder = MigrationRecorder(connection)
+            migrations = sorted(recorder.applied_migrations()) if recorder.has_table() else []
+
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'name': self.name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'vendor': connection.vendor,
+            'migrations': [list(key) for key in migrations],
+            'models': models,
+            'stats': {
+                'rows': sum(model['rows'] for model in models),
+                'bytes': sum(part['bytes'] for model in models for part in model['parts']),
+                'seconds': round(time.monotonic() - start, 2),
+            },
+        }
+        _write_json_atomic(os.path.join(work_dir, MANIFEST_NAME), manifest)
+        os.replace(work_dir, self.snapshot_dir)
+        return manifest
+
+    def _dump_model(self, model, work_dir):
+        opts = model._meta
+        entry = {
+            'model': opts.label_lower,
+            'table': opts.db_table,
+            'columns': [field.column for field in opts.concrete_fields],
+            'rows': 0,
+            'parts': [],
+        }
+        part = None
+        for rows in iter_pages(model, self.using, self.chunk_size):
+            if part is None or part['rows'] >= self.rows_per_file:
+                if part is not None:
+                    self._close_part(part, entry)
+                part = self._open_part(work_dir, opts.label_lower, len(entry['parts']))
+            part['gzip'].write(''.join(f'{_row_encoder.encode(row)}\n' for row in rows).encode('utf-8'))
+            part['rows'] += len(rows)
+
+        if part is not None:
+            self._close_part(part, entry)
+        self.log(f"📦 {opts.label_lower}：{entry['rows']} 筆，{len(entry['parts'])} 個文件")
+        return entry
+
+    def _open_part(self, work_dir, label, index):
+        relative = f'{label}/part-{index:05d}.ndjson.gz'
+        path = os.path.join(work_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        raw = open(path, 'wb')
+        hashed = _HashingFile(raw)
+        return {
+            'file': relative,
+            'path': path,
+            'raw': raw,
+            'hashed': hashed,
+            'gzip': gzip.GzipFile(filename='', mode='wb', fileobj=hashed, compresslevel=COMPRESS_LEVEL, mtime=0),
+            'rows': 0,
+        }
+
+    def _close_part(self, part, entry):
+        part['gzip'].close()
+        part['raw'].close()
+        entry['parts'].append({
+            'file': part['file'],
+            'rows': part['rows'],
+            'bytes': os.path.getsize(part['path']),
+            'sha256': part['hashed'].hexdigest(),
+        })
+        entry['rows'] += part['rows']
+
+
+def column_converters(model, columns, connection):
+    """
+    將 JSON 值（或另一個資料庫讀出的 Python 值）轉為 connection 的驅動可接受的值
+    整數、字串、布林值不必轉換；日期、Decimal、JSON 等欄位經 to_python 及 get_db_prep_save
+    返回與 columns 對應的列表，不必轉換的欄位為 None
+    """
+    by_column = {field.column: field for field in model._meta.concrete_fields}
+    converters = []
+    for column in columns:
+        field = by_column[column]
+        target = field.target_field if field.is_relation else field
+        if target.get_internal_type() in PLAIN_FIELD_TYPES:
+            converters.append(None)
+        else:
+            converters.append(
+                lambda value, field=target: None if value is None
+                else field.get_db_prep_save(field.to_python(value), connection)
+            )
+    return converters
+
+
+class SnapshotLoader:
+    """
+    將快照載入資料庫
+    每個文件在獨立的交易中寫入，讀取時同時校驗 SHA-256 及行數，不一致時回滾該文件
+    目標資料表需為空，或以 replace=True 先清空快照中的資料表
+    SQLite 不支援多個連線同時寫入，因此固定使用單一執行緒
+    """
+
+    def __init__(self, path, using=DEFAULT_DB_ALIAS, workers=4, replace=False, log=None):
+        self.path = path
+        self.using = using
+        self.replace = replace
+        self.log = log or (lambda message: None)
+        self.manifest = load_manifest(path)
+        connection = connections[using]
+        self.workers = 1 if connection.vendor == 'sqlite' else max(1, workers)
+        self.entries = self._resolve_models()
+
+    def _resolve_models(self):
+        entries = {}
+        for entry in self.manifest['models']:
+            try:
+                model = apps.get_model(entry['model'])
+            except LookupError:
+                raise SnapshotError(f"目前的程式中沒有模型 {entry['model']}")
+            columns = {field.column for field in model._meta.concrete_fields}
+            if set(entry['columns']) != columns:
+                missing = sorted(columns - set(entry['columns']))
+                extra = sorted(set(entry['columns']) - columns)
+                raise SnapshotError(
+                    f"{entry['model']} 的欄位與目前的資料庫結構不一致（快照缺少 {missing}，多出 {extra}），"
+                    f"請先執行對應版本的 migrate"
+                )
+            entries[model] = entry
+        return entries
+
+    def migration_differences(self):
+        """返回快照與目前資料庫已套用的遷移之差異 (只在快照中, 只在資料庫中)"""
+        recorder = MigrationRecorder(connections[self.using])
+        current = {tuple(key) for key in recorder.applied_migrations()} if recorder.has_table() else set()
+        snapshot = {tuple(key) for key in self.manifest['migrations']}
+        return sorted(snapshot - current), sorted(current - snapshot)
+
+    def run(self):
+        connection = connections[self.using]
+        models = list(self.entries)
+        tables = [model._meta.db_table for model in models]
+        start = time.monotonic()
+
+        if self.replace:
+            statements = connection.ops.sql_flush(no_style(), tables, reset_sequences=False)
+            connection.ops.execute_sql_flush(statements)
+            self.log(f"🧹 已清空 {len(tables)} 個資料表")
+        else:
+            non_empty = [
+                model._meta.label_lower for model in models
+                if model._base_manager.using(self.using).exists()
+            ]
+            if non_empty:
+                raise SnapshotError(f"目標資料表不是空的：{', '.join(non_empty)}（可使用 replace 先清空）")
+
+        loaded = {}
+        for level in dependency_levels(models):
+            tasks = [(model, part) for model in level for part in self.entries[model]['parts']]
+            if self.workers == 1:
+                results = [self._load_part(model, part) for model, part in tasks]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    results = list(executor.map(lambda task: self._load_part(*task, threaded=True), tasks))
+            for (model, _), rows in zip(tasks, results):
+                loaded[model] = loaded.get(model, 0) + rows
+            for model in level:
+                self.log(f"📥 {model._meta.label_lower}：{loaded.get(model, 0)} 筆")
+
+        with connection.cursor() as cursor:
+            for statement in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(statement)
+        # 載入時停用了外鍵檢查，最後統一檢查
+        connection.check_constraints(table_names=tables)
+
+        return {
+            'models': len(models),
+            'rows': sum(loaded.values()),
+            'workers': self.workers,
+            'seconds': round(time.monotonic() - start, 2),
+        }
+
+    def _load_part(self, model, part, threaded=False):
+        connection = connections[self.using]
+        entry = self.entries[model]
+        qn = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            qn(entry['table']),
+            ', '.join(qn(column) for column in entry['columns']),
+            ', '.join(['%s'] * len(entry['columns'])),
+        )
+        converters = column_converters(model, entry['columns'], connection)
+        convert = [(index, converter) for index, converter in enumerate(converters) if converter]
+
+        try:
+            rows = 0
+            with connection.constraint_checks_disabled(), transaction.atomic(using=self.using):
+                with open(os.path.join(self.path, part['file']), 'rb') as raw, connection.cursor() as cursor:
+                    hashed = _HashingFile(raw)
+                    batch = []
+                    with gzip.GzipFile(fileobj=hashed, mode='rb') as source:
+                        for line in source:
+                            values = json.loads(line)
+                            for index, converter in convert:
+                                values[index] = converter(values[index])
+                            batch.append(values)
+                            if len(batch) >= INSERT_BATCH_SIZE:
+                                cursor.executemany(sql, batch)
+                                rows += len(batch)
+                                batch = []
+                    if batch:
+                        cursor.executemany(sql, batch)
+                        rows += len(batch)
+
+                    if hashed.hexdigest() != part['sha256'] or rows != part['rows']:
+                        raise SnapshotError(f"文件校驗失敗：{part['file']}")
+            return rows
+        finally:
+            if threaded:
+                connection.close()
@@ -1,3 +1,253 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .management.commands.benchmark_staff_list import BENCHMARK_PREFIX, create_benchmark_staff
+from .models import EducationBackground, SearchIndexEntry, StaffProfile, SystemLog, UserAgent
+from .readers import StaffProfileReader
+from .search import deferred_indexing, search
+from .serializers import StaffProfileSerializer
+from .throttling import TokenBucket, consume_buckets, get_throttle_ip, within_body_limit
+from .views import LEGACY_STAFF_PREFETCH
+
+
+class AdminQueryCountTests(TestCase):
+    """管理後台頁面的查詢數固定，不隨員工、子記錄或日誌的行數增加"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_benchmark_staff(30, 2)
+        cls.staff = StaffProfile.objects.get(staff_id=f'{BENCHMARK_PREFIX}00001')
+        user_agent = UserAgent.objects.create(digest=UserAgent.digest_of('test-agent'), value='test-agent')
+        SystemLog.objects.bulk_create([
+            SystemLog(
+                user=cls.admin, action='view', resource_type='StaffProfile', resource_id=str(number),
+                description=f'查看員工 {number}', ip_address='127.0.0.1', user_agent=user_agent,
+            )
+            for number in range(60)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_staff_changelist(self):
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('admin:staff_management_staffprofile_changelist'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_change_form(self):
+        with self.assertNumQueries(11):
+            response = self.client.get(reverse('admin:staff_management_staffprofile_change', args=[self.staff.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_system_log_changelist(self):
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('admin:staff_management_systemlog_changelist'))
+        self.assertEqual(response.status_code, 200)
+
+
+class StaffProfileReaderTests(TestCase):
+    """StaffProfileReader（唯讀快速路徑）的輸出必須與 StaffProfileSerializer 完全相同"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_benchmark_staff(5, 2)
+        # 沒有子記錄、大部分欄位為空及有照片的員工
+        StaffProfile.objects.create(staff_id='EMPTY1')
+        StaffProfile.objects.filter(staff_id=f'{BENCHMARK_PREFIX}00001').update(profile_picture='staff_photos/a b.jpg')
+
+    def test_matches_serializer(self):
+        context = {'request': RequestFactory().get('/api/staff/profiles/')}
+        queryset = StaffProfile.objects.order_by('staff_id')
+        expected = StaffProfileSerializer(
+            queryset.prefetch_related(*LEGACY_STAFF_PREFETCH), many=True, context=context
+        ).data
+        actual = StaffProfileReader(context).read(queryset)
+
+        self.assertEqual(len(actual), len(expected))
+        for left, right in zip(expected, actual):
+            # 欄位順序及值的類型也必須相同
+            self.assertEqual(list(right), list(left))
+            for name, value in left.items():
+                self.assertEqual(right[name], value, f"{left['staff_id']}.{name}")
+                self.assertIs(type(right[name]), type(value), f"{left['staff_id']}.{name}")
+
+
+class SearchIndexTests(TestCase):
+    """倒排索引隨員工檔案及子記錄的保存、刪除更新；deferred_indexing 批量重建；搜尋的排序及權限過濾"""
+
+    def found(self, text):
+        return [document_id for document_id, _ in search('staff', text)]
+
+    def test_profile_save_and_delete(self):
+        staff = StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文')
+        self.assertEqual(self.found('大文'), [staff.pk])
+
+        staff.name_chinese = '李小明'
+        staff.save()
+        self.assertEqual(self.found('大文'), [])
+        self.assertEqual(self.found('小明'), [staff.pk])
+
+        staff.delete()
+        self.assertFalse(SearchIndexEntry.objects.filter(document_type='staff', document_id=staff.pk).exists())
+
+    def test_child_save_and_delete(self):
+        staff = StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文')
+        education = EducationBackground.objects.create(
+            staff=staff, study_period='2010-2014', school_name='澳門大學', education_level='學士',
+        )
+        self.assertEqual(self.found('澳門'), [staff.pk])
+
+        education.school_name = '香港大學'
+        education.save()
+        self.assertEqual(self.found('澳門'), [])
+        self.assertEqual(self.found('香港'), [staff.pk])
+
+        education.delete()
+        self.assertEqual(self.found('香港'), [])
+        # 只刪除子記錄的索引行，主表的仍在
+        self.assertEqual(self.found('大文'), [staff.pk])
+
+    def test_deferred_indexing_batches_writes(self):
+        with deferred_indexing():
+            first = StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文')
+            second = StaffProfile.objects.create(staff_id='S2', name_chinese='陳大文')
+            self.assertFalse(SearchIndexEntry.objects.exists())
+        self.assertEqual(sorted(self.found('大文')), [first.pk, second.pk])
+
+    def test_deferred_indexing_rollback(self):
+        StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文')
+        before = list(SearchIndexEntry.objects.order_by('pk').values_list('pk', flat=True))
+        # 交易回滾時拋出原本的 IntegrityError，而不是在損壞的交易中重建索引
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic(), deferred_indexing():
+                StaffProfile.objects.create(staff_id='S2', name_chinese='李小明')
+                StaffProfile.objects.create(staff_id='S1', name_chinese='李小明')
+        self.assertEqual(list(SearchIndexEntry.objects.order_by('pk').values_list('pk', flat=True)), before)
+
+    def test_deferred_indexing_error(self):
+        with self.assertRaises(ValueError):
+            with deferred_indexing():
+                StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文')
+                raise ValueError
+        self.assertFalse(SearchIndexEntry.objects.exists())
+
+    def test_ranking(self):
+        name = StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文', name_foreign='CHAN Tai Man')
+        remark = StaffProfile.objects.create(staff_id='S2', name_chinese='李小明', remark='與陳大文同組')
+        StaffProfile.objects.create(staff_id='S3', name_chinese='陳文', name_foreign='Chandler Wong')
+
+        # 中文按相鄰兩字匹配：「陳文」沒有「大文」；姓名的權重高於備註
+        self.assertEqual(self.found('大文'), [name.pk, remark.pk])
+        # 拉丁字母按前綴匹配，不分大小寫，每個詞都必須匹配
+        self.assertEqual(self.found('chan ta'), [name.pk])
+        self.assertEqual(len(self.found('CHAN')), 2)
+
+    def test_api_hides_inactive_staff_from_non_admins(self):
+        active = StaffProfile.objects.create(staff_id='S1', name_chinese='陳大文')
+        inactive = StaffProfile.objects.create(staff_id='S2', name_chinese='陳大文', is_active=False)
+        user = User.objects.create_user('viewer', password='password')
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+        def result_ids(account):
+            token = Token.objects.create(user=account)
+            response = self.client.get(
+                reverse('search'), {'q': '大文'}, HTTP_AUTHORIZATION=f'Token {token.key}',
+            )
+            self.assertEqual(response.status_code, 200)
+            return sorted(row['id'] for row in response.json()['results'])
+
+        self.assertEqual(result_ids(user), [active.pk])
+        self.assertEqual(result_ids(admin), [active.pk, inactive.pk])
+
+
+SUBMIT_THROTTLE = {
+    'application_submit': {'IP_RATE': 0.1, 'IP_BURST': 2, 'GLOBAL_RATE': 5, 'GLOBAL_BURST': 100, 'MAX_BODY_BYTES': 1024},
+}
+
+
+@override_settings(PUBLIC_WRITE_THROTTLES=SUBMIT_THROTTLE, TRUSTED_PROXIES=['127.0.0.1/32'])
+class ThrottlingTests(TestCase):
+    """令牌桶、429 及 Retry-After、請求體大小限制（413），以及限流使用的客戶端 IP"""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def submit(self, body=b'{}', **extra):
+        return self.client.post(reverse('application_submission_api:submit_application'), data=body, content_type='application/json', **extra)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket('test', rate=1, capacity=2)
+        with mock.patch('staff_management.throttling.time') as clock:
+            clock.time.return_value = 1000.0
+            self.assertEqual(bucket.consume('key'), (True, 0.0))
+            self.assertEqual(bucket.consume('key'), (True, 0.0))
+            self.assertEqual(bucket.consume('key'), (False, 1.0))
+            # 其他鍵的令牌不受影響
+            self.assertEqual(bucket.consume('other'), (True, 0.0))
+
+            clock.time.return_value = 1000.5
+            self.assertEqual(bucket.consume('key'), (False, 0.5))
+            clock.time.return_value = 1001.0
+            self.assertEqual(bucket.consume('key'), (True, 0.0))
+            # 超過桶容量的請求永遠不會被允許，不返回等待時間
+            self.assertEqual(bucket.consume('key', tokens=3), (False, None))
+
+    def test_consume_buckets(self):
+        first = TokenBucket('first', rate=1, capacity=5)
+        second = TokenBucket('second', rate=0.5, capacity=1)
+        with mock.patch('staff_management.throttling.time') as clock:
+            clock.time.return_value = 1000.0
+            self.assertEqual(consume_buckets([(first, 'key'), (second, 'key')]), (None, None))
+            self.assertEqual(consume_buckets([(first, 'key'), (second, 'key')]), ('second', 2.0))
+            # 大於容量的消耗按裝滿整個桶的時間返回
+            self.assertEqual(consume_buckets([(first, 'other')], cost=10), ('first', 5.0))
+
+    def test_throttled_response(self):
+        self.assertNotEqual(self.submit().status_code, 429)
+        self.assertNotEqual(self.submit().status_code, 429)
+        response = self.submit()
+        self.assertEqual(response.status_code, 429)
+        # 每 10 秒補充一個令牌
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertTrue(SystemLog.objects.filter(action='throttle', resource_type='application_submit').exists())
+
+    def test_body_too_large(self):
+        # 有 Content-Length 時在解析前拒絕，不消耗令牌
+        for _ in range(3):
+            self.assertEqual(self.submit(b'{"a": "%s"}' % (b'x' * 2000)).status_code, 413)
+        self.assertNotEqual(self.submit().status_code, 429)
+
+    def test_chunked_body_limit(self):
+        def chunked(body):
+            request = RequestFactory().post('/', data=body, content_type='application/json')
+            del request.META['CONTENT_LENGTH']
+            request._stream = io.BytesIO(body)
+            return request
+
+        self.assertFalse(within_body_limit(chunked(b'x' * 101), 100))
+        request = chunked(b'{"a": 1}')
+        self.assertTrue(within_body_limit(request, 100))
+        # 已讀取的內容放回請求，後續解析不受影響
+        self.assertEqual(request.META['CONTENT_LENGTH'], '8')
+        self.assertEqual(request.body, b'{"a": 1}')
+
+    def test_real_ip_from_untrusted_peer(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='203.0.113.5', HTTP_X_REAL_IP='10.0.0.1')
+        self.assertEqual(get_throttle_ip(request), '203.0.113.5')
+        request = RequestFactory().get('/', REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='10.0.0.1')
+        self.assertEqual(get_throttle_ip(request), '10.0.0.1')
+
+        # 直接連線的客戶端每次更換 X-Real-IP 也按 REMOTE_ADDR 限流
+        codes = [
+            self.submit(REMOTE_ADDR='203.0.113.5', HTTP_X_REAL_IP=f'10.0.0.{number}').status_code
+            for number in range(3)
+        ]
+        self.assertEqual(codes[-1], 429)
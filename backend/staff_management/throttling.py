@@ -0,0 +1,202 @@
+"""
+令牌桶限流工具
+狀態保存在 Django 快取中（預設為進程內 LocMemCache），不需要額外的外部服務。
+使用進程內快取時，「全局」令牌桶按 Gunicorn worker 分別計算。
+
+- TokenBucket：通用令牌桶
+- PublicWriteThrottle / PublicWriteProtectionMixin：匿名寫入端點的限流及請求體大小限制，
+  配置見 settings.PUBLIC_WRITE_THROTTLES
+- report_throttle_hit：將限流事件寫入審計日誌 (SystemLog)
+- get_throttle_ip / within_body_limit：限流使用的客戶端 IP 及請求體大小檢查
+"""
+import io
+import ipaddress
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions, status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .permissions import log_user_action
+
+# 同一端點、同一 IP 的限流事件在此時間窗口內只寫入一次審計日誌
+THROTTLE_AUDIT_INTERVAL = 60
+
+
+class TokenBucket:
+    """
+    令牌桶
+    rate: 每秒補充的令牌數
+    capacity: 桶容量，即允許的最大突發量
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, name, rate, capacity, cache_alias='default'):
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.cache_alias = cache_alias
+        # 桶裝滿所需時間的兩倍後即可讓快取自動過期
+        self.timeout = max(60, int(self.capacity / self.rate * 2)) if self.rate > 0 else None
+
+    def _cache_key(self, key):
+        return f"throttle:{self.name}:{key}"
+
+    def consume(self, key, tokens=1):
+        """
+        嘗試扣除 tokens 個令牌
+        返回 (是否允許, 需要等待的秒數)
+        """
+        cache = caches[self.cache_alias]
+        cache_key = self._cache_key(key)
+        now = time.time()
+
+        with self._lock:
+            available, updated = cache.get(cache_key, (self.capacity, now))
+            available = min(self.capacity, available + (now - updated) * self.rate)
+
+            if available < tokens:
+                cache.set(cache_key, (available, now), self.timeout)
+                if self.rate <= 0 or tokens > self.capacity:
+                    return False, None
+                return False, (tokens - available) / self.rate
+
+            cache.set(cache_key, (available - tokens, now), self.timeout)
+            return True, 0.0
+
+
+def consume_buckets(checks, cost=1):
+    """
+    依次從 [(TokenBucket, key), ...] 扣除令牌
+    全部允許時返回 (None, None)，否則返回 (被拒絕的桶名稱, 需要等待的秒數)
+    """
+    for bucket, key in checks:
+        allowed, retry_after = bucket.consume(key, cost)
+        if not allowed:
+            if retry_after is None:
+                retry_after = bucket.capacity / bucket.rate if bucket.rate > 0 else None
+            return bucket.name, retry_after
+    return None, None
+
+
+def get_throttle_ip(request):
+    """
+    限流使用的客戶端 IP
+    X-Forwarded-For 的第一項由客戶端填寫，不能作為限流的鍵；只有直接連線的是受信任的反向代理
+    （settings.TRUSTED_PROXIES，即 nginx）時才使用其設定的 X-Real-IP，否則使用 REMOTE_ADDR
+    """
+    remote_addr = request.META.get('REMOTE_ADDR') or ''
+    real_ip = request.META.get('HTTP_X_REAL_IP', '').strip()
+    if real_ip and remote_addr:
+        try:
+            address = ipaddress.ip_address(remote_addr)
+            if any(address in ipaddress.ip_network(network) for network in settings.TRUSTED_PROXIES):
+                return real_ip
+        except ValueError:
+            pass
+    return remote_addr or 'unknown'
+
+
+def within_body_limit(request, limit):
+    """
+    檢查 Django 請求的請求體是否不超過 limit 字節
+    有 Content-Length 時直接比較；沒有時（如分塊傳輸）最多讀取 limit + 1 字節，超過即拒絕，
+    否則把已讀取的內容放回請求並補上 Content-Length，後續解析不受影響
+    """
+    content_length = _content_length(request)
+    if content_length or request.method in SAFE_METHODS:
+        return content_length <= limit
+    if request._read_started:
+        return len(request.body) <= limit
+    body = request.read(limit + 1)
+    if len(body) > limit:
+        return False
+    request._stream = io.BytesIO(body)
+    request._read_started = False
+    request.META['CONTENT_LENGTH'] = str(len(body))
+    return True
+
+
+def report_throttle_hit(request, scope, bucket_name):
+    """
+    將限流事件寫入審計日誌
+    同一端點、同一 IP 每 THROTTLE_AUDIT_INTERVAL 秒只記錄一次，避免被攻擊時反而放大資料庫寫入
+    """
+    client_ip = get_throttle_ip(request)
+    if not caches['default'].add(f"throttle_audit:{scope}:{client_ip}", True, THROTTLE_AUDIT_INTERVAL):
+        return
+
+    user = getattr(request, 'user', None)
+    log_user_action(
+        user if user is not None and user.is_authenticated else None,
+        'throttle',
+        scope,
+        description=f"請求被限流（{bucket_name}），{THROTTLE_AUDIT_INTERVAL} 秒內同一 IP 只記錄一次",
+        request=request,
+    )
+
+
+def _content_length(request):
+    try:
+        return int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return 0
+
+
+class PublicWriteThrottle(BaseThrottle):
+    """
+    匿名寫入端點的 DRF 限流類
+    視圖以 throttle_scope 指定 settings.PUBLIC_WRITE_THROTTLES 中的配置，
+    先扣除每個 IP 的令牌，再扣除該端點的全局令牌；被拒絕時寫入審計日誌。
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        scope = getattr(view, 'throttle_scope', None)
+        config = settings.PUBLIC_WRITE_THROTTLES.get(scope)
+        if config is None or request.method in SAFE_METHODS:
+            return True
+
+        bucket_name, retry_after = consume_buckets([
+            (TokenBucket(f'{scope}_ip', config['IP_RATE'], config['IP_BURST']), get_throttle_ip(request)),
+            (TokenBucket(f'{scope}_global', config['GLOBAL_RATE'], config['GLOBAL_BURST']), 'global'),
+        ])
+        if bucket_name is None:
+            return True
+
+        self.retry_after = retry_after
+        report_throttle_hit(request, scope, bucket_name)
+        return False
+
+    def wait(self):
+        return self.retry_after
+
+
+class RequestTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = '請求內容過大 Request body too large'
+    default_code = 'request_too_large'
+
+
+class PublicWriteProtectionMixin:
+    """
+    匿名寫入端點的防濫用保護
+    在認證、解析請求體及序列化器驗證之前，先拒絕過大的請求（沒有 Content-Length 時按實際讀取的大小），
+    再由 PublicWriteThrottle 限流。視圖需設定 throttle_scope。
+    """
+    throttle_scope = None
+    throttle_classes = [PublicWriteThrottle]
+
+    def initial(self, request, *args, **kwargs):
+        config = settings.PUBLIC_WRITE_THROTTLES.get(self.throttle_scope) or {}
+        max_body_bytes = config.get('MAX_BODY_BYTES')
+        if max_body_bytes and not within_body_limit(request._request, max_body_bytes):
+            raise RequestTooLarge()
+        super().initial(request, *args, **kwargs)
+
+    def throttled(self, request, wait):
+        raise exceptions.Throttled(wait, detail='請求過於頻繁，請稍後再試 Too many requests, please try again later')
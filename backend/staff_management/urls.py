@@ -7,7 +7,10 @@ from .views import (
     StatisticsView, 
     ImportStaffDataView,
     BatchPhotoUploadView,
-    ChangePasswordView
+    ChangePasswordView,
+    SearchView,
+    LegacyStaffListView,
+    LegacyStaffDetailView,
 )
 
 router = DefaultRouter()
@@ -19,6 +22,10 @@ urlpatterns = [
     path('staff/statistics/', StatisticsView.as_view(), name='statistics'),
     path('staff/import/', ImportStaffDataView.as_view(), name='import-staff-data'),
     path('staff/batch-photo-upload/', BatchPhotoUploadView.as_view(), name='batch-photo-upload'),
+    path('search/', SearchView.as_view(), name='search'),
+    # 舊版員工 API 的兼容路徑（數據來自 StaffProfile）
+    path('users/emp/list/', LegacyStaffListView.as_view(), name='legacy-staff-list'),
+    path('users/emp/<int:pk>/', LegacyStaffDetailView.as_view(), name='legacy-staff-detail'),
     # 身份驗證API
     path('auth/login/', obtain_auth_token, name='auth-login'),
     path('auth/logout/', LogoutView.as_view(), name='auth-logout'),
@@ -1,332 +1,61 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.views import APIView
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate, update_session_auth_hash
+from django.apps import apps
 from django.contrib.auth.models import User
 from .models import StaffProfile
-from .serializers import StaffProfileSerializer
+from .serializers import LegacyStaffSerializer, StaffProfileSerializer
+from .permissions import get_client_ip
+from .readers import StaffProfileReader
+from .renderers import json_loads
+from .search import SEARCH_DOCUMENTS, search
+from .throttling import TokenBucket, consume_buckets, get_throttle_ip, report_throttle_hit, within_body_limit
+from .importer import (
+    CHILD_STRATEGIES, IMPORT_MODES, SUPPORTED_EXTENSIONS, import_file, issues_to_csv, validate_file,
+)
 import logging
 import json
+import math
+import zlib
 # Import function moved inline
 
 logger = logging.getLogger(__name__)
 import tempfile
 import os
-import csv
 
 # CSV import function
-def import_data(csv_file_path):
+def import_data(csv_file_path, mode='insert', child_strategy='replace'):
     """
-    完整的CSV匯入函數，支援所有欄位A-EN
-    Returns the number of imported records
+    完整的匯入函數，支援所有欄位A-EN，接受 CSV 或 XLSX
+    清理及寫入邏輯見 importer.py（pandas 欄位化處理）
+    mode='upsert' 時更新已存在的員工，child_strategy 為 replace 或 merge
+    Returns the import result dict
     """
-    from datetime import datetime
-    from .models import StaffProfile, FamilyMember, EducationBackground, WorkExperience, ProfessionalQualification, AssociationPosition
-    
-    def parse_date(date_str):
-        """解析日期字符串為date物件，支援多種格式包括中文格式"""
-        if not date_str or date_str.strip() == '' or date_str.strip().lower() in ['/', 'n/a', 'na', '無', 'null', 'none']:
-            return None
-        try:
-            date_str = date_str.strip()
-            
-            # 處理中文日期格式 2024年8月10日
-            import re
-            chinese_date_pattern = r'(\d{4})年(\d{1,2})月(\d{1,2})日'
-            match = re.match(chinese_date_pattern, date_str)
-            if match:
-                year, month, day = match.groups()
-                return datetime(int(year), int(month), int(day)).date()
-            
-            # 嘗試標準日期格式
-            for date_format in ['%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%d/%m/%Y', '%Y年%m月%d日']:
-                try:
-                    return datetime.strptime(date_str, date_format).date()
-                except ValueError:
-                    continue
-        except:
-            pass
-        return None
-    
-    def parse_decimal(value):
-        """解析Decimal值，處理空值和非數值"""
-        if not value or value.strip() == '' or value.strip().lower() in ['/', 'n/a', 'na', '無', 'null', 'none']:
-            return None
-        try:
-            value = str(value).strip()
-            # 移除非數值字符（除了小數點和負號）
-            import re
-            value = re.sub(r'[^\d\.-]', '', value)
-            if value and value not in ['-', '.', '-.']:
-                return float(value)
-        except:
-            pass
-        return None
-    
-    def parse_boolean(value):
-        """解析布爾值"""
-        if not value or value.strip() == '' or value.strip().lower() in ['/', 'n/a', 'na', '無', 'null', 'none']:
-            return False
-        value = value.strip().lower()
-        return value in ['true', '1', 'yes', 'y', '是', 'true', 'TRUE']
-    
-    def clean_string(value):
-        """清理字符串，處理空值標記"""
-        if not value:
-            return ''
-        value = str(value).strip()
-        if value.lower() in ['/', 'n/a', 'na', '無', 'null', 'none', 'nil']:
-            return ''
-        return value
-    
     try:
-        imported_count = 0
-        errors = []
-        
-        with open(csv_file_path, 'r', encoding='utf-8-sig') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    # 清理BOM污染的鍵名和值
-                    clean_row = {}
-                    for key, value in row.items():
-                        # 移除BOM字符從鍵名
-                        clean_key = key.replace('\ufeff', '') if key else ''
-                        # 移除BOM字符從值
-                        clean_value = value.replace('\ufeff', '') if isinstance(value, str) else value
-                        clean_row[clean_key] = clean_value
-                    
-                    # 驗證必要欄位 - 使用清理後的數據
-                    staff_id = clean_string(clean_row.get('staff_id', ''))
-                    staff_name = clean_string(clean_row.get('staff_name', ''))
-                    
-                    # 添加調試日志
-                    logger.info(f"第{row_num}行: staff_id='{staff_id}', staff_name='{staff_name}', 清理后鍵名: {list(clean_row.keys())[:5]}")
-                    
-                    if not staff_id or not staff_name:
-                        errors.append(f"第{row_num}行: 缺少必要欄位（staff_id='{staff_id}' 或 staff_name='{staff_name}'）")
-                        continue
-                    
-                    # 檢查是否已存在
-                    if StaffProfile.objects.filter(staff_id=staff_id).exists():
-                        errors.append(f"第{row_num}行: 員工編號'{staff_id}'已存在")
-                        continue
-                    
-                    # 創建StaffProfile記錄，包含所有基本欄位
-                    staff_profile = StaffProfile(
-                        # 基本資訊
-                        staff_id=staff_id,
-                        staff_name=staff_name,
-                        employment_type=clean_string(row.get('employment_type')),
-                        employment_type_remark=clean_string(row.get('employment_type_remark')),
-                        dsej_registration_status=clean_string(row.get('dsej_registration_status')),
-                        dsej_registration_rank=clean_string(row.get('dsej_registration_rank')),
-                        entry_date=parse_date(row.get('entry_date')),
-                        departure_date=parse_date(row.get('departure_date')),
-                        retirement_date=parse_date(row.get('retirement_date')),
-                        position_grade=clean_string(row.get('position_grade')),
-                        teaching_staff_salary_grade=clean_string(row.get('teaching_staff_salary_grade')),
-                        basic_salary_points=parse_decimal(row.get('basic_salary_points')),
-                        adjusted_salary_points=parse_decimal(row.get('adjusted_salary_points')),
-                        provident_fund_type=clean_string(row.get('provident_fund_type')),
-                        remark=clean_string(row.get('remark')),
-                        contract_number=clean_string(row.get('contract_number')),
-                        
-                        # 個人資訊
-                        name_chinese=clean_string(row.get('name_chinese')) or staff_name,
-                        name_foreign=clean_string(row.get('name_foreign')),
-                        gender=clean_string(row.get('gender')) or 'M',
-                        marital_status=clean_string(row.get('marital_status')),
-                        birth_place=clean_string(row.get('birth_place')),
-                        birth_date=parse_date(row.get('birth_date')),
-                        origin=clean_string(row.get('origin')),
-                        id_type=clean_string(row.get('id_type')),
-                        id_number=clean_string(row.get('id_number')),
-                        id_expiry_date=parse_date(row.get('id_expiry_date')),
-                        bank_account_number=clean_string(row.get('bank_account_number')),
-                        social_security_number=clean_string(row.get('social_security_number')),
-                        home_phone=clean_string(row.get('home_phone')),
-                        mobile_phone=clean_string(row.get('mobile_phone')),
-                        address=clean_string(row.get('address')),
-                        email=clean_string(row.get('email')),
-                        alumni_class=clean_string(row.get('alumni_class')),
-                        alumni_class_year=clean_string(row.get('alumni_class_year')),
-                        alumni_class_duration=clean_string(row.get('alumni_class_duration')),
-                        teacher_certificate_number=clean_string(row.get('teacher_certificate_number')),
-                        teaching_staff_rank=clean_string(row.get('teaching_staff_rank')),
-                        teaching_staff_rank_effective_date=parse_date(row.get('teaching_staff_rank_effective_date')),
-                        emergency_contact_name=clean_string(row.get('emergency_contact_name')),
-                        emergency_contact_phone=clean_string(row.get('emergency_contact_phone')),
-                        emergency_contact_relationship=clean_string(row.get('emergency_contact_relationship')),
-                        
-                        # 布爾值欄位
-                        is_foreign_national=parse_boolean(row.get('is_foreign_national')),
-                        is_master=parse_boolean(row.get('is_master')),
-                        is_phd=parse_boolean(row.get('is_phd')),
-                        is_overseas_study=parse_boolean(row.get('is_overseas_study')),
-                        is_active=parse_boolean(row.get('is_active', 'True'))
-                    )
-                    
-                    staff_profile.save()
-                    
-                    # 匯入家庭成員資訊（1-5）
-                    for i in range(1, 6):
-                        name = clean_string(row.get(f'family_member_{i}_name'))
-                        if name:
-                            age_str = clean_string(row.get(f'family_member_{i}_age', '0'))
-                            try:
-                                age = int(age_str) if age_str.isdigit() else 0
-                            except:
-                                age = 0
-                            FamilyMember.objects.create(
-                                staff=staff_profile,
-                                name=name,
-                                relationship=clean_string(row.get(f'family_member_{i}_relationship')),
-                                birth_date=parse_date(row.get(f'family_member_{i}_birth_date')),
-                                age=age,
-                                education_level=clean_string(row.get(f'family_member_{i}_education_level')),
-                                institution=clean_string(row.get(f'family_member_{i}_institution')),
-                                alumni_class=clean_string(row.get(f'family_member_{i}_alumni_class'))
-                            )
-                    
-                    # 匯入學歷資訊（1-4）
-                    for i in range(1, 5):
-                        school_name = clean_string(row.get(f'education_{i}_school_name'))
-                        if school_name:
-                            degree_name = clean_string(row.get(f'education_{i}_degree_name'))
-                            education_level = clean_string(row.get(f'education_{i}_education_level'))
-                            
-                            # 判斷學位類型
-                            is_phd_degree = False
-                            is_master_degree = False
-                            is_overseas = False
-                            
-                            # 檢查是否為博士學位
-                            if degree_name and any(keyword in degree_name.lower() for keyword in ['phd', 'ph.d', 'doctor', '博士']):
-                                is_phd_degree = True
-                            elif education_level and any(keyword in education_level.lower() for keyword in ['phd', 'ph.d', 'doctor', '博士']):
-                                is_phd_degree = True
-                                
-                            # 檢查是否為碩士學位
-                            if degree_name and any(keyword in degree_name.lower() for keyword in ['master', '碩士', 'msc', 'm.sc', 'ma', 'm.a']):
-                                is_master_degree = True
-                            elif education_level and any(keyword in education_level.lower() for keyword in ['master', '碩士', 'msc', 'm.sc', 'ma', 'm.a']):
-                                is_master_degree = True
-                                
-                            # 檢查是否為海外學習
-                            # 只在CSV沒有明確設定時才自動判斷
-                            csv_overseas_setting = parse_boolean(row.get('is_overseas_study'))
-                            if csv_overseas_setting:
-                                # CSV明確設定為True，使用CSV設定
-                                is_overseas = True
-                            elif school_name and not any('\u4e00' <= char <= '\u9fff' for char in school_name):
-                                # CSV未明確設定且學校名稱為非中文，才自動判斷為海外
-                                is_overseas = True
-                            
-                            EducationBackground.objects.create(
-                                staff=staff_profile,
-                                study_period=clean_string(row.get(f'education_{i}_study_period')),
-                                school_name=school_name,
-                                education_level=education_level,
-                                degree_name=degree_name,
-                                certificate_date=parse_date(row.get(f'education_{i}_certificate_date')),
-                                is_phd=is_phd_degree,
-                                is_master=is_master_degree,
-                                is_overseas_study=is_overseas
-                            )
-                    
-                    # 匯入工作經驗（1-4）
-                    for i in range(1, 5):
-                        organization = clean_string(row.get(f'work_experience_{i}_organization'))
-                        if organization:
-                            WorkExperience.objects.create(
-                                staff=staff_profile,
-                                employment_period=clean_string(row.get(f'work_experience_{i}_employment_period')),
-                                organization=organization,
-                                position=clean_string(row.get(f'work_experience_{i}_position')),
-                                salary=clean_string(row.get(f'work_experience_{i}_salary'))
-                            )
-                    
-                    # 匯入專業資格（1-4）
-                    for i in range(1, 5):
-                        qualification_name = clean_string(row.get(f'professional_qualification_{i}_name'))
-                        issue_date = parse_date(row.get(f'professional_qualification_{i}_issue_date'))
-                        if qualification_name and issue_date:  # 只有當專業資格名稱和頒授日期都有值時才創建
-                            ProfessionalQualification.objects.create(
-                                staff=staff_profile,
-                                qualification_name=qualification_name,
-                                issuing_organization=clean_string(row.get(f'professional_qualification_{i}_issuing_organization')),
-                                issue_date=issue_date
-                            )
-                    
-                    # 匯入社團職務（1-4）
-                    for i in range(1, 5):
-                        association_name = clean_string(row.get(f'association_{i}_name'))
-                        if association_name:
-                            AssociationPosition.objects.create(
-                                staff=staff_profile,
-                                association_name=association_name,
-                                position=clean_string(row.get(f'association_{i}_position')),
-                                start_year=clean_string(row.get(f'association_{i}_start_year')),
-                                end_year=clean_string(row.get(f'association_{i}_end_year'))
-                            )
-                    
-                    # 更新教育標記 - CSV設定優先於自動計算
-                    csv_is_master = parse_boolean(row.get('is_master'))
-                    csv_is_phd = parse_boolean(row.get('is_phd')) 
-                    csv_is_overseas = parse_boolean(row.get('is_overseas_study'))
-                    
-                    # 檢查CSV是否有明確的FALSE設定
-                    csv_master_false = row.get('is_master', '').strip().lower() == 'false'
-                    csv_phd_false = row.get('is_phd', '').strip().lower() == 'false'
-                    csv_overseas_false = row.get('is_overseas_study', '').strip().lower() == 'false'
-                    
-                    # 先根據教育記錄自動更新
-                    staff_profile.update_global_education_flags()
-                    
-                    # CSV設定優先：True或False都要尊重
-                    if csv_is_master or csv_master_false:
-                        staff_profile.is_master = csv_is_master
-                    if csv_is_phd or csv_phd_false:
-                        staff_profile.is_phd = csv_is_phd
-                    if csv_is_overseas or csv_overseas_false:
-                        staff_profile.is_overseas_study = csv_is_overseas
-                        
-                    # 保存最終的標記
-                    staff_profile.save(update_fields=['is_master', 'is_phd', 'is_overseas_study'])
-                    
-                    imported_count += 1
-                    
-                except Exception as row_error:
-                    errors.append(f"第{row_num}行處理錯誤: {str(row_error)}")
-                    continue
-        
-        # 返回詳細結果資訊
-        if errors:
-            logging.warning(f"CSV匯入完成，成功{imported_count}條，錯誤{len(errors)}條: {errors[:5]}")
-        else:
-            logging.info(f"CSV匯入成功: {imported_count}條記錄")
-            
-        return {
-            'imported_count': imported_count,
-            'errors': errors,
-            'total_rows_processed': len(list(csv.DictReader(open(csv_file_path, 'r', encoding='utf-8-sig')))) if imported_count > 0 or errors else 0
-        }
-        
+        result = import_file(csv_file_path, mode=mode, child_strategy=child_strategy)
     except Exception as e:
-        logging.error(f"Error in import_data: {e}")
+        logger.error(f"Error in import_data: {e}")
         return {
             'imported_count': 0,
             'errors': [f"檔案處理錯誤: {str(e)}"],
             'total_rows_processed': 0
         }
 
+    # 返回詳細結果資訊
+    if result['errors']:
+        logger.warning(f"CSV匯入完成，成功{result['imported_count']}條，錯誤{len(result['errors'])}條: {result['errors'][:5]}")
+    else:
+        logger.info(f"CSV匯入成功: {result['imported_count']}條記錄")
+    return result
+
 class StatisticsView(View):
     def get(self, request, *args, **kwargs):
         # 這裡編寫獲取統計數據的邏輯
@@ -366,6 +95,16 @@ class StaffProfileViewSet(viewsets.ModelViewSet):
         context.update({"request": self.request})
         return context
 
+    def list(self, request, *args, **kwargs):
+        """
+        列表只讀，以 StaffProfileReader 按 values() 直接組成輸出（與 StaffProfileSerializer 相同），
+        不為每位員工及子記錄建立模型實例
+        """
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(StaffProfileReader(self.get_serializer_context()).read(queryset))
+
     # We will add custom permission logic later to differentiate between admin and staff roles.
 
 # You might want to add other viewsets for related models if they need to be managed independently,
@@ -395,38 +134,118 @@ def some_utility_function():
 
 frontend_logger = logging.getLogger('frontend_events')
 
+FRONTEND_LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'warn': logging.WARNING,
+    'error': logging.ERROR,
+}
+
+
+class FrontendLogPayloadTooLarge(Exception):
+    pass
+
+
 @method_decorator(csrf_exempt, name='dispatch') # 如果您的前端請求沒有 CSRF token，需要這個
 class FrontendLogView(View):
+    """
+    前端日誌批量接收端點
+    請求體可以是單個事件、事件數組或 {"events": [...]}，支援 Content-Encoding: gzip。
+    按 IP 及會話進行令牌桶限流（每個事件消耗一個令牌），並限制請求體大小；
+    事件交給 frontend_events logger，由日誌隊列在背景線程寫入文件。
+    """
+
     def post(self, request, *args, **kwargs):
+        config = settings.FRONTEND_LOG_INGEST
         try:
-            data = json.loads(request.body)
-            log_level = data.get('level', 'info').lower() # 前端可以指定日誌級別
-            message = data.get('message', '')
-            details = data.get('details', {})
-
-            log_entry = f"[Frontend Log - {log_level.upper()}] {message}"
-            if details:
-                log_entry += f" | Details: {json.dumps(details)}"
-
-            if log_level == 'error':
-                frontend_logger.error(log_entry)
-            elif log_level == 'warning':
-                frontend_logger.warning(log_entry)
-            elif log_level == 'debug':
-                frontend_logger.debug(log_entry)
-            else: # 默認為 info
-                frontend_logger.info(log_entry)
-                
-            return JsonResponse({"status": "success", "message": "Log received"}, status=200)
-        except json.JSONDecodeError:
-            frontend_logger.error("[Frontend Log View] Invalid JSON received for logging.")
-            return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+            # 在解析請求體之前先拒絕過大的請求（沒有 Content-Length 時按實際讀取的大小）
+            if not within_body_limit(request, config['MAX_BODY_BYTES']):
+                return JsonResponse({"status": "error", "message": "Payload too large"}, status=413)
+
+            try:
+                events = self._parse_events(request, config)
+            except FrontendLogPayloadTooLarge:
+                return JsonResponse({"status": "error", "message": "Payload too large"}, status=413)
+            except (ValueError, OSError, zlib.error):
+                frontend_logger.warning("[Frontend Log View] Invalid payload received for logging.")
+                return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+            if not events:
+                return JsonResponse({"status": "success", "message": "Log received", "accepted": 0}, status=200)
+            if len(events) > config['MAX_EVENTS']:
+                return JsonResponse(
+                    {"status": "error", "message": f"Too many events (max {config['MAX_EVENTS']})"},
+                    status=413,
+                )
+
+            client_ip = get_client_ip(request)
+            retry_after = self._throttle(request, get_throttle_ip(request), len(events), config)
+            if retry_after is not None:
+                response = JsonResponse({"status": "error", "message": "Too many log events"}, status=429)
+                response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+
+            for event in events:
+                self._emit(event, client_ip, config)
+
+            return JsonResponse({"status": "success", "message": "Log received", "accepted": len(events)}, status=200)
         except Exception as e:
             # 記錄這個視圖本身的錯誤到常規的後端錯誤日誌
-            error_logger = logging.getLogger(__name__) # 或者 'django'
-            error_logger.error(f"Error in FrontendLogView: {e}", exc_info=True)
+            logger.error(f"Error in FrontendLogView: {e}", exc_info=True)
             return JsonResponse({"status": "error", "message": "Internal server error"}, status=500)
 
+    def _parse_events(self, request, config):
+        """讀取並解壓請求體，返回事件列表"""
+        body = request.body
+        if len(body) > config['MAX_BODY_BYTES']:
+            raise FrontendLogPayloadTooLarge()
+
+        if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+            # 限制解壓後大小，防止壓縮炸彈
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(body, config['MAX_DECOMPRESSED_BYTES'])
+            if decompressor.unconsumed_tail:
+                raise FrontendLogPayloadTooLarge()
+
+        data = json_loads(body)
+        if isinstance(data, dict):
+            data = data['events'] if isinstance(data.get('events'), list) else [data]
+        if not isinstance(data, list):
+            raise ValueError("events must be a list")
+        return [event for event in data if isinstance(event, dict)]
+
+    def _throttle(self, request, throttle_ip, cost, config):
+        """按 IP、會話及全局扣除令牌，被限流時返回需要等待的秒數，否則返回 None"""
+        checks = [(TokenBucket('frontend_log_ip', config['IP_RATE'], config['IP_BURST']), throttle_ip)]
+        session_key = request.headers.get('X-Session-Id') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session_key:
+            checks.append((
+                TokenBucket('frontend_log_session', config['SESSION_RATE'], config['SESSION_BURST']),
+                session_key[:64],
+            ))
+        checks.append((TokenBucket('frontend_log_global', config['GLOBAL_RATE'], config['GLOBAL_BURST']), 'global'))
+
+        bucket_name, retry_after = consume_buckets(checks, cost)
+        if bucket_name is None:
+            return None
+        report_throttle_hit(request, 'frontend_log', bucket_name)
+        return retry_after or 1
+
+    def _emit(self, event, client_ip, config):
+        log_level = str(event.get('level', 'info')).lower() # 前端可以指定日誌級別
+        level_no = FRONTEND_LOG_LEVELS.get(log_level, logging.INFO) # 默認為 info
+        message = str(event.get('message', ''))[:config['MAX_MESSAGE_LENGTH']]
+        details = event.get('details') or {}
+        if not isinstance(details, dict):
+            details = {'value': details}
+
+        # 詳細信息以結構化欄位傳遞，JSON 序列化在日誌背景線程中完成
+        frontend_logger.log(
+            level_no, "[Frontend Log - %s] %s", logging.getLevelName(level_no), message,
+            extra={'client_ip': client_ip, 'client_ts': event.get('timestamp'), 'details': details},
+        )
+
 @method_decorator(csrf_exempt, name='dispatch') # 暫時禁用 CSRF，生產環境應使用 token
 class BatchPhotoUploadView(APIView):
     """
@@ -437,7 +256,7 @@ class BatchPhotoUploadView(APIView):
     """
     
     def post(self, request, *args, **kwargs):
-        logger.info(f"[DEBUG] BatchPhotoUploadView.post user={request.user}")
+        logger.debug(f"[DEBUG] BatchPhotoUploadView.post user={request.user}")
         
         # 檢查用戶權限
         if not (request.user.is_staff or request.user.is_superuser):
@@ -544,7 +363,7 @@ class BatchPhotoUploadView(APIView):
 @method_decorator(csrf_exempt, name='dispatch') # 暫時禁用 CSRF，生產環境應使用 token
 class ImportStaffDataView(APIView):
     def post(self, request, *args, **kwargs):
-        logger.info(f"[DEBUG] ImportStaffDataView.post user={request.user}, is_authenticated={getattr(request.user, 'is_authenticated', None)}, is_staff={getattr(request.user, 'is_staff', None)}, auth={getattr(request, 'auth', None)}, headers={dict(request.headers)}")
+        logger.debug(f"[DEBUG] ImportStaffDataView.post user={request.user}, is_authenticated={getattr(request.user, 'is_authenticated', None)}, is_staff={getattr(request.user, 'is_staff', None)}, auth={getattr(request, 'auth', None)}, headers={dict(request.headers)}")
         if not request.user.is_staff: # 或者更嚴格的權限檢查，例如 is_superuser
             return JsonResponse({"status": "error", "message": "權限不足"}, status=403)
 
@@ -552,22 +371,35 @@ class ImportStaffDataView(APIView):
         if not csv_file:
             return JsonResponse({"status": "error", "message": "沒有提供文件"}, status=400)
 
-        if not csv_file.name.endswith('.csv'):
-            return JsonResponse({"status": "error", "message": "文件格式必須是 CSV"}, status=400)
+        extension = os.path.splitext(csv_file.name)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            return JsonResponse({"status": "error", "message": "文件格式必須是 CSV 或 XLSX"}, status=400)
+
+        # mode=upsert 時更新已存在的員工；child_strategy 決定子記錄以檔案內容取代 (replace) 或合併 (merge)
+        mode = self._param(request, 'mode') or 'insert'
+        child_strategy = self._param(request, 'child_strategy') or 'replace'
+        if mode not in IMPORT_MODES or child_strategy not in CHILD_STRATEGIES:
+            return JsonResponse({"status": "error", "message": "不支援的匯入模式 Unsupported import mode"}, status=400)
 
         tmp_file_path = None # 初始化以備在 except 塊中使用
         try:
             # 使用 delete=False 確保文件在關閉後不會立即被刪除
             # 我們將在 import_data 調用後手動刪除它
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='wb+') as tmp_file:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=extension, mode='wb+') as tmp_file:
                 for chunk in csv_file.chunks():
                     tmp_file.write(chunk)
                 tmp_file_path = tmp_file.name
                 # 文件在這裡仍然是打開的，或者剛剛關閉，但因為 delete=False，它應該還存在
             
             # 現在 tmp_file_path 指向已保存的臨時文件
+            # 驗證模式 (dry_run=true)：只檢查文件，不寫入資料庫
+            if self._param(request, 'dry_run') == 'true':
+                return self._validate(request, tmp_file_path, mode)
+
             # 調用導入數據的函數
-            result = import_data(tmp_file_path)
+            result = import_data(tmp_file_path, mode=mode, child_strategy=child_strategy)
+            # upsert 模式的新增/更新/無變化數
+            counts = {key: result[key] for key in ('inserted_count', 'updated_count', 'unchanged_count') if key in result}
             
             if result['errors']:
                 # 有錯誤的情況
@@ -576,14 +408,15 @@ class ImportStaffDataView(APIView):
                 if remaining_errors > 0:
                     error_details += f'\n... 還有 {remaining_errors} 個錯誤 (... and {remaining_errors} more errors)'
                 
-                if result['imported_count'] > 0:
+                if result['imported_count'] > 0 or counts.get('unchanged_count'):
                     # 部分成功 Partial Success
                     return JsonResponse({
                         "status": "warning", 
                         "message": f"部分導入成功 Partial Import Success：成功 Success {result['imported_count']} 條 records，失敗 Failed {len(result['errors'])} 條 records",
                         "details": error_details,
                         "imported_count": result['imported_count'],
-                        "error_count": len(result['errors'])
+                        "error_count": len(result['errors']),
+                        **counts
                     }, status=200)
                 else:
                     # 完全失敗 Complete Failure
@@ -592,15 +425,21 @@ class ImportStaffDataView(APIView):
                         "message": f"導入失敗 Import Failed：0條成功 0 successful，{len(result['errors'])}條失敗 {len(result['errors'])} failed",
                         "details": error_details,
                         "imported_count": 0,
-                        "error_count": len(result['errors'])
+                        "error_count": len(result['errors']),
+                        **counts
                     }, status=400)
             else:
                 # 完全成功 Complete Success
+                message = f"成功導入 Successfully Imported {result['imported_count']} 條員工記錄 staff records"
+                if counts:
+                    message = (f"匯入完成 Import Completed：新增 Inserted {counts['inserted_count']} 條，"
+                               f"更新 Updated {counts['updated_count']} 條，無變化 Unchanged {counts['unchanged_count']} 條")
                 return JsonResponse({
                     "status": "success", 
-                    "message": f"成功導入 Successfully Imported {result['imported_count']} 條員工記錄 staff records",
+                    "message": message,
                     "imported_count": result['imported_count'],
-                    "error_count": 0
+                    "error_count": 0,
+                    **counts
                 }, status=201)
 
         except Exception as e:
@@ -615,6 +454,149 @@ class ImportStaffDataView(APIView):
                 except Exception as e_remove:
                     logger.error(f"刪除臨時文件 {tmp_file_path} 時發生錯誤: {e_remove}", exc_info=True)
 
+    @staticmethod
+    def _param(request, name):
+        return str(request.data.get(name) or request.query_params.get(name, '')).lower()
+
+    def _validate(self, request, file_path, mode):
+        """
+        驗證文件而不匯入
+        report=csv 時返回逐行錯誤報告 (CSV)，否則返回 JSON 摘要及完整的問題列表
+        """
+        result = validate_file(file_path, mode=mode)
+        issues = result['issues']
+
+        if self._param(request, 'report') == 'csv':
+            response = HttpResponse(issues_to_csv(issues), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = 'attachment; filename="staff_import_report.csv"'
+            return response
+
+        if result['error_rows']:
+            status_text = "error"
+            message = f"驗證未通過 Validation Failed：{result['error_rows']} 行有錯誤 rows with errors，{result['valid_rows']} 行可匯入 rows importable"
+        elif issues:
+            status_text = "warning"
+            message = f"驗證通過，但有 {result['warning_count']} 個警告 Validation passed with {result['warning_count']} warnings"
+        else:
+            status_text = "success"
+            message = f"驗證通過 Validation Passed：{result['total_rows']} 行可匯入 rows importable"
+
+        details = [
+            f"第{issue['row']}行 {issue['column']}: {issue['message']}（{issue['value']}）"
+            for issue in issues[:10]
+        ]
+        if len(issues) > 10:
+            details.append(f"... 還有 {len(issues) - 10} 個問題 (... and {len(issues) - 10} more issues)")
+
+        return JsonResponse({
+            "status": status_text,
+            "message": message,
+            "dry_run": True,
+            "details": '\n'.join(details),
+            "total_rows": result['total_rows'],
+            "valid_rows": result['valid_rows'],
+            "error_count": result['error_rows'],
+            "warning_count": result['warning_count'],
+            "issues": issues,
+            "date_formats": result['date_formats'],
+        }, status=200)
+
+
+# 兼容讀取層輸出的子記錄
+LEGACY_STAFF_PREFETCH = (
+    'family_members', 'education_backgrounds', 'work_experiences',
+    'professional_qualifications', 'association_positions', 'employment_records',
+)
+
+
+class LegacyStaffQuerysetMixin:
+    """
+    舊版 apps.users 員工 API（emp/list/、emp/<pk>/）的兼容讀取層，數據來自 StaffProfile
+    子記錄以 prefetch 載入，每個請求的查詢數與員工數無關；非管理員只能查看在職員工
+    """
+    serializer_class = LegacyStaffSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = StaffProfile.objects.select_related('user_account').prefetch_related(
+            *LEGACY_STAFF_PREFETCH
+        ).order_by('staff_id')
+        if not (self.request.user.is_staff or self.request.user.is_superuser):
+            queryset = queryset.filter(is_active=True)
+        return queryset
+
+
+class LegacyStaffPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class LegacyStaffListView(LegacyStaffQuerysetMixin, generics.ListAPIView):
+    """分頁返回；年資使用 StaffProfile 已保存的 school_seniority_description，不逐行計算"""
+    pagination_class = LegacyStaffPagination
+
+
+class LegacyStaffDetailView(LegacyStaffQuerysetMixin, generics.RetrieveAPIView):
+    pass
+
+
+class SearchView(APIView):
+    """
+    全文搜尋 API 端點（倒排索引，見 search.py）
+    GET /api/search/?q=陳大文&type=staff&limit=20
+    type=staff 搜尋員工檔案（非管理員只返回在職員工）；type=application 搜尋入職申請（只限管理員）
+    結果按相關度排序
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+    RESULT_FIELDS = {
+        'staff': ('id', 'staff_id', 'name_chinese', 'name_foreign', 'staff_name', 'position_grade', 'is_active'),
+        'application': ('submission_id', 'name_chinese', 'name_foreign', 'status', 'application_date'),
+    }
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        document_type = request.query_params.get('type', 'staff')
+        if document_type not in SEARCH_DOCUMENTS:
+            return Response({'error': f'不支援的搜尋類型: {document_type}'}, status=status.HTTP_400_BAD_REQUEST)
+        is_admin = request.user.is_staff or request.user.is_superuser
+        if document_type == 'application' and not is_admin:
+            return Response({'error': '權限不足'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit 必須為整數'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = apps.get_model(SEARCH_DOCUMENTS[document_type]['model'])
+        queryset = model._default_manager.all()
+        if document_type == 'staff' and not is_admin:
+            queryset = queryset.filter(is_active=True)
+
+        # 按排名分批取出文件，跳過被過濾的文件直至取夠 limit 個
+        ranked = search(document_type, query, limit=None)
+        results = []
+        for start in range(0, len(ranked), limit):
+            batch = ranked[start:start + limit]
+            documents = queryset.in_bulk([document_id for document_id, _ in batch])
+            for document_id, score in batch:
+                document = documents.get(document_id)
+                if document is not None:
+                    row = {field: getattr(document, field) for field in self.RESULT_FIELDS[document_type]}
+                    row['score'] = score
+                    results.append(row)
+            if len(results) >= limit:
+                break
+        results = results[:limit]
+
+        return Response({
+            'query': query,
+            'type': document_type,
+            'count': len(results),
+            'results': results,
+        })
+
 
 class ChangePasswordView(APIView):
     """
@@ -29,6 +29,30 @@ import {
 import { useNavigate } from 'react-router-dom';
 import Header from '../components/Header';
 
+function getCookie(name) {
+  let cookieValue = null;
+  if (document.cookie && document.cookie !== '') {
+    const cookies = document.cookie.split(';');
+    for (let i = 0; i < cookies.length; i++) {
+      const cookie = cookies[i].trim();
+      if (cookie.substring(0, name.length + 1) === (name + '=')) {
+        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+        break;
+      }
+    }
+  }
+  return cookieValue;
+}
+
+function importRequestHeaders() {
+  const token = localStorage.getItem('token');
+  return {
+    'Content-Type': 'multipart/form-data',
+    'X-CSRFToken': getCookie('csrftoken'),
+    ...(token ? { 'Authorization': `Token ${token}` } : {})
+  };
+}
+
 function ImportStaffData() {
   const navigate = useNavigate();
   const [selectedFile, setSelectedFile] = useState(null);
@@ -51,34 +75,13 @@ function ImportStaffData() {
     const formData = new FormData();
     formData.append('file', selectedFile);
 
-    function getCookie(name) {
-      let cookieValue = null;
-      if (document.cookie && document.cookie !== '') {
-        const cookies = document.cookie.split(';');
-        for (let i = 0; i < cookies.length; i++) {
-          const cookie = cookies[i].trim();
-          if (cookie.substring(0, name.length + 1) === (name + '=')) {
-            cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
-            break;
-          }
-        }
-      }
-      return cookieValue;
-    }
-    const csrftoken = getCookie('csrftoken');
-
     setIsLoading(true);
     setUploadStatus('上傳並導入中...');
     setUploadResult(null); // 清除舊結果
 
     try {
-      const token = localStorage.getItem('token');
       const response = await axios.post('/api/staff/import/', formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-          'X-CSRFToken': csrftoken,
-          ...(token ? { 'Authorization': `Token ${token}` } : {})
-        },
+        headers: importRequestHeaders(),
       });
       
       // 處理成功和警告狀態
@@ -122,6 +125,71 @@ function ImportStaffData() {
     }
   }; // <--- 確保 handleUpload 的結束大括號在這裡
 
+  // 只驗證文件，不寫入資料庫
+  const handleValidate = async () => {
+    if (!selectedFile) {
+      setUploadStatus('請選擇一個文件');
+      return;
+    }
+
+    const formData = new FormData();
+    formData.append('file', selectedFile);
+    formData.append('dry_run', 'true');
+
+    setIsLoading(true);
+    setUploadStatus('驗證中...');
+    setUploadResult(null);
+
+    try {
+      const response = await axios.post('/api/staff/import/', formData, {
+        headers: importRequestHeaders(),
+      });
+      setUploadStatus(response.data.message);
+      if (response.data.issues && response.data.issues.length > 0) {
+        setUploadResult({
+          errors: response.data.details.split('\n').filter(line => line.trim()),
+          imported_count: response.data.valid_rows,
+          error_count: response.data.error_count,
+          hasReport: true
+        });
+      }
+    } catch (error) {
+      const errorMessage = error.response?.data?.message || error.message;
+      setUploadStatus(`驗證失敗: ${errorMessage}`);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  // 下載逐行錯誤報告 (CSV)
+  const handleDownloadReport = async () => {
+    if (!selectedFile) {
+      return;
+    }
+
+    const formData = new FormData();
+    formData.append('file', selectedFile);
+    formData.append('dry_run', 'true');
+    formData.append('report', 'csv');
+
+    try {
+      const response = await axios.post('/api/staff/import/', formData, {
+        headers: importRequestHeaders(),
+        responseType: 'blob',
+      });
+      const url = window.URL.createObjectURL(new Blob([response.data], { type: 'text/csv' }));
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'staff_import_report.csv';
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      setUploadStatus(`下載錯誤報告失敗: ${error.message}`);
+    }
+  };
+
   const handleDownloadTemplate = () => {
     window.location.href = '/import_data_format_sample_utf8_bom.csv';
   };
@@ -208,7 +276,7 @@ function ImportStaffData() {
           </FormLabel>
           <Input
             type="file"
-            accept=".csv"
+            accept=".csv,.xlsx"
             onChange={handleFileChange}
             sx={{ 
               width: '100%',
@@ -246,6 +314,16 @@ function ImportStaffData() {
         >
           {isLoading ? '正在導入...' : '🚀 上傳並導入 Upload & Import'}
         </Button>
+        <Button 
+          variant="outlined"
+          size="large"
+          startIcon={<CheckCircleIcon />}
+          onClick={handleValidate} 
+          disabled={!selectedFile || isLoading}
+          sx={{ minWidth: '200px', ml: 2 }}
+        >
+          只驗證 Validate Only
+        </Button>
 
         {/* 進度條 */}
         {isLoading && (
@@ -277,6 +355,16 @@ function ImportStaffData() {
                 </Typography>
                 {(uploadResult.imported_count !== undefined || uploadResult.error_count !== undefined) && (
                   <Box sx={{ display: 'flex', gap: 2 }}>
+                    {uploadResult.hasReport && (
+                      <Button
+                        size="small"
+                        startIcon={<DownloadIcon />}
+                        onClick={handleDownloadReport}
+                        disabled={!selectedFile}
+                      >
+                        下載錯誤報告 Download Report
+                      </Button>
+                    )}
                     <Chip 
                       label={`成功 Success: ${uploadResult.imported_count || 0}`}
                       color="success"